@@ -0,0 +1 @@
+"""Benchmarks de desempenho do TP2-B (correr a partir da raiz do projeto com ``python -m benchmarks.<nome>``)."""
@@ -0,0 +1,67 @@
+"""Custo por registo das pesquisas por ID via gRPC: GetRecordByID em ciclo vs GetRecordsByIDs vs stream.
+
+Uso: python -m benchmarks.batch_lookup [ids] [registos]
+"""
+import random
+import sys
+import time
+from concurrent import futures
+
+import grpc
+
+import client
+import property_service_pb2 as pb2
+import property_service_pb2_grpc as pb2_grpc
+from benchmarks.lookup import build_tree
+from dataset_registry import DatasetRegistry
+from server import PropertyServicer, SharedState
+
+DEFAULT_IDS = 5_000
+DEFAULT_RECORDS = 50_000
+
+
+def per_id(stub, ids):
+    return [stub.GetRecordByID(pb2.RecordRequest(property_id=int(record_id))).record_xml for record_id in ids]
+
+
+def unary_batch(stub, ids):
+    return [rec.record_xml for rec in stub.GetRecordsByIDs(pb2.RecordsRequest(ids=ids)).records]
+
+
+def stream(stub, ids):
+    return [xml for _, xml in client.fetch_records(stub, ids)]
+
+
+def main(count: int, n: int):
+    state = SharedState()
+    # dataset sintético: nada é gravado ao lado do XML real (snapshot binário, registo de alterações)
+    state.snapshot_path = ""
+    state.change_log = None
+    state.set_tree(build_tree(n))
+    server = grpc.server(futures.ThreadPoolExecutor(max_workers=4))
+    pb2_grpc.add_PropertyServiceServicer_to_server(PropertyServicer(DatasetRegistry.single(state)), server)
+    port = server.add_insecure_port("127.0.0.1:0")
+    server.start()
+    ids = [str(random.randint(1, n)) for _ in range(count)]
+    print(f"{count} IDs aleatórios, {n} registos")
+    print(f"{'modo':>16} {'total_s':>9} {'us/registo':>11}")
+    with grpc.insecure_channel(f"127.0.0.1:{port}") as channel:
+        stub = pb2_grpc.PropertyServiceStub(channel)
+        reference = None
+        for name, fn in (("GetRecordByID", per_id), ("GetRecordsByIDs", unary_batch), ("stream", stream)):
+            # cache de resultados vazia em cada modo para a comparação ser justa
+            state.result_cache.reset(state.snapshot.version)
+            start = time.perf_counter()
+            results = fn(stub, ids)
+            elapsed = time.perf_counter() - start
+            reference = reference or results
+            assert results == reference, name
+            print(f"{name:>16} {elapsed:>9.3f} {elapsed / count * 1e6:>11.1f}")
+    server.stop(None)
+
+
+if __name__ == "__main__":
+    main(
+        int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_IDS,
+        int(sys.argv[2]) if len(sys.argv) > 2 else DEFAULT_RECORDS,
+    )
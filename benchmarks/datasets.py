@@ -0,0 +1,68 @@
+"""Geradores de CSV sintéticos com o formato dos datasets suportados."""
+import csv
+import random
+
+HOUSE_COLUMNS = [
+    "property_id", "country", "city", "property_type", "furnishing_status", "property_size_sqft",
+    "price", "constructed_year", "previous_owners", "rooms", "bathrooms", "garage", "garden",
+    "crime_cases_reported", "legal_cases_on_property", "customer_salary", "loan_amount",
+    "loan_tenure_years", "monthly_expenses", "down_payment", "emi_to_income_ratio",
+    "satisfaction_score", "neighbourhood_rating", "connectivity_score", "decision",
+]
+
+TRADE_COLUMNS = [
+    "country_or_area", "year", "comm_code", "commodity", "flow", "trade_usd", "weight_kg",
+    "quantity_name", "quantity", "category",
+]
+
+COUNTRIES = ["Portugal", "Spain", "France", "Germany", "Brazil", "Japan", "India", "Canada"]
+CITIES = ["Lisbon", "Porto", "Braga", "Madrid", "Paris", "Berlin", "São Paulo", "Tokyo", "Mumbai", "Toronto"]
+COMMODITIES = [
+    "Horses, live except pure-bred breeding",
+    "Bovine animals, live <pure-bred>",
+    "Fish fillets & other fish meat",
+    "Wine of fresh grapes",
+]
+
+
+def write_house_csv(path: str, rows: int, seed: int = 42) -> str:
+    rnd = random.Random(seed)
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(HOUSE_COLUMNS)
+        for i in range(1, rows + 1):
+            price = rnd.randint(50_000, 2_000_000)
+            salary = rnd.randint(10_000, 300_000)
+            writer.writerow([
+                i, rnd.choice(COUNTRIES), rnd.choice(CITIES), rnd.choice(["Apartment", "Villa", "Townhouse"]),
+                rnd.choice(["Furnished", "Unfurnished", "Semi-Furnished"]), rnd.randint(300, 6000),
+                price, rnd.randint(1950, 2024), rnd.randint(0, 6), rnd.randint(1, 8), rnd.randint(1, 5),
+                rnd.randint(0, 1), rnd.randint(0, 1), rnd.randint(0, 10), rnd.randint(0, 3), salary,
+                int(price * rnd.uniform(0.3, 0.9)), rnd.choice([10, 15, 20, 25, 30]),
+                rnd.randint(500, 8000), int(price * rnd.uniform(0.1, 0.4)), round(rnd.uniform(0.05, 0.9), 2),
+                rnd.randint(1, 10), rnd.randint(1, 10), rnd.randint(1, 10), rnd.randint(0, 1),
+            ])
+    return path
+
+
+def write_trade_csv(path: str, rows: int, seed: int = 42) -> str:
+    rnd = random.Random(seed)
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(TRADE_COLUMNS)
+        for _ in range(rows):
+            # peso e quantidade em falta em ~5% das linhas, como no dataset original
+            missing = rnd.random() < 0.05
+            writer.writerow([
+                rnd.choice(COUNTRIES), rnd.randint(1988, 2016), f"{rnd.randint(10000, 999999):06d}",
+                rnd.choice(COMMODITIES), rnd.choice(["Export", "Import", "Re-Export"]),
+                rnd.randint(1, 10**9), "" if missing else rnd.randint(1, 10**7), "Number of items",
+                "" if missing else float(rnd.randint(1, 10**6)), "01_live_animals",
+            ])
+    return path
+
+
+WRITERS = {
+    "house": (write_house_csv, "property_id"),
+    "trade": (write_trade_csv, "id"),
+}
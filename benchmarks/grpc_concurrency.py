@@ -0,0 +1,94 @@
+"""Servidor gRPC com pool de threads vs grpc.aio sob muitos streams ExecuteXPathStream em simultâneo.
+
+Mede o tempo total, erros, threads do processo e a latência de CountRecords (chamada leve) enquanto
+os streams correm.
+
+Uso: python -m benchmarks.grpc_concurrency [streams] [registos]
+"""
+import asyncio
+import statistics
+import sys
+import threading
+import time
+from concurrent import futures
+
+import grpc
+
+import property_service_pb2 as pb2
+import property_service_pb2_grpc as pb2_grpc
+from benchmarks.lookup import build_tree
+from dataset_registry import DatasetRegistry
+from server import PropertyServicer, SharedState, serve_grpc_aio
+
+DEFAULT_STREAMS = 500
+DEFAULT_RECORDS = 20_000
+PROBE_INTERVAL = 0.05
+
+
+def start_threads_server(state: SharedState, address: str):
+    server = grpc.server(futures.ThreadPoolExecutor(max_workers=10))
+    pb2_grpc.add_PropertyServiceServicer_to_server(PropertyServicer(DatasetRegistry.single(state)), server)
+    server.add_insecure_port(address)
+    server.start()
+    return server
+
+
+def start_aio_server(state: SharedState, address: str):
+    # o servidor aio fica no seu próprio event loop, numa thread à parte do cliente
+    threading.Thread(target=asyncio.run, args=(serve_grpc_aio(DatasetRegistry.single(state), address),), daemon=True).start()
+
+
+async def load(address: str, streams: int, n: int):
+    async with grpc.aio.insecure_channel(address) as channel:
+        await channel.channel_ready()
+        stub = pb2_grpc.PropertyServiceStub(channel)
+
+        async def one_stream(i: int):
+            query = f"//property[price > {100000 + i * 7 % n}]/city"
+            count = 0
+            async for response in stub.ExecuteXPathStream(pb2.QueryRequest(query=query, batch_size=100)):
+                count += len(response.results)
+            return count
+
+        latencies = []
+        peak_threads = threading.active_count()
+        start = time.perf_counter()
+        tasks = asyncio.gather(*(one_stream(i) for i in range(streams)), return_exceptions=True)
+        while not tasks.done():
+            probe = time.perf_counter()
+            await stub.CountRecords(pb2.DatasetRequest())
+            latencies.append((time.perf_counter() - probe) * 1000)
+            peak_threads = max(peak_threads, threading.active_count())
+            await asyncio.sleep(PROBE_INTERVAL)
+        elapsed = time.perf_counter() - start
+        errors = sum(isinstance(result, Exception) for result in tasks.result())
+        return elapsed, errors, peak_threads, latencies
+
+
+def main(streams: int, n: int):
+    state = SharedState()
+    # dataset sintético: nada é gravado ao lado do XML real (snapshot binário, registo de alterações)
+    state.snapshot_path = ""
+    state.change_log = None
+    state.set_tree(build_tree(n))
+    print(f"{streams} streams em simultâneo, {n} registos")
+    print(f"{'modo':>8} {'total_s':>8} {'erros':>6} {'threads':>8} {'count_p50_ms':>13} {'count_p95_ms':>13}")
+    modes = (("threads", start_threads_server, "127.0.0.1:50061"), ("aio", start_aio_server, "127.0.0.1:50062"))
+    for mode, start, address in modes:
+        server = start(state, address)
+        elapsed, errors, threads, latencies = asyncio.run(load(address, streams, n))
+        latencies.sort()
+        p95 = latencies[int(len(latencies) * 0.95)]
+        print(
+            f"{mode:>8} {elapsed:>8.2f} {errors:>6} {threads:>8} "
+            f"{statistics.median(latencies):>13.2f} {p95:>13.2f}"
+        )
+        if server is not None:
+            server.stop(None)
+
+
+if __name__ == "__main__":
+    main(
+        int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_STREAMS,
+        int(sys.argv[2]) if len(sys.argv) > 2 else DEFAULT_RECORDS,
+    )
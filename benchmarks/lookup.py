@@ -0,0 +1,63 @@
+"""Latência de GetRecordByID em função do tamanho do dataset: varrimento da árvore vs índice por ID.
+
+Uso: python -m benchmarks.lookup [tamanho ...]
+"""
+import random
+import sys
+import time
+
+from lxml import etree
+
+from server import SharedState, Snapshot
+
+DEFAULT_SIZES = [1_000, 10_000, 50_000, 150_000]
+LOOKUPS = 200
+
+
+def build_tree(n: int):
+    root = etree.Element("properties")
+    for i in range(1, n + 1):
+        prop = etree.SubElement(root, "property", property_id=str(i))
+        etree.SubElement(prop, "city").text = f"city_{i % 97}"
+        etree.SubElement(prop, "price").text = str(100000 + i)
+    return root.getroottree()
+
+
+def scan_lookup(snap: Snapshot, target_id: str):
+    # caminho anterior: percorre todos os elementos até encontrar o ID
+    for prop in snap.root.iter(snap.item_tag):
+        if prop.get(snap.id_attr) == target_id:
+            return prop
+    return None
+
+
+def index_lookup(snap: Snapshot, target_id: str):
+    return snap.index.get(target_id)
+
+
+def measure(fn, snap: Snapshot, ids) -> float:
+    start = time.perf_counter()
+    for target_id in ids:
+        fn(snap, target_id)
+    return (time.perf_counter() - start) / len(ids) * 1e6
+
+
+def main(sizes):
+    print(f"{'registos':>10} {'build_ms':>10} {'scan_us':>12} {'index_us':>10}")
+    for n in sizes:
+        state = SharedState()
+        # dataset sintético: nada é gravado ao lado do XML real (snapshot binário, registo de alterações)
+        state.snapshot_path = ""
+        state.change_log = None
+        tree = build_tree(n)
+        start = time.perf_counter()
+        snap = state.set_tree(tree)
+        build_ms = (time.perf_counter() - start) * 1000
+        ids = [str(random.randint(1, n)) for _ in range(LOOKUPS)]
+        scan_us = measure(scan_lookup, snap, ids)
+        index_us = measure(index_lookup, snap, ids)
+        print(f"{n:>10} {build_ms:>10.1f} {scan_us:>12.1f} {index_us:>10.3f}")
+
+
+if __name__ == "__main__":
+    main([int(a) for a in sys.argv[1:]] or DEFAULT_SIZES)
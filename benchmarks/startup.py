@@ -0,0 +1,45 @@
+"""Arranque do servidor: parse do XML + índice/colunas vs snapshot binário mapeado em memória.
+
+Uso: python -m benchmarks.startup [registos ...]
+"""
+import os
+import sys
+import tempfile
+import time
+
+import snapshot_store
+from benchmarks.lookup import build_tree
+from server import SharedState
+
+DEFAULT_SIZES = [50_000, 150_000]
+
+
+def timed_load(xml_path: str, snapshot_path: str) -> tuple:
+    state = SharedState()
+    state.xml_path, state.snapshot_path = xml_path, snapshot_path
+    # o registo de alterações do dataset real não é reaplicado ao XML sintético
+    state.change_log = None
+    start = time.perf_counter()
+    state.load_from_files()
+    return time.perf_counter() - start, state.snapshot
+
+
+def main(sizes):
+    print(f"{'registos':>10} {'xml_MB':>8} {'snapshot_MB':>12} {'parse_s':>9} {'mmap_s':>8}")
+    with tempfile.TemporaryDirectory() as workdir:
+        for n in sizes:
+            xml_path = os.path.join(workdir, f"{n}.xml")
+            snapshot_path = f"{xml_path}.snapshot"
+            build_tree(n).write(xml_path, encoding="UTF-8", xml_declaration=True)
+            parse_s, snap = timed_load(xml_path, "")
+            snapshot_store.write(snapshot_path, snapshot_store.source_signature(xml_path), snap)
+            mmap_s, mapped = timed_load(xml_path, snapshot_path)
+            assert mapped.stored is not None and mapped.count == snap.count
+            print(
+                f"{n:>10} {os.path.getsize(xml_path) / 1e6:>8.1f} {os.path.getsize(snapshot_path) / 1e6:>12.1f} "
+                f"{parse_s:>9.2f} {mmap_s:>8.3f}"
+            )
+
+
+if __name__ == "__main__":
+    main([int(a) for a in sys.argv[1:]] or DEFAULT_SIZES)
@@ -0,0 +1,388 @@
+"""Benchmark de ponta a ponta: CSV sintético -> XML/XSD -> validação -> upload -> carga concorrente.
+
+Para cada formato (``house``, ``trade``) e tamanho:
+
+1. gera o CSV sintético (``benchmarks.datasets``);
+2. mede ``xml_converter.generate_xml``, ``schema_creator.generate_xsd``, a validação com o XSD
+   (lxml, como no pipeline do cliente, e xmlschema, como em ``validator.py``),
+   ``UploadData`` e ``UploadDataStream`` contra um servidor no mesmo processo;
+3. lança clientes concorrentes gRPC e XML-RPC com uma mistura de chamadas e reporta, por RPC,
+   chamadas, erros, débito e latência p50/p95/p99.
+
+Os resultados são gravados em JSON; com ``--compare`` são comparados com uma execução anterior.
+
+Uso: python -m benchmarks.suite [--shapes house trade] [--rows 10000 ...] [--seconds 5] [--clients 8]
+                                [--output resultados.json] [--compare anterior.json]
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import xmlrpc.client
+from concurrent import futures
+
+import grpc
+import numpy as np
+import xmlschema
+from lxml import etree
+
+import client
+import metrics
+import property_service_pb2 as pb2
+import property_service_pb2_grpc as pb2_grpc
+import schema_creator
+import xml_converter
+from benchmarks.datasets import WRITERS
+from dataset_registry import DatasetRegistry
+from server import PropertyServicer, SharedState, make_xmlrpc_server
+
+DEFAULT_ROWS = [10_000]
+DEFAULT_SECONDS = 5.0
+DEFAULT_CLIENTS = 8
+DEFAULT_OUTPUT = "benchmark_suite.json"
+# variação (relativa) a partir da qual --compare assinala uma regressão
+REGRESSION_THRESHOLD = 0.10
+LOOKUP_BATCH = 50
+RESULT_LIMIT = 100
+
+
+def percentile(sorted_values, q: float) -> float:
+    # nearest-rank sobre a lista já ordenada
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * q))]
+
+
+def timed(fn, *args, **kwargs) -> float:
+    start = time.perf_counter()
+    fn(*args, **kwargs)
+    return time.perf_counter() - start
+
+
+def pipeline(shape: str, rows: int, workdir: str, stub, state: SharedState) -> dict:
+    """Tempos (segundos) de cada etapa, do CSV ao dataset publicado no servidor."""
+    writer, id_column = WRITERS[shape]
+    csv_path = os.path.join(workdir, f"{shape}_{rows}.csv")
+    xml_path = os.path.join(workdir, f"{shape}_{rows}.xml")
+    xsd_path = os.path.join(workdir, f"{shape}_{rows}.xsd")
+    stages = {"generate_csv": timed(writer, csv_path, rows)}
+    stages["generate_xml"] = timed(xml_converter.generate_xml, csv_path, id_column, xml_path=xml_path)
+    stages["generate_xsd"] = timed(schema_creator.generate_xsd, csv_path, id_column, xsd_path=xsd_path)
+
+    def validate_lxml():
+        etree.XMLSchema(etree.parse(xsd_path)).assertValid(etree.parse(xml_path))
+
+    def validate_xmlschema():
+        if not xmlschema.XMLSchema(xsd_path).is_valid(xmlschema.XMLResource(xml_path, lazy=True)):
+            raise ValueError(f"{xml_path} não é válido")
+
+    stages["validate_lxml"] = timed(validate_lxml)
+    stages["validate_xmlschema"] = timed(validate_xmlschema)
+
+    with open(xml_path, "rb") as f:
+        payload = f.read()
+    with open(xsd_path, encoding="utf-8") as f:
+        xsd_data = f.read()
+
+    def upload_unary():
+        response = stub.UploadData(pb2.UploadRequest(xml_payload=payload, xsd_data=xsd_data))
+        if not response.ok:
+            raise RuntimeError(response.message)
+
+    def upload_stream():
+        response = stub.UploadDataStream(client.iter_upload_chunks(xml_path, xsd_data))
+        if not response.ok:
+            raise RuntimeError(response.message)
+
+    stages["upload_data"] = timed(upload_unary)
+    stages["upload_data_stream"] = timed(upload_stream)
+    if state.snapshot.count != rows:
+        raise RuntimeError(f"servidor tem {state.snapshot.count} registos, esperados {rows}")
+    return stages
+
+
+def workload(snap) -> list:
+    """Mistura de chamadas (nome, peso, função(stub, proxy, rnd)) adaptada às colunas do dataset."""
+    n = snap.count
+    item = snap.item_tag
+    # campo numérico com mais valores distintos para filtros/intervalos; agrupamento pelo campo de
+    # texto com menos valores distintos
+    columns = snap.column_stats
+    numeric = [name for name, col in columns.items() if col["type"] in ("integer", "decimal", "double")]
+    value_field = max(numeric, key=lambda name: columns[name]["distinct"])
+    group_field = min(
+        (name for name, col in columns.items() if name not in numeric and col["distinct"] > 1),
+        key=lambda name: columns[name]["distinct"],
+    )
+    values = snap.columns.columns[value_field]
+    low, high = float(np.nanmin(values)), float(np.nanmax(values))
+
+    def threshold(rnd):
+        # valor diferente em cada pedido para não vir da cache de resultados
+        return round(low + (high - low) * rnd.uniform(0.5, 0.99), 3)
+
+    def random_id(rnd):
+        return rnd.randint(1, n)
+
+    return [
+        (
+            "grpc.GetRecordByID",
+            30,
+            lambda stub, proxy, rnd: stub.GetRecordByID(pb2.RecordRequest(property_id=random_id(rnd))),
+        ),
+        (
+            "grpc.GetRecordsByIDs",
+            10,
+            lambda stub, proxy, rnd: stub.GetRecordsByIDs(
+                pb2.RecordsRequest(ids=[str(random_id(rnd)) for _ in range(LOOKUP_BATCH)])
+            ),
+        ),
+        ("grpc.CountRecords", 10, lambda stub, proxy, rnd: stub.CountRecords(pb2.DatasetRequest())),
+        (
+            "grpc.ExecuteXPath(cache)",
+            10,
+            lambda stub, proxy, rnd: stub.ExecuteXPath(pb2.QueryRequest(query=f"count(//{item})")),
+        ),
+        (
+            "grpc.ExecuteXPath",
+            2,
+            lambda stub, proxy, rnd: stub.ExecuteXPath(
+                pb2.QueryRequest(query=f"count(//{item}[{value_field} > {threshold(rnd)}])")
+            ),
+        ),
+        (
+            "grpc.RangeQuery",
+            5,
+            lambda stub, proxy, rnd: stub.RangeQuery(
+                pb2.RangeRequest(field=value_field, min=threshold(rnd), limit=RESULT_LIMIT)
+            ),
+        ),
+        (
+            "grpc.FilterRecords",
+            5,
+            lambda stub, proxy, rnd: stub.FilterRecords(
+                pb2.FilterRequest(
+                    predicates=[pb2.Predicate(field=value_field, op="gt", values=[str(threshold(rnd))])],
+                    limit=RESULT_LIMIT,
+                )
+            ),
+        ),
+        (
+            "grpc.Aggregate",
+            5,
+            lambda stub, proxy, rnd: stub.Aggregate(
+                pb2.AggregateRequest(
+                    group_by=[group_field],
+                    aggregations=[pb2.Aggregation(field=value_field, func="avg")],
+                    predicates=[pb2.Predicate(field=value_field, op="gt", values=[str(threshold(rnd))])],
+                )
+            ),
+        ),
+        ("xmlrpc.get_record_by_id", 15, lambda stub, proxy, rnd: proxy.get_record_by_id(str(random_id(rnd)))),
+        ("xmlrpc.count_records", 5, lambda stub, proxy, rnd: proxy.count_records()),
+        (
+            "xmlrpc.execute_xpath_page",
+            3,
+            lambda stub, proxy, rnd: proxy.execute_xpath_page(
+                f"//{item}[{value_field} > {threshold(rnd)}]/@*", "", RESULT_LIMIT
+            ),
+        ),
+    ]
+
+
+def failed(result) -> bool:
+    if isinstance(result, str):
+        return result.startswith(metrics.ERROR_PREFIXES)
+    return not isinstance(result, (dict, list, int, float)) and metrics.is_error(result)
+
+
+def load(state: SharedState, grpc_target: str, xmlrpc_url: str, clients: int, seconds: float) -> dict:
+    """Clientes concorrentes (cada um com o seu proxy XML-RPC) até ao fim do intervalo."""
+    operations = workload(state.snapshot)
+    names = [name for name, _, _ in operations]
+    weights = [weight for _, weight, _ in operations]
+    samples = {name: [] for name in names}
+    errors = {name: 0 for name in names}
+    lock = threading.Lock()
+    channel = grpc.insecure_channel(grpc_target)
+    stub = pb2_grpc.PropertyServiceStub(channel)
+    deadline = time.perf_counter() + seconds
+
+    def run_client(seed: int):
+        rnd = random.Random(seed)
+        proxy = xmlrpc.client.ServerProxy(xmlrpc_url, allow_none=True)
+        local = {name: [] for name in names}
+        local_errors = {name: 0 for name in names}
+        while time.perf_counter() < deadline:
+            index = rnd.choices(range(len(operations)), weights)[0]
+            name, _, call = operations[index]
+            start = time.perf_counter()
+            try:
+                bad = failed(call(stub, proxy, rnd))
+            except Exception:
+                bad = True
+            local[name].append(time.perf_counter() - start)
+            local_errors[name] += bad
+        with lock:
+            for name in names:
+                samples[name].extend(local[name])
+                errors[name] += local_errors[name]
+
+    threads = [threading.Thread(target=run_client, args=(seed,)) for seed in range(clients)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    channel.close()
+
+    report = {}
+    for name in names:
+        latencies = sorted(samples[name])
+        report[name] = {
+            "calls": len(latencies),
+            "errors": errors[name],
+            "rps": len(latencies) / elapsed,
+            "p50_ms": percentile(latencies, 0.50) * 1000,
+            "p95_ms": percentile(latencies, 0.95) * 1000,
+            "p99_ms": percentile(latencies, 0.99) * 1000,
+        }
+    total = sum(len(latencies) for latencies in samples.values())
+    report["total"] = {"calls": total, "rps": total / elapsed}
+    return report
+
+
+def environment() -> dict:
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = ""
+    return {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "commit": commit,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+    }
+
+
+def start_servers(workdir: str):
+    """Servidor gRPC (pool de threads) e XML-RPC no mesmo processo, sobre um SharedState novo."""
+    state = SharedState()
+    state.xml_path = os.path.join(workdir, "server.xml")
+    state.xsd_path = os.path.join(workdir, "server.xsd")
+    state.snapshot_path = ""
+    state.change_log = None
+    datasets = DatasetRegistry.single(state)
+    grpc_server = grpc.server(futures.ThreadPoolExecutor(max_workers=10))
+    pb2_grpc.add_PropertyServiceServicer_to_server(PropertyServicer(datasets), grpc_server)
+    grpc_target = f"127.0.0.1:{grpc_server.add_insecure_port('127.0.0.1:0')}"
+    grpc_server.start()
+    xmlrpc_server = make_xmlrpc_server(datasets, ("127.0.0.1", 0), log_requests=False)
+    threading.Thread(target=xmlrpc_server.serve_forever, daemon=True).start()
+    xmlrpc_url = f"http://127.0.0.1:{xmlrpc_server.server_address[1]}"
+
+    def stop():
+        xmlrpc_server.shutdown()
+        xmlrpc_server.server_close()
+        grpc_server.stop(None)
+
+    return state, grpc_target, xmlrpc_url, stop
+
+
+def run(shapes, sizes, seconds: float, clients: int) -> dict:
+    results = {"environment": environment(), "config": {"seconds": seconds, "clients": clients}, "datasets": {}}
+    with tempfile.TemporaryDirectory() as workdir:
+        for shape in shapes:
+            for rows in sizes:
+                key = f"{shape}-{rows}"
+                print(f"\n=== {key} ===")
+                # servidor novo por dataset: item_tag/id_attr e caches não passam de um para o outro
+                state, grpc_target, xmlrpc_url, stop = start_servers(workdir)
+                try:
+                    with grpc.insecure_channel(grpc_target) as channel:
+                        stages = pipeline(shape, rows, workdir, pb2_grpc.PropertyServiceStub(channel), state)
+                    for stage, seconds_taken in stages.items():
+                        print(f"{stage:>20} {seconds_taken:>9.3f}s")
+                    report = load(state, grpc_target, xmlrpc_url, clients, seconds)
+                finally:
+                    stop()
+                print_load(report)
+                results["datasets"][key] = {"shape": shape, "rows": rows, "pipeline": stages, "load": report}
+    return results
+
+
+def print_load(report: dict):
+    print(f"{'rpc':>28} {'chamadas':>9} {'erros':>6} {'rps':>8} {'p50_ms':>8} {'p95_ms':>8} {'p99_ms':>8}")
+    for name, row in report.items():
+        if name == "total":
+            continue
+        print(
+            f"{name:>28} {row['calls']:>9} {row['errors']:>6} {row['rps']:>8.1f} "
+            f"{row['p50_ms']:>8.2f} {row['p95_ms']:>8.2f} {row['p99_ms']:>8.2f}"
+        )
+    print(f"{'total':>28} {report['total']['calls']:>9} {'':>6} {report['total']['rps']:>8.1f}")
+
+
+def compare(previous: dict, current: dict, threshold: float = REGRESSION_THRESHOLD) -> int:
+    """Imprime a variação de cada tempo/latência face a ``previous``; devolve o número de regressões."""
+    regressions = 0
+    print(f"\n=== Comparação com {previous['environment'].get('commit') or 'execução anterior'} ===")
+    print(f"{'dataset':>14} {'métrica':>40} {'antes':>10} {'agora':>10} {'var':>8}")
+    for key, data in current["datasets"].items():
+        old = previous["datasets"].get(key)
+        if old is None:
+            continue
+        rows = [
+            (f"pipeline.{stage}", old["pipeline"].get(stage), value, False)
+            for stage, value in data["pipeline"].items()
+        ]
+        for name, row in data["load"].items():
+            old_row = old["load"].get(name)
+            if name == "total" or old_row is None:
+                continue
+            rows.append((f"{name}.p95_ms", old_row["p95_ms"], row["p95_ms"], False))
+            rows.append((f"{name}.rps", old_row["rps"], row["rps"], True))
+        for metric, before, after, higher_is_better in rows:
+            if not before:
+                continue
+            change = (after - before) / before
+            worse = -change if higher_is_better else change
+            flag = " !" if worse > threshold else ""
+            regressions += bool(flag)
+            print(f"{key:>14} {metric:>40} {before:>10.3f} {after:>10.3f} {change:>+7.0%}{flag}")
+    print(f"{regressions} regressões acima de {threshold:.0%}")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--shapes", nargs="+", default=list(WRITERS), choices=list(WRITERS))
+    parser.add_argument("--rows", nargs="+", type=int, default=DEFAULT_ROWS)
+    parser.add_argument("--seconds", type=float, default=DEFAULT_SECONDS, help="duração da carga por dataset")
+    parser.add_argument("--clients", type=int, default=DEFAULT_CLIENTS)
+    parser.add_argument("--output", default=DEFAULT_OUTPUT)
+    parser.add_argument("--compare", help="JSON de uma execução anterior")
+    args = parser.parse_args(argv)
+
+    results = run(args.shapes, args.rows, args.seconds, args.clients)
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2)
+    print(f"\nResultados gravados em {args.output}")
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            return 1 if compare(json.load(f), results) else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,56 @@
+"""Débito de xml_converter.generate_xml: iterrows, vetorizado e vetorizado em paralelo.
+
+Uso: python -m benchmarks.xml_throughput [linhas] [workers]
+"""
+import filecmp
+import os
+import sys
+import tempfile
+import time
+
+import xml_converter
+from benchmarks.datasets import WRITERS
+
+DEFAULT_ROWS = 50_000
+CHUNK_SIZE = 10_000
+
+
+def run(shape: str, rows: int, workers: int, workdir: str):
+    writer, id_column = WRITERS[shape]
+    csv_path = writer(os.path.join(workdir, f"{shape}.csv"), rows)
+    modes = {
+        "rows": {"engine": "rows", "workers": 1},
+        "vectorized": {"engine": "vectorized", "workers": 1},
+        "parallel": {"engine": "vectorized", "workers": workers},
+    }
+    timings = {}
+    outputs = {}
+    for mode, kwargs in modes.items():
+        outputs[mode] = os.path.join(workdir, f"{shape}_{mode}.xml")
+        start = time.perf_counter()
+        xml_converter.generate_xml(csv_path, id_column, xml_path=outputs[mode], chunk_size=CHUNK_SIZE, **kwargs)
+        timings[mode] = time.perf_counter() - start
+    identical = all(filecmp.cmp(outputs["rows"], outputs[mode], shallow=False) for mode in modes)
+    return timings, identical
+
+
+def main(rows: int, workers: int):
+    print(
+        f"{'dataset':>8} {'linhas':>8} {'rows/s iterrows':>16} {'rows/s vetorizado':>18} "
+        f"{f'rows/s {workers} workers':>18} {'idêntico':>9}"
+    )
+    with tempfile.TemporaryDirectory() as workdir:
+        for shape in WRITERS:
+            timings, identical = run(shape, rows, workers, workdir)
+            rates = {mode: rows / seconds for mode, seconds in timings.items()}
+            print(
+                f"{shape:>8} {rows:>8} {rates['rows']:>16.0f} {rates['vectorized']:>18.0f} "
+                f"{rates['parallel']:>18.0f} {str(identical):>9}"
+            )
+
+
+if __name__ == "__main__":
+    main(
+        int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_ROWS,
+        int(sys.argv[2]) if len(sys.argv) > 2 else os.cpu_count() or 1,
+    )
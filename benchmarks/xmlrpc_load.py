@@ -0,0 +1,90 @@
+"""Débito do front-end XML-RPC: servidor sequencial vs pool de threads com keep-alive, com e sem multicall.
+
+Cada cliente faz sobretudo get_record_by_id e, a cada SLOW_EVERY pedidos, um execute_xpath lento
+e sem cache; no servidor sequencial esse pedido bloqueia todos os outros clientes.
+
+Uso: python -m benchmarks.xmlrpc_load [clientes] [segundos] [registos]
+"""
+import random
+import statistics
+import sys
+import threading
+import time
+import xmlrpc.client
+
+from benchmarks.lookup import build_tree
+from dataset_registry import DatasetRegistry
+from server import SharedState, XMLRPC_WORKERS, make_xmlrpc_server
+
+DEFAULT_CLIENTS = 8
+DEFAULT_SECONDS = 5.0
+DEFAULT_RECORDS = 50_000
+SLOW_EVERY = 20
+MULTICALL_BATCH = 20
+
+
+def client_loop(url: str, n: int, deadline: float, multicall: bool, latencies: list, calls: list):
+    proxy = xmlrpc.client.ServerProxy(url)
+    done = 0
+    while time.perf_counter() < deadline:
+        if done % SLOW_EVERY == 0:
+            # expressão diferente em cada pedido para não vir da cache de resultados
+            proxy.execute_xpath(f"count(//property[price > {100000 + random.randint(1, n)}])")
+            done += 1
+            continue
+        start = time.perf_counter()
+        if multicall:
+            batch = xmlrpc.client.MultiCall(proxy)
+            for _ in range(MULTICALL_BATCH):
+                batch.get_record_by_id(str(random.randint(1, n)))
+            list(batch())
+            done += MULTICALL_BATCH
+        else:
+            proxy.get_record_by_id(str(random.randint(1, n)))
+            done += 1
+        latencies.append((time.perf_counter() - start) * 1000)
+    calls.append(done)
+
+
+def run(state: SharedState, workers: int, clients: int, seconds: float, multicall: bool, n: int):
+    server = make_xmlrpc_server(DatasetRegistry.single(state), ("127.0.0.1", 0), workers, log_requests=False)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_address[1]}"
+    latencies, calls = [], []
+    deadline = time.perf_counter() + seconds
+    threads = [
+        threading.Thread(target=client_loop, args=(url, n, deadline, multicall, latencies, calls))
+        for _ in range(clients)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    server.shutdown()
+    server.server_close()
+    latencies.sort()
+    p95 = latencies[int(len(latencies) * 0.95)] if latencies else 0.0
+    return sum(calls) / seconds, statistics.median(latencies) if latencies else 0.0, p95
+
+
+def main(clients: int, seconds: float, n: int):
+    state = SharedState()
+    # dataset sintético: nada é gravado ao lado do XML real (snapshot binário, registo de alterações)
+    state.snapshot_path = ""
+    state.change_log = None
+    state.set_tree(build_tree(n))
+    workers = XMLRPC_WORKERS or clients
+    print(f"{clients} clientes, {seconds:.0f}s por modo, {n} registos (p50/p95 = latência de get_record_by_id ou do lote)")
+    print(f"{'servidor':>22} {'multicall':>10} {'chamadas/s':>11} {'p50_ms':>8} {'p95_ms':>8}")
+    for label, pool in (("sequencial", 0), (f"pool {workers} keep-alive", workers)):
+        for multicall in (False, True):
+            rate, p50, p95 = run(state, pool, clients, seconds, multicall, n)
+            print(f"{label:>22} {str(multicall):>10} {rate:>11.0f} {p50:>8.2f} {p95:>8.2f}")
+
+
+if __name__ == "__main__":
+    main(
+        int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_CLIENTS,
+        float(sys.argv[2]) if len(sys.argv) > 2 else DEFAULT_SECONDS,
+        int(sys.argv[3]) if len(sys.argv) > 3 else DEFAULT_RECORDS,
+    )
@@ -0,0 +1,69 @@
+"""Registo das alterações feitas com UpsertRecords/DeleteRecords, acrescentado ao lado do XML.
+
+Cada lote aplicado é uma linha JSON em ``<xml>.changes``, gravada (e sincronizada com fsync) antes de
+o snapshot novo ser publicado:
+
+    {"upsert": ["<property id=\\"7\\">...</property>", ...]}
+    {"delete": ["7", "12"]}
+
+No arranque as linhas são reaplicadas sobre o XML. A compactação (ver SharedState) grava o documento
+atual num ficheiro temporário, substitui o XML de forma atómica e só depois esvazia o registo; um
+upload completo também o esvazia, porque o XML novo já não tem nada a ver com estas alterações.
+"""
+import json
+import os
+
+
+class ChangeLog:
+    def __init__(self, path: str, sync: bool = True):
+        self.path = path
+        self.sync = sync
+        self.entries = 0
+        self.size = 0
+        self._file = None
+
+    def read(self) -> list:
+        """Lotes gravados, pela ordem. Uma última linha incompleta (escrita interrompida) é cortada do ficheiro."""
+        if not os.path.exists(self.path):
+            return []
+        entries = []
+        valid = 0
+        with open(self.path, "rb") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    break
+                if not line.endswith(b"\n"):
+                    break
+                entries.append(entry)
+                valid += len(line)
+        if valid < os.path.getsize(self.path):
+            print(f"Registo de alterações {self.path}: linha incompleta no fim descartada")
+            os.truncate(self.path, valid)
+        self.entries = len(entries)
+        self.size = valid
+        return entries
+
+    def append(self, entry: dict) -> None:
+        line = (json.dumps(entry, ensure_ascii=False) + "\n").encode("utf-8")
+        if self._file is None:
+            self._file = open(self.path, "ab")
+        self._file.write(line)
+        self._file.flush()
+        if self.sync:
+            os.fsync(self._file.fileno())
+        self.entries += 1
+        self.size += len(line)
+
+    def clear(self) -> None:
+        """Esvazia o registo (as alterações já estão no XML ou deixaram de se aplicar)."""
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        if os.path.exists(self.path):
+            with open(self.path, "wb") as f:
+                if self.sync:
+                    os.fsync(f.fileno())
+        self.entries = 0
+        self.size = 0
@@ -1,16 +1,33 @@
 import glob
 import os
-import time
+import queue
+import threading
 
 import grpc
-import xmlschema
 import pandas as pd
+from lxml import etree
 
+import payload_compression
 import property_service_pb2 as pb2
 import property_service_pb2_grpc as pb2_grpc
 import xml_converter
 import schema_creator
 
+UPLOAD_CHUNK_SIZE = int(os.getenv("UPLOAD_CHUNK_SIZE", str(1024 * 1024)))
+# blocos de upload em espera entre a geração/validação e o envio
+PIPELINE_QUEUE_SIZE = int(os.getenv("PIPELINE_QUEUE_SIZE", "16"))
+# linhas do CSV por bloco do pipeline (cada bloco é serializado e validado inteiro em memória)
+PIPELINE_CHUNK_ROWS = int(os.getenv("PIPELINE_CHUNK_ROWS", "10000"))
+_PIPELINE_DONE = object()
+# compressão do XML enviado (none, gzip, zlib, lzma), descomprimido em streaming pelo servidor
+UPLOAD_COMPRESSION = os.getenv("UPLOAD_COMPRESSION", "none")
+# compressão de todas as mensagens do canal gRPC (none, gzip, deflate)
+GRPC_COMPRESSION = os.getenv("GRPC_COMPRESSION", "none")
+# espera máxima pelo servidor gRPC no arranque (em vez de uma pausa fixa)
+SERVER_WAIT_SECONDS = float(os.getenv("SERVER_WAIT_SECONDS", "30"))
+# IDs por mensagem em fetch_records
+LOOKUP_BATCH_SIZE = int(os.getenv("LOOKUP_BATCH_SIZE", "500"))
+
 
 def resolve_csv() -> str:
     if os.getenv("DATA_CSV"):
@@ -90,46 +107,121 @@ def auto_infer_config(csv_path: str):
     return cfg
 
 
-def generate_and_validate(cfg):
-    if os.getenv("XML_PATH"):
-        xml_out = os.getenv("XML_PATH")
-        xsd_out = os.getenv("XSD_PATH", "house_purchase.xsd")
-    else:
-        if "commodity_trade_statistics" in cfg["csv_path"]:
-            xml_out = "trade_statistics.xml"
-            xsd_out = "trade_statistics.xsd"
-        else:
-            # Derive from CSV name
-            base_name = os.path.splitext(os.path.basename(cfg["csv_path"]))[0]
-            xml_out = f"{base_name}.xml"
-            xsd_out = f"{base_name}.xsd"
-            if not base_name:
-                xml_out = "house_purchase.xml"
-                xsd_out = "house_purchase.xsd"
-
-    xml_converter.generate_xml(
-        cfg["csv_path"],
-        cfg["id_column"],
-        xml_path=xml_out,
-        max_rows=cfg.get("max_rows"),
-    )
-    schema_creator.generate_xsd(
-        cfg["csv_path"],
-        cfg["id_column"],
-        xsd_path=xsd_out,
-    )
-
-    schema = xmlschema.XMLSchema(xsd_out)
-    xml_resource = xmlschema.XMLResource(xml_out, lazy=True)
-    if not schema.is_valid(xml_resource):
-        # Para debug, ver logs anteriores ou ativar utils.debug
-        raise ValueError("XML gerado localmente não é válido.")
-
-    with open(xml_out, "r", encoding="utf-8") as f:
-        xml_data = f.read()
+def compressed_chunks(pieces, xsd_data: str, compression: int):
+    """UploadChunks com os blocos de ``pieces`` comprimidos em streaming; o XSD e a compressão
+    seguem apenas no primeiro."""
+    compress = payload_compression.compressor(compression)
+    header = {"xsd_data": xsd_data, "compression": compression}
+    for piece in pieces:
+        if compress is not None:
+            piece = compress.compress(piece)
+            if not piece:
+                continue
+        yield pb2.UploadChunk(xml_chunk=piece, **header)
+        header = {}
+    if compress is not None:
+        yield pb2.UploadChunk(xml_chunk=compress.flush(), **header)
+
+
+def iter_upload_chunks(
+    xml_path: str, xsd_data: str, chunk_size: int = UPLOAD_CHUNK_SIZE, compression: int = pb2.IDENTITY
+):
+    # lê o XML em blocos limitados
+    with open(xml_path, "rb") as f:
+        yield from compressed_chunks(iter(lambda: f.read(chunk_size), b""), xsd_data, compression)
+
+
+def generate_validate_upload(cfg, stub, xml_out: str, xsd_out: str, compression: int = pb2.IDENTITY):
+    """Gera, valida e envia o XML num só pipeline.
+
+    Uma thread produz cada bloco de registos, valida-o com o XSD compilado e escreve-o em
+    disco, enquanto o UploadDataStream envia os blocos já validados; nenhuma etapa precisa
+    do documento inteiro em memória.
+    """
+    schema_creator.generate_xsd(cfg["csv_path"], cfg["id_column"], xsd_path=xsd_out)
     with open(xsd_out, "r", encoding="utf-8") as f:
         xsd_data = f.read()
-    return xml_data, xsd_data
+    schema = etree.XMLSchema(etree.fromstring(xsd_data.encode("utf-8")))
+
+    pieces = queue.Queue(maxsize=PIPELINE_QUEUE_SIZE)
+    cancelled = threading.Event()
+    failure = []
+
+    def put(item):
+        while not cancelled.is_set():
+            try:
+                pieces.put(item, timeout=0.5)
+                return
+            except queue.Full:
+                continue
+        raise RuntimeError("upload cancelado")
+
+    def emit(f, data: bytes):
+        f.write(data)
+        for start in range(0, len(data), UPLOAD_CHUNK_SIZE):
+            put(data[start : start + UPLOAD_CHUNK_SIZE])
+
+    def produce():
+        try:
+            root_tag, chunks = xml_converter.iter_record_chunks(
+                cfg["csv_path"], cfg["id_column"], max_rows=cfg.get("max_rows"), chunk_size=PIPELINE_CHUNK_ROWS
+            )
+            open_tag, close_tag = f"<{root_tag}>".encode("utf-8"), f"</{root_tag}>".encode("utf-8")
+            with open(xml_out, "wb") as f:
+                emit(f, xml_converter.document_start(root_tag).encode("utf-8"))
+                for chunk in chunks:
+                    data = chunk.encode("utf-8")
+                    # o XSD não tem restrições entre registos, por isso validar cada bloco
+                    # dentro da raiz equivale a validar o documento completo
+                    try:
+                        schema.assertValid(etree.fromstring(open_tag + data + close_tag))
+                    except etree.DocumentInvalid as exc:
+                        raise ValueError(f"XML gerado localmente não é válido: {exc}") from exc
+                    emit(f, data)
+                emit(f, xml_converter.document_end(root_tag).encode("utf-8"))
+        except Exception as exc:
+            failure.append(exc)
+        finally:
+            try:
+                put(_PIPELINE_DONE)
+            except RuntimeError:
+                pass
+
+    def validated_pieces():
+        while True:
+            piece = pieces.get()
+            if piece is _PIPELINE_DONE:
+                if failure:
+                    # interrompe o stream: o servidor descarta o upload parcial
+                    raise failure[0]
+                return
+            yield piece
+
+    producer = threading.Thread(target=produce, daemon=True)
+    producer.start()
+    try:
+        return stub.UploadDataStream(compressed_chunks(validated_pieces(), xsd_data, compression))
+    except grpc.RpcError:
+        if failure:
+            raise failure[0]
+        raise
+    finally:
+        cancelled.set()
+        producer.join()
+
+
+def fetch_records(stub, ids, batch_size: int = LOOKUP_BATCH_SIZE):
+    """Obtém muitos registos por ID em lotes sobre GetRecordsByIDsStream.
+
+    Devolve pares (id, xml) pela ordem pedida, com xml = None para IDs inexistentes.
+    """
+    ids = [str(record_id) for record_id in ids]
+    requests = (pb2.RecordsRequest(ids=ids[start : start + batch_size]) for start in range(0, len(ids), batch_size))
+    for response in stub.GetRecordsByIDsStream(requests):
+        if response.error:
+            raise RuntimeError(response.error)
+        for rec in response.records:
+            yield rec.id, rec.record_xml if rec.found else None
 
 
 def upload_and_test():
@@ -146,27 +238,23 @@ def upload_and_test():
     print(f"CSV selecionado: {csv_path}")
     print(f"Config: id={cfg['id_column']}, root={cfg['root_tag']}, item={cfg['item_tag']}, id_attr={cfg['id_attr']}")
     print(f"Target gRPC: {target}")
-    print("Aguardar 5 segundos para o servidor gRPC inicializar...")
-    time.sleep(5)
+    print(f"A aguardar até {SERVER_WAIT_SECONDS:.0f}s que o servidor gRPC fique pronto...")
 
-    xml_data, xsd_data = generate_and_validate(cfg)
-    print(f"XML gerado localmente ({xml_out}) com {len(xml_data)} bytes.")
-
-    options = [
-        ("grpc.max_receive_message_length", 200 * 1024 * 1024),
-        ("grpc.max_send_message_length", 200 * 1024 * 1024),
-    ]
-    with grpc.insecure_channel(target, options=options) as channel:
+    # upload e resultados de XPath circulam em stream, pelo que os limites por omissão bastam
+    compression = payload_compression.channel_compression(GRPC_COMPRESSION)
+    with grpc.insecure_channel(target, compression=compression) as channel:
         try:
-            grpc.channel_ready_future(channel).result(timeout=10)
+            grpc.channel_ready_future(channel).result(timeout=SERVER_WAIT_SECONDS)
         except grpc.FutureTimeoutError:
             print("Canal gRPC não ficou pronto a tempo.")
             return
 
         stub = pb2_grpc.PropertyServiceStub(channel)
 
-        print("\n=== Upload para o servidor ===")
-        resp_upload = stub.UploadData(pb2.UploadRequest(xml_data=xml_data, xsd_data=xsd_data))
+        print("\n=== Geração, validação e upload para o servidor ===")
+        upload_compression = payload_compression.payload_compression(UPLOAD_COMPRESSION)
+        resp_upload = generate_validate_upload(cfg, stub, xml_out, xsd_out, upload_compression)
+        print(f"XML gerado e validado localmente ({xml_out}) com {os.path.getsize(xml_out)} bytes.")
         print(f"Upload ok? {resp_upload.ok} - {resp_upload.message}")
         if not resp_upload.ok:
             return
@@ -174,7 +262,7 @@ def upload_and_test():
         print("\n=== Testes gRPC ===")
 
         print("\n1. Contando registos:")
-        response_count = stub.CountRecords(pb2.Empty())
+        response_count = stub.CountRecords(pb2.DatasetRequest())
         print(f"   Total: {response_count.count} registos")
 
         print(f"\n2. A obter registo pelo ID={cfg['test_id']}:")
@@ -182,9 +270,16 @@ def upload_and_test():
         snippet = record.record_xml[:500]
         print(f"   XML do registo:\n{snippet}{'...' if len(record.record_xml) > 500 else ''}")
 
-        print(f"\n3. XPath - query ({cfg['xpath_query']}):")
-        results = stub.ExecuteXPath(pb2.QueryRequest(query=cfg["xpath_query"]))
-        print(f"   Resultados: {results.results[:3]}")
+        lookup_ids = [str(cfg["test_id"] + offset) for offset in range(5)] + ["-1"]
+        print(f"\n3. A obter {len(lookup_ids)} registos numa só chamada (IDs {', '.join(lookup_ids)}):")
+        found = [rec.id for rec in stub.GetRecordsByIDs(pb2.RecordsRequest(ids=lookup_ids)).records if rec.found]
+        print(f"   Encontrados: {found}")
+
+        print(f"\n4. XPath - query ({cfg['xpath_query']}):")
+        stream = stub.ExecuteXPathStream(pb2.QueryRequest(query=cfg["xpath_query"], batch_size=100))
+        first_batch = next(stream, None)
+        stream.cancel()
+        print(f"   Resultados: {first_batch.results[:3] if first_batch else []}")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,251 @@
+"""Cópia em colunas (NumPy/pandas) do dataset carregado, para filtros e projeções vetorizados."""
+import numpy as np
+import pandas as pd
+
+import schema_creator
+
+# operadores aceites em FilterRecords/filter_records; "range" recebe [min, max] inclusivos
+COMPARISONS = {
+    "eq": np.equal,
+    "ne": np.not_equal,
+    "lt": np.less,
+    "le": np.less_equal,
+    "gt": np.greater,
+    "ge": np.greater_equal,
+}
+OPERATORS = set(COMPARISONS) | {"in", "range"}
+# funções de Aggregate/aggregate -> nome da agregação no pandas
+AGGREGATES = {"count": "count", "sum": "sum", "avg": "mean", "min": "min", "max": "max"}
+
+
+def format_key(value) -> str:
+    """Texto de um valor de grupo: números sem ".0" supérfluo e "" para valores em falta."""
+    if isinstance(value, float):
+        return "" if np.isnan(value) else np.format_float_positional(value, trim="-")
+    return "" if value is None else str(value)
+
+
+def collect_texts(records) -> dict:
+    """Texto de cada campo por registo: {tag: [texto ou None]} alinhado com ``records``."""
+    if records:
+        # caminho rápido: todos os registos com os mesmos campos pela mesma ordem (caso do xml_converter)
+        tags = [child.tag for child in records[0]]
+        width = len(tags)
+        flat_tags = [child.tag for prop in records for child in prop]
+        if width and len(set(tags)) == width and flat_tags == tags * len(records):
+            flat_texts = [child.text for prop in records for child in prop]
+            return {tag: flat_texts[pos::width] for pos, tag in enumerate(tags)}
+    # caminho geral: campos em falta, repetidos ou fora de ordem (vale a primeira ocorrência)
+    texts = {}
+    for pos, prop in enumerate(records):
+        for child in prop:
+            column = texts.setdefault(child.tag, [])
+            if len(column) < pos:
+                column.extend([None] * (pos - len(column)))
+            if len(column) == pos:
+                column.append(child.text)
+    for column in texts.values():
+        column.extend([None] * (len(records) - len(column)))
+    return texts
+
+
+def record_texts(record) -> dict:
+    """Texto de cada campo de um só registo (vale a primeira ocorrência, como em ``collect_texts``)."""
+    texts = {}
+    for child in record:
+        texts.setdefault(child.tag, child.text)
+    return texts
+
+
+def to_number(text) -> float:
+    # mesmas regras do pd.to_numeric(errors="coerce"): texto vazio ou inválido fica NaN
+    try:
+        return float(text)
+    except (TypeError, ValueError):
+        return np.nan
+
+
+def categorical_stats(cat) -> dict:
+    counts = np.bincount(cat.codes[cat.codes >= 0], minlength=len(cat.categories))
+    # o xml_converter escreve valores em falta como "nan"
+    present = ~cat.categories.isin(["", "nan"])
+    return {"non_empty": int(counts[present].sum()), "distinct": int((counts[present] > 0).sum())}
+
+
+def column_stats(column) -> dict:
+    """Estatísticas de uma coluna já construída; nas numéricas contam os valores, não o texto original."""
+    if isinstance(column, np.ndarray):
+        values = column[~np.isnan(column)]
+        return {"non_empty": len(values), "distinct": len(np.unique(values))}
+    return categorical_stats(column)
+
+
+def _grown(array, size: int, fill):
+    # cópia do array com ``size`` posições; as acrescentadas ficam com ``fill``
+    if len(array) >= size:
+        return array.copy()
+    return np.concatenate([array, np.full(size - len(array), fill, dtype=array.dtype)])
+
+
+class ColumnarStore:
+    """Uma coluna por elemento filho dos registos, alinhada com a lista de registos.
+
+    Campos numéricos (tipo inferido no XSD) ficam em float64 com NaN para valores em falta;
+    os restantes em ``pd.Categorical``. As projeções leem o texto original dos elementos.
+    Sem ``stats`` as estatísticas são calculadas das colunas no primeiro acesso.
+    """
+
+    def __init__(self, records, ids, columns: dict, stats: dict | None = None):
+        self.records = records
+        self.ids = ids
+        self.columns = columns
+        self._stats = stats
+
+    @property
+    def stats(self) -> dict:
+        if self._stats is None:
+            self._stats = {tag: column_stats(column) for tag, column in self.columns.items()}
+        return self._stats
+
+    @classmethod
+    def from_records(cls, records, ids, field_types: dict):
+        return cls.from_texts(records, ids, collect_texts(records), field_types)
+
+    @classmethod
+    def from_texts(cls, records, ids, texts: dict, field_types: dict):
+        """Constrói as colunas a partir de {tag: [texto ou None por registo]} (as listas são consumidas)."""
+        columns = {}
+        stats = {}
+        for tag in list(texts):
+            # categorias pela ordem de aparecimento: evita ordenar os valores distintos
+            codes, uniques = pd.factorize(np.asarray(texts.pop(tag), dtype=object))
+            cat = pd.Categorical.from_codes(codes, uniques)
+            stats[tag] = categorical_stats(cat)
+            if field_types.get(tag) in schema_creator.NUMERIC_FIELD_TYPES:
+                # converte só os valores distintos e expande pelos códigos
+                numbers = pd.to_numeric(pd.Series(cat.categories, dtype=object), errors="coerce").to_numpy(dtype=float)
+                columns[tag] = np.where(codes >= 0, numbers[codes], np.nan)
+            else:
+                columns[tag] = cat
+        return cls(records, ids, columns, stats)
+
+    def with_rows(self, records, ids, rows: dict, keep=None, field_types=None):
+        """Colunas para ``records``/``ids`` depois de uma alteração, sem voltar a ler os restantes registos.
+
+        ``rows`` é {posição: {tag: texto}} com as linhas substituídas ou acrescentadas (posições
+        anteriores às remoções; as que passam do fim são linhas novas) e ``keep`` a máscara das
+        linhas que ficam (None = todas). As colunas são copiadas: as deste objeto não mudam.
+        """
+        field_types = field_types or {}
+        size = len(keep) if keep is not None else len(records)
+        tags = list(self.columns)
+        for row in rows.values():
+            tags += [tag for tag in row if tag not in self.columns and tag not in tags]
+        positions = list(rows)
+        columns = {}
+        for tag in tags:
+            column = self.columns.get(tag)
+            texts = [row.get(tag) for row in rows.values()]
+            if isinstance(column, np.ndarray) or (
+                column is None and field_types.get(tag) in schema_creator.NUMERIC_FIELD_TYPES
+            ):
+                values = _grown(column if column is not None else np.zeros(0), size, np.nan)
+                values[positions] = [to_number(text) for text in texts]
+            else:
+                categories = column.categories if column is not None else pd.Index([], dtype=object)
+                present = [(pos, text) for pos, text in zip(positions, texts) if text is not None]
+                # só os valores novos entram nas categorias, pela ordem de aparecimento
+                missing = pd.unique(np.asarray([text for _, text in present if text not in categories], dtype=object))
+                if len(missing):
+                    categories = categories.append(pd.Index(missing, dtype=object))
+                codes = column.codes if column is not None else np.zeros(0, dtype=np.int8)
+                if len(categories) > np.iinfo(codes.dtype).max:
+                    codes = codes.astype(np.int64)
+                codes = _grown(codes, size, -1)
+                codes[positions] = -1
+                if present:
+                    codes[[pos for pos, _ in present]] = categories.get_indexer([text for _, text in present])
+                values = pd.Categorical.from_codes(codes, dtype=pd.CategoricalDtype(categories))
+            columns[tag] = values if keep is None else values[keep]
+        return ColumnarStore(records, ids, columns)
+
+    def is_numeric(self, field: str) -> bool:
+        return isinstance(self.columns.get(field), np.ndarray)
+
+    def mask(self, predicates) -> np.ndarray:
+        """Máscara booleana dos registos que satisfazem todas as condições (field, op, values)."""
+        mask = np.ones(len(self.records), dtype=bool)
+        for field, op, values in predicates:
+            if field not in self.columns:
+                raise KeyError(f"campo '{field}' desconhecido")
+            if op not in OPERATORS:
+                raise ValueError(f"operador '{op}' inválido (use {', '.join(sorted(OPERATORS))})")
+            column = self.columns[field]
+            numeric = self.is_numeric(field)
+            if numeric:
+                values = [float(v) for v in values]
+            if op == "in":
+                mask &= np.isin(column, values) if numeric else np.asarray(column.isin(values))
+                continue
+            if not numeric and op not in ("eq", "ne"):
+                raise ValueError(f"operador '{op}' só se aplica a campos numéricos")
+            if op == "range":
+                if len(values) != 2:
+                    raise ValueError("'range' precisa de [min, max]")
+                mask &= (column >= values[0]) & (column <= values[1])
+                continue
+            if len(values) != 1:
+                raise ValueError(f"'{op}' precisa de exatamente um valor")
+            mask &= np.asarray(COMPARISONS[op](column, values[0]))
+        return mask
+
+    def filter(self, predicates, fields=(), limit: int = 0, offset: int = 0):
+        """Devolve (total, linhas) com linhas = [(id, {campo: texto})] da página pedida."""
+        positions = np.flatnonzero(self.mask(predicates))
+        total = len(positions)
+        end = offset + limit if limit > 0 else None
+        fields = list(fields) or list(self.columns)
+        rows = []
+        for pos in positions[offset:end]:
+            record = self.records[pos]
+            rows.append((self.ids[pos], {field: record.findtext(field) or "" for field in fields}))
+        return total, rows
+
+    def aggregate(self, group_by=(), aggregations=(), predicates=()):
+        """Agregados por grupo: [(grupos {campo: texto}, n.º de registos, {"func(campo)": valor})]."""
+        mask = self.mask(predicates)
+        frame = {}
+        for field in group_by:
+            if field not in self.columns:
+                raise KeyError(f"campo '{field}' desconhecido")
+            column = self.columns[field]
+            if not self.is_numeric(field):
+                # as categorias seguem a ordem de aparecimento; ordena-as para os grupos saírem por ordem
+                column = column.set_categories(sorted(column.categories))
+            frame[field] = column[mask]
+        specs = {}
+        for field, func in aggregations:
+            if func not in AGGREGATES:
+                raise ValueError(f"função '{func}' inválida (use {', '.join(AGGREGATES)})")
+            if not field:
+                if func != "count":
+                    raise ValueError(f"'{func}' precisa de um campo")
+                continue
+            if field not in self.columns:
+                raise KeyError(f"campo '{field}' desconhecido")
+            if func != "count" and not self.is_numeric(field):
+                raise ValueError(f"'{func}' só se aplica a campos numéricos")
+            # "#" não pode aparecer num nome XML, logo não colide com os campos de group_by
+            frame[f"#{field}"] = self.columns[field][mask]
+            specs[f"{func}({field})"] = (f"#{field}", AGGREGATES[func])
+        data = pd.DataFrame(frame, index=pd.RangeIndex(int(mask.sum())))
+        keys = list(group_by) or np.zeros(len(data), dtype=np.int8)
+        grouped = data.groupby(keys, observed=True, dropna=False, sort=True)
+        sizes = grouped.size()
+        values = grouped.agg(**specs).to_dict("records") if specs else [{}] * len(sizes)
+        rows = []
+        for key, count, row in zip(sizes.index, sizes.to_numpy(), values):
+            key = key if isinstance(key, tuple) else (key,)
+            groups = {field: format_key(value) for field, value in zip(group_by, key)}
+            rows.append((groups, int(count), {name: float(value) for name, value in row.items()}))
+        return rows
@@ -0,0 +1,113 @@
+"""Vários datasets com nome no mesmo servidor, carregados no primeiro pedido e descarregados (LRU)
+quando a memória estimada passa do orçamento.
+
+Configuração (ver server.dataset_specs):
+
+    DATASETS="house=house_purchase.xml:house_purchase.xsd,trade=trade_statistics.xml"
+
+Sem XSD indicado usa-se o XML com extensão ``.xsd``. Um upload com um nome ainda desconhecido cria
+o dataset em ``DATASET_DIR/<nome>.xml``. Cada dataset é um estado independente (árvore, item_tag/
+id_attr, índices, caches, snapshot binário e registo de alterações); o registo só guarda a ordem de
+uso e decide quem sai da memória.
+"""
+import os
+import re
+import threading
+from collections import OrderedDict
+
+DATASET_NAME = re.compile(r"[A-Za-z0-9_.-]+")
+
+
+def parse_specs(value: str) -> dict:
+    """{nome: (xml, xsd)} a partir de "nome=xml[:xsd],..."."""
+    specs = {}
+    for item in filter(None, (part.strip() for part in value.split(","))):
+        name, sep, paths = item.partition("=")
+        name = name.strip()
+        if not sep or not DATASET_NAME.fullmatch(name):
+            raise ValueError(f"DATASETS: entrada '{item}' inválida (use nome=ficheiro.xml[:ficheiro.xsd])")
+        xml_path, _, xsd_path = paths.partition(":")
+        specs[name] = (xml_path.strip(), xsd_path.strip() or f"{os.path.splitext(xml_path.strip())[0]}.xsd")
+    return specs
+
+
+class DatasetRegistry:
+    """Estados por nome, pela ordem de uso (o mais antigo primeiro).
+
+    ``factory(xml_path, xsd_path)`` cria o estado de um dataset, que tem de oferecer ``snapshot``
+    (com ``loaded`` e ``memory_bytes()``), ``ensure_loaded()`` e ``unload()``.
+    """
+
+    def __init__(self, specs: dict, factory, default: str, memory_budget: int = 0, data_dir: str = "."):
+        self.factory = factory
+        self.default = default
+        self.memory_budget = memory_budget
+        self.data_dir = data_dir
+        self.paths = dict(specs)
+        self._states = OrderedDict()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def single(cls, state, name: str = "default"):
+        """Registo com um único estado já criado (benchmarks e testes com um só dataset)."""
+        registry = cls({name: (state.xml_path, state.xsd_path)}, None, name)
+        registry.add(name, state)
+        return registry
+
+    def add(self, name: str, state):
+        """Regista um estado já criado (ainda por usar, fica como o menos recente)."""
+        with self._lock:
+            self.paths[name] = (state.xml_path, state.xsd_path)
+            self._states[name] = state
+            self._states.move_to_end(name, last=False)
+
+    def get(self, name: str = "", load: bool = True, create: bool = False):
+        """Estado do dataset ``name`` (vazio = omissão), marcado como o mais recente; None se não existe.
+
+        Com ``load`` o dataset é lido do disco se ainda não estiver em memória e, se isso fizer passar
+        o orçamento, os menos usados são descarregados. ``create`` aceita nomes novos (uploads).
+        """
+        name = name or self.default
+        with self._lock:
+            state = self._states.get(name)
+            if state is None:
+                if name not in self.paths:
+                    if not create or self.factory is None:
+                        return None
+                    if not DATASET_NAME.fullmatch(name):
+                        raise ValueError(f"nome de dataset '{name}' inválido")
+                    base = os.path.join(self.data_dir, name)
+                    self.paths[name] = (f"{base}.xml", f"{base}.xsd")
+                state = self._states[name] = self.factory(*self.paths[name])
+            self._states.move_to_end(name)
+        if load and not state.snapshot.loaded:
+            if state.ensure_loaded().loaded:
+                self.enforce_budget(keep=name)
+        return state
+
+    def enforce_budget(self, keep: str = ""):
+        """Descarrega datasets, do usado há mais tempo para o mais recente, até a estimativa caber no orçamento."""
+        if not self.memory_budget:
+            return
+        with self._lock:
+            states = list(self._states.items())
+        sizes = {name: state.snapshot.memory_bytes() for name, state in states}
+        total = sum(sizes.values())
+        for name, state in states:
+            if total <= self.memory_budget:
+                break
+            # o dataset que acabou de ser pedido fica, mesmo que sozinho passe do orçamento
+            if name == keep or not sizes[name]:
+                continue
+            state.unload()
+            total -= sizes[name]
+            print(
+                f"Dataset '{name}' descarregado ({sizes[name] / 1e6:.0f} MB estimados; "
+                f"orçamento {self.memory_budget / 1e6:.0f} MB, em uso {total / 1e6:.0f} MB)"
+            )
+
+    def describe(self) -> list:
+        """[(nome, estado ou None)] do usado há mais tempo para o mais recente; os nunca usados vêm primeiro."""
+        with self._lock:
+            unused = [(name, None) for name in self.paths if name not in self._states]
+            return unused + list(self._states.items())
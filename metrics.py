@@ -0,0 +1,390 @@
+"""Métricas por método (gRPC e XML-RPC) e tempo por etapa, expostas em formato de texto Prometheus.
+
+Por método e protocolo: chamadas, erros, histograma de latência e bytes recebidos/enviados. Por
+etapa (``xpath``, ``serialize``): chamadas e tempo acumulado. O registo é partilhado pelo processo
+(``REGISTRY``) e lido pelo endpoint HTTP (``serve_http``) e pelo RPC ``GetMetrics``.
+"""
+import bisect
+import inspect
+import re
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import property_service_pb2 as pb2
+
+# limites superiores (segundos) dos buckets do histograma de latência; o último é +Inf
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# respostas com erro: os handlers devolvem o erro no corpo da resposta em vez de um status gRPC
+ERROR_PREFIXES = ("Erro", "<error>")
+_XMLRPC_METHOD = re.compile(rb"<methodName>\s*([^<\s]+)\s*</methodName>")
+_XMLRPC_ERROR = re.compile(rb"<params>\s*<param>\s*<value>\s*(?:<string>)?(?:Erro|&lt;error&gt;)")
+SERVICE = pb2.DESCRIPTOR.services_by_name["PropertyService"]
+# nomes de método XML-RPC que o servidor não conhece ficam todos nesta etiqueta (o nome vem do cliente)
+UNKNOWN_METHOD = "unknown"
+
+
+def _label(value: str) -> str:
+    # escape dos valores de etiquetas no formato de texto do Prometheus
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class MethodStats:
+    def __init__(self):
+        self.calls = 0
+        self.errors = 0
+        self.seconds = 0.0
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.buckets = [0] * (len(LATENCY_BUCKETS) + 1)
+
+
+class Metrics:
+    """Contadores do processo, atualizados sob um único lock (uma atualização por pedido/etapa)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.started = time.time()
+        self.methods = {}
+        self.stages = {}
+
+    def observe(self, protocol: str, method: str, seconds: float, error=False, bytes_in=0, bytes_out=0):
+        bucket = bisect.bisect_left(LATENCY_BUCKETS, seconds)
+        with self._lock:
+            stats = self.methods.get((protocol, method))
+            if stats is None:
+                stats = self.methods[(protocol, method)] = MethodStats()
+            stats.calls += 1
+            stats.errors += bool(error)
+            stats.seconds += seconds
+            stats.bytes_in += bytes_in
+            stats.bytes_out += bytes_out
+            stats.buckets[bucket] += 1
+
+    def add_stage(self, stage: str, seconds: float):
+        with self._lock:
+            calls, total = self.stages.get(stage, (0, 0.0))
+            self.stages[stage] = (calls + 1, total + seconds)
+
+    @contextmanager
+    def stage(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_stage(name, time.perf_counter() - start)
+
+    def snapshot(self):
+        # cópia consistente para exportar sem segurar o lock durante a formatação
+        with self._lock:
+            methods = {
+                key: (s.calls, s.errors, s.seconds, s.bytes_in, s.bytes_out, list(s.buckets))
+                for key, s in self.methods.items()
+            }
+            return methods, dict(self.stages)
+
+    def render(self) -> str:
+        """Texto no formato de exposição do Prometheus (0.0.4)."""
+        methods, stages = self.snapshot()
+        lines = [
+            "# HELP rpc_requests_total Pedidos atendidos por protocolo e método.",
+            "# TYPE rpc_requests_total counter",
+        ]
+        labels = {key: f'protocol="{_label(key[0])}",method="{_label(key[1])}"' for key in methods}
+        for key, (calls, *_) in sorted(methods.items()):
+            lines.append(f"rpc_requests_total{{{labels[key]}}} {calls}")
+        lines += ["# HELP rpc_errors_total Pedidos com erro.", "# TYPE rpc_errors_total counter"]
+        for key, (_, errors, *_) in sorted(methods.items()):
+            lines.append(f"rpc_errors_total{{{labels[key]}}} {errors}")
+        for name, index, help_text in (
+            ("rpc_received_bytes_total", 3, "Bytes recebidos nos pedidos."),
+            ("rpc_sent_bytes_total", 4, "Bytes enviados nas respostas."),
+        ):
+            lines += [f"# HELP {name} {help_text}", f"# TYPE {name} counter"]
+            for key, values in sorted(methods.items()):
+                lines.append(f"{name}{{{labels[key]}}} {values[index]}")
+        lines += [
+            "# HELP rpc_latency_seconds Latência por pedido (do início do handler ao fim da resposta).",
+            "# TYPE rpc_latency_seconds histogram",
+        ]
+        for key, (calls, _, seconds, _, _, buckets) in sorted(methods.items()):
+            cumulative = 0
+            for bound, count in zip(LATENCY_BUCKETS + ("+Inf",), buckets):
+                cumulative += count
+                lines.append(f'rpc_latency_seconds_bucket{{{labels[key]},le="{bound}"}} {cumulative}')
+            lines.append(f"rpc_latency_seconds_sum{{{labels[key]}}} {seconds:.6f}")
+            lines.append(f"rpc_latency_seconds_count{{{labels[key]}}} {calls}")
+        lines += [
+            "# HELP stage_seconds_total Tempo acumulado por etapa (xpath = avaliação, serialize = etree.tostring).",
+            "# TYPE stage_seconds_total counter",
+        ]
+        for stage, (_, seconds) in sorted(stages.items()):
+            lines.append(f'stage_seconds_total{{stage="{_label(stage)}"}} {seconds:.6f}')
+        lines += ["# HELP stage_calls_total Execuções por etapa.", "# TYPE stage_calls_total counter"]
+        for stage, (calls, _) in sorted(stages.items()):
+            lines.append(f'stage_calls_total{{stage="{_label(stage)}"}} {calls}')
+        lines += [
+            "# HELP process_start_time_seconds Início do processo (epoch).",
+            "# TYPE process_start_time_seconds gauge",
+            f"process_start_time_seconds {self.started:.3f}",
+        ]
+        return "\n".join(lines) + "\n"
+
+    def to_proto(self) -> pb2.MetricsResponse:
+        methods, stages = self.snapshot()
+        return pb2.MetricsResponse(
+            methods=[
+                pb2.MethodMetrics(
+                    protocol=protocol,
+                    method=method,
+                    calls=calls,
+                    errors=errors,
+                    latency_seconds=seconds,
+                    bytes_in=bytes_in,
+                    bytes_out=bytes_out,
+                    latency_buckets=buckets,
+                )
+                for (protocol, method), (calls, errors, seconds, bytes_in, bytes_out, buckets) in sorted(methods.items())
+            ],
+            stages=[
+                pb2.StageMetrics(name=stage, calls=calls, seconds=seconds)
+                for stage, (calls, seconds) in sorted(stages.items())
+            ],
+            latency_bounds=LATENCY_BUCKETS,
+            text=self.render(),
+        )
+
+
+REGISTRY = Metrics()
+
+
+def is_error(response) -> bool:
+    # erros devolvidos no corpo: campo error, upload recusado ou uma única string "Erro..."/"<error>..."
+    if getattr(response, "error", ""):
+        return True
+    if isinstance(response, pb2.UploadResponse):
+        return not response.ok
+    if isinstance(response, pb2.QueryResponse):
+        return len(response.results) == 1 and response.results[0].startswith(ERROR_PREFIXES)
+    if isinstance(response, pb2.RecordResponse):
+        return response.record_xml.startswith("<error>")
+    return False
+
+
+def instrument_servicer(servicer, registry: Metrics = REGISTRY, protocol: str = "grpc"):
+    """Substitui cada método do serviço em ``servicer`` por uma versão medida (síncrona ou asyncio,
+    unária ou em stream, conforme o descritor do serviço). Devolve o próprio servicer."""
+    for method in SERVICE.methods:
+        handler = getattr(servicer, method.name)
+        is_async = inspect.iscoroutinefunction(handler) or inspect.isasyncgenfunction(handler)
+        wrap = (_ASYNC_WRAPPERS if is_async else _WRAPPERS)[method.client_streaming, method.server_streaming]
+        setattr(servicer, method.name, wrap(handler, registry, protocol, method.name))
+    return servicer
+
+
+class _Call:
+    """Contabilidade de uma chamada em curso: bytes, erro e tempo desde o início."""
+
+    __slots__ = ("registry", "protocol", "method", "start", "bytes_in", "bytes_out", "error")
+
+    def __init__(self, registry, protocol, method):
+        self.registry, self.protocol, self.method = registry, protocol, method
+        self.start = time.perf_counter()
+        self.bytes_in = self.bytes_out = 0
+        self.error = False
+
+    def received(self, request):
+        self.bytes_in += request.ByteSize()
+        return request
+
+    def sent(self, response):
+        self.bytes_out += response.ByteSize()
+        self.error = self.error or is_error(response)
+        return response
+
+    def done(self):
+        self.registry.observe(
+            self.protocol, self.method, time.perf_counter() - self.start, self.error, self.bytes_in, self.bytes_out
+        )
+
+
+def _counted(requests, call: _Call):
+    for request in requests:
+        yield call.received(request)
+
+
+async def _counted_async(requests, call: _Call):
+    async for request in requests:
+        yield call.received(request)
+
+
+def _unary(handler, registry, protocol, name):
+    def wrapper(request, context):
+        call = _Call(registry, protocol, name)
+        try:
+            return call.sent(handler(call.received(request), context))
+        except BaseException:
+            call.error = True
+            raise
+        finally:
+            call.done()
+
+    return wrapper
+
+
+def _client_stream(handler, registry, protocol, name):
+    def wrapper(request_iterator, context):
+        call = _Call(registry, protocol, name)
+        try:
+            return call.sent(handler(_counted(request_iterator, call), context))
+        except BaseException:
+            call.error = True
+            raise
+        finally:
+            call.done()
+
+    return wrapper
+
+
+def _server_stream(handler, registry, protocol, name, counted=False):
+    def wrapper(request, context):
+        call = _Call(registry, protocol, name)
+        # um stream cancelado pelo cliente (GeneratorExit) também conta como erro
+        try:
+            requests = _counted(request, call) if counted else call.received(request)
+            for response in handler(requests, context):
+                yield call.sent(response)
+        except BaseException:
+            call.error = True
+            raise
+        finally:
+            call.done()
+
+    return wrapper
+
+
+def _bidi_stream(handler, registry, protocol, name):
+    return _server_stream(handler, registry, protocol, name, counted=True)
+
+
+def _async_unary(handler, registry, protocol, name):
+    async def wrapper(request, context):
+        call = _Call(registry, protocol, name)
+        try:
+            return call.sent(await handler(call.received(request), context))
+        except BaseException:
+            call.error = True
+            raise
+        finally:
+            call.done()
+
+    return wrapper
+
+
+def _async_client_stream(handler, registry, protocol, name):
+    async def wrapper(request_iterator, context):
+        call = _Call(registry, protocol, name)
+        try:
+            return call.sent(await handler(_counted_async(request_iterator, call), context))
+        except BaseException:
+            call.error = True
+            raise
+        finally:
+            call.done()
+
+    return wrapper
+
+
+def _async_server_stream(handler, registry, protocol, name, counted=False):
+    async def wrapper(request, context):
+        call = _Call(registry, protocol, name)
+        try:
+            requests = _counted_async(request, call) if counted else call.received(request)
+            async for response in handler(requests, context):
+                yield call.sent(response)
+        except BaseException:
+            call.error = True
+            raise
+        finally:
+            call.done()
+
+    return wrapper
+
+
+def _async_bidi_stream(handler, registry, protocol, name):
+    return _async_server_stream(handler, registry, protocol, name, counted=True)
+
+
+# (client_streaming, server_streaming) -> wrapper
+_WRAPPERS = {
+    (False, False): _unary,
+    (True, False): _client_stream,
+    (False, True): _server_stream,
+    (True, True): _bidi_stream,
+}
+_ASYNC_WRAPPERS = {
+    (False, False): _async_unary,
+    (True, False): _async_client_stream,
+    (False, True): _async_server_stream,
+    (True, True): _async_bidi_stream,
+}
+
+
+def instrument_xmlrpc(server, registry: Metrics = REGISTRY, protocol: str = "xmlrpc"):
+    """Mede cada pedido XML-RPC no ponto em que o corpo é descodificado e a resposta codificada, com
+    os bytes exatos da ligação. Um system.multicall conta como uma chamada."""
+    dispatch = server._marshaled_dispatch
+
+    def marshaled_dispatch(data, dispatch_method=None, path=None):
+        start = time.perf_counter()
+        response = b""
+        try:
+            response = dispatch(data, dispatch_method, path)
+            return response
+        finally:
+            found = _XMLRPC_METHOD.search(data[:512])
+            method = found.group(1).decode("utf-8", "replace") if found else ""
+            # só nomes registados viram séries próprias: o resto não faz crescer o número de séries
+            if method not in server.funcs:
+                method = UNKNOWN_METHOD
+            head = response[:256]
+            registry.observe(
+                protocol,
+                method,
+                time.perf_counter() - start,
+                not response or b"<fault>" in head or bool(_XMLRPC_ERROR.search(head)),
+                len(data),
+                len(response),
+            )
+
+    server._marshaled_dispatch = marshaled_dispatch
+    return server
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    registry = REGISTRY
+
+    def do_GET(self):
+        if self.path.split("?")[0] not in ("/metrics", "/"):
+            self.send_error(404)
+            return
+        body = self.registry.render().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        # cada scrape não precisa de ir para o log
+        pass
+
+
+def serve_http(address=("127.0.0.1", 9100), registry: Metrics = REGISTRY):
+    """Endpoint /metrics numa thread daemon; devolve o servidor HTTP."""
+    handler = type("MetricsHandler", (_MetricsHandler,), {"registry": registry})
+    server = ThreadingHTTPServer(address, handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True, name="metrics-http").start()
+    return server
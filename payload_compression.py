@@ -0,0 +1,97 @@
+"""Compressão do XML enviado nos uploads e compressão ao nível do canal gRPC.
+
+O payload comprimido é declarado em ``UploadRequest.compression`` / ``UploadChunk.compression``
+e descomprimido em streaming no servidor; a compressão do canal (``GRPC_COMPRESSION``) aplica-se
+a todas as mensagens e é negociada pelo próprio gRPC.
+"""
+import lzma
+import zlib
+
+import grpc
+
+import property_service_pb2 as pb2
+
+# nomes aceites nas variáveis de ambiente -> valor do enum PayloadCompression
+PAYLOAD_COMPRESSIONS = {
+    "none": pb2.IDENTITY,
+    "gzip": pb2.GZIP,
+    "zlib": pb2.ZLIB,
+    "lzma": pb2.LZMA,
+}
+CHANNEL_COMPRESSIONS = {
+    "none": grpc.Compression.NoCompression,
+    "gzip": grpc.Compression.Gzip,
+    "deflate": grpc.Compression.Deflate,
+}
+# nível baixo: o upload é limitado pela geração do XML, não pela rede
+DEFAULT_LEVEL = 1
+
+
+def payload_compression(name: str) -> int:
+    try:
+        return PAYLOAD_COMPRESSIONS[name.lower()]
+    except KeyError:
+        raise ValueError(f"compressão '{name}' inválida (use {', '.join(PAYLOAD_COMPRESSIONS)})") from None
+
+
+def channel_compression(name: str):
+    try:
+        return CHANNEL_COMPRESSIONS[name.lower()]
+    except KeyError:
+        raise ValueError(f"compressão '{name}' inválida (use {', '.join(CHANNEL_COMPRESSIONS)})") from None
+
+
+def compressor(compression: int, level: int = DEFAULT_LEVEL):
+    """Compressor incremental (``compress``/``flush``) para o valor do enum, ou None sem compressão."""
+    if compression == pb2.GZIP:
+        return zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    if compression == pb2.ZLIB:
+        return zlib.compressobj(level)
+    if compression == pb2.LZMA:
+        return lzma.LZMACompressor(preset=level)
+    return None
+
+
+class Decompressor:
+    """Descompressão incremental de um payload: ``feed`` devolve os bytes já disponíveis e ``close``
+    confirma que o stream comprimido chegou completo."""
+
+    def __init__(self, compression: int):
+        if compression == pb2.GZIP:
+            self._obj = zlib.decompressobj(16 + zlib.MAX_WBITS)
+        elif compression == pb2.ZLIB:
+            self._obj = zlib.decompressobj()
+        elif compression == pb2.LZMA:
+            self._obj = lzma.LZMADecompressor()
+        else:
+            raise ValueError(f"compressão {compression} desconhecida")
+
+    def feed(self, data, max_size: int):
+        """Bytes descomprimidos de ``data`` em pedaços de no máximo ``max_size``: um bloco pequeno muito
+        comprimido (uma "bomba") nunca chega a existir descomprimido de uma só vez em memória."""
+        if self._obj.eof:
+            raise ValueError("dados depois do fim do payload comprimido")
+        while True:
+            out = self._obj.decompress(data, max_size)
+            if out:
+                yield out
+            if self._obj.eof:
+                return
+            if isinstance(self._obj, lzma.LZMADecompressor):
+                # needs_input a False: há saída pendente, pedida com entrada vazia
+                if self._obj.needs_input:
+                    return
+                data = b""
+            else:
+                # o zlib guarda a entrada por consumir; sem ela, uma saída cheia pode ainda ter mais
+                data = self._obj.unconsumed_tail
+                if not data and len(out) < max_size:
+                    return
+
+    def close(self) -> bytes:
+        tail = self._obj.flush() if hasattr(self._obj, "flush") else b""
+        if not self._obj.eof:
+            raise ValueError("payload comprimido incompleto")
+        if self._obj.unused_data:
+            raise ValueError("dados depois do fim do payload comprimido")
+        return tail
@@ -0,0 +1,275 @@
+"""Profiling a pedido: cProfile sobre uma fração das chamadas e, opcionalmente, tracemalloc.
+
+Desligado por omissão. Liga-se com ``PROFILE_SAMPLE`` (fração de chamadas, 0 a 1) ou em execução
+com o RPC ``ConfigureProfiling``. Cada chamada amostrada corre sob o seu próprio ``cProfile.Profile``
+(só a thread que a executa); os perfis são somados por ``protocolo.método`` e gravados em
+``PROFILE_DIR`` (o ``output_dir`` do RPC é um subdiretório deste):
+
+- ``<protocolo>.<método>.pstats`` (abrir com ``python -m pstats`` ou snakeviz) e ``.txt`` com as
+  funções mais pesadas por tempo acumulado;
+- ``summary.txt``: amostras, tempo de relógio e de CPU por método; CPU muito abaixo do relógio
+  indica espera (GIL, I/O ou rede) e não trabalho do próprio pedido;
+- ``tracemalloc.txt`` (``PROFILE_TRACEMALLOC=1``): linhas com mais memória alocada no processo.
+
+A codificação protobuf das respostas é feita pelo gRPC depois de o handler devolver e não entra nos
+perfis; os bytes enviados por método estão nas métricas (``GetMetrics``).
+"""
+import atexit
+import cProfile
+import inspect
+import io
+import os
+import pstats
+import random
+import threading
+import time
+import tracemalloc
+
+TOP_FUNCTIONS = 40
+TOP_ALLOCATIONS = 50
+
+
+class _Session:
+    """Perfil de uma chamada amostrada; pode ser retomado várias vezes (respostas em stream)."""
+
+    def __init__(self, profiler, key):
+        self.profiler = profiler
+        self.key = key
+        self.profile = cProfile.Profile()
+        self.wall = 0.0
+        self.cpu = 0.0
+
+    def resume(self):
+        self.profiler._local.active = True
+        self._wall, self._cpu = time.perf_counter(), time.thread_time()
+        self.profile.enable()
+
+    def pause(self):
+        self.profile.disable()
+        self.wall += time.perf_counter() - self._wall
+        self.cpu += time.thread_time() - self._cpu
+        self.profiler._local.active = False
+
+    def finish(self):
+        self.profiler._add(self.key, self.profile, self.wall, self.cpu)
+
+
+class Profiler:
+    def __init__(self, sample_rate: float = 0.0, output_dir: str = "profiles", trace_memory: bool = False):
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self.sample_rate = 0.0
+        # output_dir pedido por RPC só pode ser um subdiretório de base_dir
+        self.base_dir = output_dir
+        self.output_dir = output_dir
+        self.trace_memory = False
+        self.stats = {}
+        self.totals = {}
+        self._pid = os.getpid()
+        self.configure(sample_rate=sample_rate, trace_memory=trace_memory)
+
+    @classmethod
+    def from_env(cls):
+        return cls(
+            float(os.getenv("PROFILE_SAMPLE", "0")),
+            os.getenv("PROFILE_DIR", "profiles"),
+            os.getenv("PROFILE_TRACEMALLOC", "0") == "1",
+        )
+
+    @property
+    def enabled(self) -> bool:
+        return self.sample_rate > 0
+
+    def configure(self, sample_rate=None, trace_memory=None, output_dir=None):
+        # valida tudo antes de alterar: um pedido inválido não deixa a configuração a meio
+        output_dir = self.resolve_dir(output_dir) if output_dir else self.output_dir
+        if sample_rate is not None and not 0 <= sample_rate <= 1:
+            raise ValueError("sample_rate tem de estar entre 0 e 1")
+        if sample_rate is not None:
+            self.sample_rate = sample_rate
+        self.output_dir = output_dir
+        if trace_memory is not None and trace_memory != self.trace_memory:
+            # o tracemalloc abrange o processo inteiro enquanto estiver ligado
+            if trace_memory:
+                tracemalloc.start()
+            else:
+                tracemalloc.stop()
+            self.trace_memory = trace_memory
+
+    def resolve_dir(self, output_dir: str) -> str:
+        """Caminho de ``output_dir`` dentro de ``base_dir``; recusa caminhos absolutos e ``..``."""
+        parts = output_dir.replace("\\", "/").split("/")
+        if os.path.isabs(output_dir) or ".." in parts:
+            raise ValueError(f"output_dir tem de ser um subdiretório relativo de {self.base_dir}: {output_dir}")
+        path = os.path.normpath(os.path.join(self.base_dir, output_dir))
+        base = os.path.realpath(self.base_dir)
+        if os.path.commonpath([base, os.path.realpath(path)]) != base:
+            # ligação simbólica para fora de base_dir
+            raise ValueError(f"output_dir fora de {self.base_dir}: {output_dir}")
+        return path
+
+    def reset(self):
+        with self._lock:
+            self.stats = {}
+            self.totals = {}
+
+    def _sample(self) -> bool:
+        # chamadas aninhadas (ex.: system.multicall) ficam no perfil da chamada exterior
+        if self.sample_rate <= 0 or getattr(self._local, "active", False):
+            return False
+        return random.random() < self.sample_rate
+
+    def _add(self, key, profile, wall, cpu):
+        profile.create_stats()
+        with self._lock:
+            if self._pid != os.getpid():
+                # processo criado por fork: os perfis herdados são do processo pai
+                self._pid = os.getpid()
+                self.stats, self.totals = {}, {}
+            if key in self.stats:
+                self.stats[key].add(profile)
+            else:
+                self.stats[key] = pstats.Stats(profile)
+            samples, total_wall, total_cpu = self.totals.get(key, (0, 0.0, 0.0))
+            self.totals[key] = (samples + 1, total_wall + wall, total_cpu + cpu)
+
+    def wrap(self, key: str, fn, dump: bool = False):
+        """Versão de ``fn`` que corre sob cProfile numa fração das chamadas. Se ``fn`` devolver um
+        gerador, o perfil cobre cada passo da iteração. ``dump`` grava os perfis após cada amostra
+        (processos de trabalho, que não correm atexit)."""
+
+        def wrapper(*args, **kwargs):
+            if not self._sample():
+                return fn(*args, **kwargs)
+            session = _Session(self, key)
+            session.resume()
+            try:
+                result = fn(*args, **kwargs)
+            except BaseException:
+                session.pause()
+                session.finish()
+                raise
+            session.pause()
+            if inspect.isgenerator(result):
+                return self._profiled_steps(session, result, dump)
+            session.finish()
+            if dump:
+                self.dump(suffix=f".pid{os.getpid()}")
+            return result
+
+        wrapper.__name__ = getattr(fn, "__name__", key)
+        wrapper.__doc__ = getattr(fn, "__doc__", None)
+        return wrapper
+
+    def _profiled_steps(self, session: _Session, generator, dump: bool):
+        try:
+            while True:
+                session.resume()
+                try:
+                    item = next(generator)
+                except StopIteration:
+                    return
+                finally:
+                    session.pause()
+                yield item
+        finally:
+            generator.close()
+            session.finish()
+            if dump:
+                self.dump(suffix=f".pid{os.getpid()}")
+
+    def dump_every(self, seconds: float):
+        """Grava os perfis periodicamente numa thread daemon (um servidor parado por sinal não corre atexit)."""
+
+        def loop():
+            while True:
+                time.sleep(seconds)
+                if self.stats:
+                    try:
+                        self.dump()
+                    except OSError as exc:
+                        print(f"Erro ao gravar perfis em {self.output_dir}: {exc}")
+
+        threading.Thread(target=loop, daemon=True, name="profile-dump").start()
+
+    def summary(self):
+        """[(chave, amostras, relógio_s, cpu_s)] ordenado pelo tempo de relógio."""
+        with self._lock:
+            rows = [(key, *values) for key, values in self.totals.items()]
+        return sorted(rows, key=lambda row: row[2], reverse=True)
+
+    def dump(self, output_dir=None, suffix: str = "") -> list:
+        """Grava os perfis somados desde o último reset (em ``output_dir``, relativo a ``base_dir``, se
+        indicado); devolve os ficheiros escritos."""
+        output_dir = self.resolve_dir(output_dir) if output_dir else self.output_dir
+        os.makedirs(output_dir, exist_ok=True)
+        with self._lock:
+            stats = dict(self.stats)
+        files = []
+        for key, key_stats in stats.items():
+            base = os.path.join(output_dir, f"{key}{suffix}")
+            with self._lock:
+                key_stats.dump_stats(f"{base}.pstats")
+                text = io.StringIO()
+                key_stats.stream = text
+                key_stats.sort_stats("cumulative").print_stats(TOP_FUNCTIONS)
+            with open(f"{base}.txt", "w", encoding="utf-8") as f:
+                f.write(text.getvalue())
+            files += [f"{base}.pstats", f"{base}.txt"]
+
+        rows = self.summary()
+        if rows:
+            path = os.path.join(output_dir, f"summary{suffix}.txt")
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(f"{'método':<40} {'amostras':>9} {'relógio_s':>10} {'cpu_s':>9} {'cpu/relógio':>12}\n")
+                for key, samples, wall, cpu in rows:
+                    ratio = cpu / wall if wall else 0.0
+                    f.write(f"{key:<40} {samples:>9} {wall:>10.3f} {cpu:>9.3f} {ratio:>12.0%}\n")
+            files.append(path)
+
+        if self.trace_memory and tracemalloc.is_tracing():
+            path = os.path.join(output_dir, f"tracemalloc{suffix}.txt")
+            current, peak = tracemalloc.get_traced_memory()
+            top = tracemalloc.take_snapshot().statistics("lineno")[:TOP_ALLOCATIONS]
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(f"memória rastreada: atual {current / 1e6:.1f} MB, pico {peak / 1e6:.1f} MB\n\n")
+                for stat in top:
+                    f.write(f"{stat}\n")
+            files.append(path)
+        return files
+
+
+PROFILER = Profiler.from_env()
+
+
+@atexit.register
+def _dump_at_exit():
+    if PROFILER.stats:
+        PROFILER.dump()
+
+
+def instrument_servicer(servicer, profiler: Profiler = PROFILER, protocol: str = "grpc"):
+    """Envolve os métodos síncronos do serviço (ver metrics.SERVICE) com ``profiler.wrap``."""
+    # import local: o xml_converter usa este módulo sem depender do gRPC
+    import metrics
+
+    for method in metrics.SERVICE.methods:
+        setattr(servicer, method.name, profiler.wrap(f"{protocol}.{method.name}", getattr(servicer, method.name)))
+    return servicer
+
+
+def instrument_xmlrpc(server, profiler: Profiler = PROFILER, protocol: str = "xmlrpc"):
+    """Perfila cada função XML-RPC despachada (também as de dentro de um system.multicall)."""
+    import metrics
+
+    dispatch = server._dispatch
+
+    def profiled_dispatch(method, params):
+        if not profiler.enabled:
+            return dispatch(method, params)
+        # o nome vem do cliente e entra no nome dos ficheiros: só métodos registados
+        key = method if method in server.funcs else metrics.UNKNOWN_METHOD
+        return profiler.wrap(f"{protocol}.{key}", dispatch)(method, params)
+
+    server._dispatch = profiled_dispatch
+    return server
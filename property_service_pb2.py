@@ -24,29 +24,97 @@ _sym_db = _symbol_database.Default()
 
 
 
-DESCRIPTOR = _descriptor_pool.Default().AddSerializedFile(b'\n\x16property_service.proto\"\x07\n\x05\x45mpty\"3\n\rUploadRequest\x12\x10\n\x08xml_data\x18\x01 \x01(\t\x12\x10\n\x08xsd_data\x18\x02 \x01(\t\"-\n\x0eUploadResponse\x12\n\n\x02ok\x18\x01 \x01(\x08\x12\x0f\n\x07message\x18\x02 \x01(\t\"$\n\rRecordRequest\x12\x13\n\x0bproperty_id\x18\x01 \x01(\x05\"\x1e\n\rCountResponse\x12\r\n\x05\x63ount\x18\x01 \x01(\x05\"\x1d\n\x0cQueryRequest\x12\r\n\x05query\x18\x01 \x01(\t\" \n\rQueryResponse\x12\x0f\n\x07results\x18\x01 \x03(\t\"$\n\x0eRecordResponse\x12\x12\n\nrecord_xml\x18\x01 \x01(\t2\xc9\x01\n\x0fPropertyService\x12-\n\nUploadData\x12\x0e.UploadRequest\x1a\x0f.UploadResponse\x12\x30\n\rGetRecordByID\x12\x0e.RecordRequest\x1a\x0f.RecordResponse\x12&\n\x0c\x43ountRecords\x12\x06.Empty\x1a\x0e.CountResponse\x12-\n\x0c\x45xecuteXPath\x12\r.QueryRequest\x1a\x0e.QueryResponseb\x06proto3')
+DESCRIPTOR = _descriptor_pool.Default().AddSerializedFile(b'\n\x16property_service.proto\"\x07\n\x05\x45mpty\"!\n\x0e\x44\x61tasetRequest\x12\x0f\n\x07\x64\x61taset\x18\x01 \x01(\t\"\x83\x01\n\rUploadRequest\x12\x10\n\x08xml_data\x18\x01 \x01(\t\x12\x10\n\x08xsd_data\x18\x02 \x01(\t\x12\x13\n\x0bxml_payload\x18\x03 \x01(\x0c\x12(\n\x0b\x63ompression\x18\x04 \x01(\x0e\x32\x13.PayloadCompression\x12\x0f\n\x07\x64\x61taset\x18\x05 \x01(\t\"m\n\x0bUploadChunk\x12\x11\n\txml_chunk\x18\x01 \x01(\x0c\x12\x10\n\x08xsd_data\x18\x02 \x01(\t\x12(\n\x0b\x63ompression\x18\x03 \x01(\x0e\x32\x13.PayloadCompression\x12\x0f\n\x07\x64\x61taset\x18\x04 \x01(\t\"-\n\x0eUploadResponse\x12\n\n\x02ok\x18\x01 \x01(\x08\x12\x0f\n\x07message\x18\x02 \x01(\t\"5\n\rRecordRequest\x12\x13\n\x0bproperty_id\x18\x01 \x01(\x05\x12\x0f\n\x07\x64\x61taset\x18\x02 \x01(\t\"\x1e\n\rCountResponse\x12\r\n\x05\x63ount\x18\x01 \x01(\x05\"B\n\x0cQueryRequest\x12\r\n\x05query\x18\x01 \x01(\t\x12\x12\n\nbatch_size\x18\x02 \x01(\x05\x12\x0f\n\x07\x64\x61taset\x18\x03 \x01(\t\"M\n\rQueryResponse\x12\x0f\n\x07results\x18\x01 \x03(\t\x12\x11\n\ttruncated\x18\x02 \x01(\x08\x12\x18\n\x10truncated_reason\x18\x03 \x01(\t\"q\n\x0cRangeRequest\x12\r\n\x05\x66ield\x18\x01 \x01(\t\x12\x10\n\x03min\x18\x02 \x01(\x01H\x00\x88\x01\x01\x12\x10\n\x03max\x18\x03 \x01(\x01H\x01\x88\x01\x01\x12\r\n\x05limit\x18\x04 \x01(\x05\x12\x0f\n\x07\x64\x61taset\x18\x05 \x01(\tB\x06\n\x04_minB\x06\n\x04_max\"6\n\tPredicate\x12\r\n\x05\x66ield\x18\x01 \x01(\t\x12\n\n\x02op\x18\x02 \x01(\t\x12\x0e\n\x06values\x18\x03 \x03(\t\"o\n\rFilterRequest\x12\x1e\n\npredicates\x18\x01 \x03(\x0b\x32\n.Predicate\x12\x0e\n\x06\x66ields\x18\x02 \x03(\t\x12\r\n\x05limit\x18\x03 \x01(\x05\x12\x0e\n\x06offset\x18\x04 \x01(\x05\x12\x0f\n\x07\x64\x61taset\x18\x05 \x01(\t\"n\n\tFilterRow\x12\n\n\x02id\x18\x01 \x01(\t\x12&\n\x06\x66ields\x18\x02 \x03(\x0b\x32\x16.FilterRow.FieldsEntry\x1a-\n\x0b\x46ieldsEntry\x12\x0b\n\x03key\x18\x01 \x01(\t\x12\r\n\x05value\x18\x02 \x01(\t:\x02\x38\x01\"H\n\x0e\x46ilterResponse\x12\r\n\x05total\x18\x01 \x01(\x05\x12\x18\n\x04rows\x18\x02 \x03(\x0b\x32\n.FilterRow\x12\r\n\x05\x65rror\x18\x03 \x01(\t\"*\n\x0b\x41ggregation\x12\r\n\x05\x66ield\x18\x01 \x01(\t\x12\x0c\n\x04\x66unc\x18\x02 \x01(\t\"y\n\x10\x41ggregateRequest\x12\x10\n\x08group_by\x18\x01 \x03(\t\x12\"\n\x0c\x61ggregations\x18\x02 \x03(\x0b\x32\x0c.Aggregation\x12\x1e\n\npredicates\x18\x03 \x03(\x0b\x32\n.Predicate\x12\x0f\n\x07\x64\x61taset\x18\x04 \x01(\t\"\xd1\x01\n\x0c\x41ggregateRow\x12)\n\x06groups\x18\x01 \x03(\x0b\x32\x19.AggregateRow.GroupsEntry\x12\r\n\x05\x63ount\x18\x02 \x01(\x03\x12)\n\x06values\x18\x03 \x03(\x0b\x32\x19.AggregateRow.ValuesEntry\x1a-\n\x0bGroupsEntry\x12\x0b\n\x03key\x18\x01 \x01(\t\x12\r\n\x05value\x18\x02 \x01(\t:\x02\x38\x01\x1a-\n\x0bValuesEntry\x12\x0b\n\x03key\x18\x01 \x01(\t\x12\r\n\x05value\x18\x02 \x01(\x01:\x02\x38\x01\"?\n\x11\x41ggregateResponse\x12\x1b\n\x04rows\x18\x01 \x03(\x0b\x32\r.AggregateRow\x12\r\n\x05\x65rror\x18\x02 \x01(\t\"$\n\x0eRecordResponse\x12\x12\n\nrecord_xml\x18\x01 \x01(\t\".\n\x0eRecordsRequest\x12\x0b\n\x03ids\x18\x01 \x03(\t\x12\x0f\n\x07\x64\x61taset\x18\x02 \x01(\t\"=\n\x0cRecordResult\x12\n\n\x02id\x18\x01 \x01(\t\x12\r\n\x05\x66ound\x18\x02 \x01(\x08\x12\x12\n\nrecord_xml\x18\x03 \x01(\t\"@\n\x0fRecordsResponse\x12\x1e\n\x07records\x18\x01 \x03(\x0b\x32\r.RecordResult\x12\r\n\x05\x65rror\x18\x02 \x01(\t\"5\n\rUpsertRequest\x12\x13\n\x0brecords_xml\x18\x01 \x03(\t\x12\x0f\n\x07\x64\x61taset\x18\x02 \x01(\t\"w\n\x0e\x43hangeResponse\x12\x10\n\x08inserted\x18\x01 \x01(\x05\x12\x0f\n\x07updated\x18\x02 \x01(\x05\x12\x0f\n\x07\x64\x65leted\x18\x03 \x01(\x05\x12\x11\n\tnot_found\x18\x04 \x03(\t\x12\x0f\n\x07version\x18\x05 \x01(\x03\x12\r\n\x05\x65rror\x18\x06 \x01(\t\"N\n\x0b\x43olumnStats\x12\x0c\n\x04name\x18\x01 \x01(\t\x12\x11\n\tnon_empty\x18\x02 \x01(\x05\x12\x10\n\x08\x64istinct\x18\x03 \x01(\x05\x12\x0c\n\x04type\x18\x04 \x01(\t\"\xce\x01\n\rStatsResponse\x12\x14\n\x0crecord_count\x18\x01 \x01(\x05\x12\x10\n\x08item_tag\x18\x02 \x01(\t\x12\x0f\n\x07id_attr\x18\x03 \x01(\t\x12\x1d\n\x07\x63olumns\x18\x04 \x03(\x0b\x32\x0c.ColumnStats\x12 \n\x0bxpath_cache\x18\x05 \x01(\x0b\x32\x0b.CacheStats\x12!\n\x0cresult_cache\x18\x06 \x01(\x0b\x32\x0b.CacheStats\x12\x0f\n\x07version\x18\x07 \x01(\x03\x12\x0f\n\x07\x64\x61taset\x18\x08 \x01(\t\"l\n\nCacheStats\x12\x0c\n\x04hits\x18\x01 \x01(\x03\x12\x0e\n\x06misses\x18\x02 \x01(\x03\x12\x0c\n\x04size\x18\x03 \x01(\x05\x12\x10\n\x08max_size\x18\x04 \x01(\x05\x12\r\n\x05\x62ytes\x18\x05 \x01(\x03\x12\x11\n\tmax_bytes\x18\x06 \x01(\x03\"\xa7\x01\n\rMethodMetrics\x12\x10\n\x08protocol\x18\x01 \x01(\t\x12\x0e\n\x06method\x18\x02 \x01(\t\x12\r\n\x05\x63\x61lls\x18\x03 \x01(\x03\x12\x0e\n\x06\x65rrors\x18\x04 \x01(\x03\x12\x17\n\x0flatency_seconds\x18\x05 \x01(\x01\x12\x10\n\x08\x62ytes_in\x18\x06 \x01(\x03\x12\x11\n\tbytes_out\x18\x07 \x01(\x03\x12\x17\n\x0flatency_buckets\x18\x08 \x03(\x03\"<\n\x0cStageMetrics\x12\x0c\n\x04name\x18\x01 \x01(\t\x12\r\n\x05\x63\x61lls\x18\x02 \x01(\x03\x12\x0f\n\x07seconds\x18\x03 \x01(\x01\"w\n\x0fMetricsResponse\x12\x1f\n\x07methods\x18\x01 \x03(\x0b\x32\x0e.MethodMetrics\x12\x1d\n\x06stages\x18\x02 \x03(\x0b\x32\r.StageMetrics\x12\x16\n\x0elatency_bounds\x18\x03 \x03(\x01\x12\x0c\n\x04text\x18\x04 \x01(\t\"\x97\x01\n\x10ProfilingRequest\x12\x18\n\x0bsample_rate\x18\x01 \x01(\x01H\x00\x88\x01\x01\x12\x18\n\x0btracemalloc\x18\x02 \x01(\x08H\x01\x88\x01\x01\x12\x0c\n\x04\x64ump\x18\x03 \x01(\x08\x12\r\n\x05reset\x18\x04 \x01(\x08\x12\x12\n\noutput_dir\x18\x05 \x01(\tB\x0e\n\x0c_sample_rateB\x0e\n\x0c_tracemalloc\"\\\n\x0eProfileSummary\x12\x0e\n\x06method\x18\x01 \x01(\t\x12\x0f\n\x07samples\x18\x02 \x01(\x03\x12\x14\n\x0cwall_seconds\x18\x03 \x01(\x01\x12\x13\n\x0b\x63pu_seconds\x18\x04 \x01(\x01\"\x92\x01\n\x11ProfilingResponse\x12\x13\n\x0bsample_rate\x18\x01 \x01(\x01\x12\x13\n\x0btracemalloc\x18\x02 \x01(\x08\x12\x12\n\noutput_dir\x18\x03 \x01(\t\x12!\n\x08profiles\x18\x04 \x03(\x0b\x32\x0f.ProfileSummary\x12\r\n\x05\x66iles\x18\x05 \x03(\t\x12\r\n\x05\x65rror\x18\x06 \x01(\t\"}\n\x0b\x44\x61tasetInfo\x12\x0c\n\x04name\x18\x01 \x01(\t\x12\x10\n\x08xml_path\x18\x02 \x01(\t\x12\x0e\n\x06loaded\x18\x03 \x01(\x08\x12\x14\n\x0crecord_count\x18\x04 \x01(\x05\x12\x14\n\x0cmemory_bytes\x18\x05 \x01(\x03\x12\x12\n\nis_default\x18\x06 \x01(\x08\"O\n\x10\x44\x61tasetsResponse\x12\x1e\n\x08\x64\x61tasets\x18\x01 \x03(\x0b\x32\x0c.DatasetInfo\x12\x1b\n\x13memory_budget_bytes\x18\x02 \x01(\x03*@\n\x12PayloadCompression\x12\x0c\n\x08IDENTITY\x10\x00\x12\x08\n\x04GZIP\x10\x01\x12\x08\n\x04ZLIB\x10\x02\x12\x08\n\x04LZMA\x10\x03\x32\xe9\x06\n\x0fPropertyService\x12-\n\nUploadData\x12\x0e.UploadRequest\x1a\x0f.UploadResponse\x12\x33\n\x10UploadDataStream\x12\x0c.UploadChunk\x1a\x0f.UploadResponse(\x01\x12\x30\n\rGetRecordByID\x12\x0e.RecordRequest\x1a\x0f.RecordResponse\x12\x34\n\x0fGetRecordsByIDs\x12\x0f.RecordsRequest\x1a\x10.RecordsResponse\x12>\n\x15GetRecordsByIDsStream\x12\x0f.RecordsRequest\x1a\x10.RecordsResponse(\x01\x30\x01\x12/\n\x0c\x43ountRecords\x12\x0f.DatasetRequest\x1a\x0e.CountResponse\x12-\n\x0c\x45xecuteXPath\x12\r.QueryRequest\x1a\x0e.QueryResponse\x12\x35\n\x12\x45xecuteXPathStream\x12\r.QueryRequest\x1a\x0e.QueryResponse0\x01\x12+\n\nRangeQuery\x12\r.RangeRequest\x1a\x0e.QueryResponse\x12\x30\n\rFilterRecords\x12\x0e.FilterRequest\x1a\x0f.FilterResponse\x12\x32\n\tAggregate\x12\x11.AggregateRequest\x1a\x12.AggregateResponse\x12+\n\x08GetStats\x12\x0f.DatasetRequest\x1a\x0e.StatsResponse\x12&\n\nGetMetrics\x12\x06.Empty\x1a\x10.MetricsResponse\x12;\n\x12\x43onfigureProfiling\x12\x11.ProfilingRequest\x1a\x12.ProfilingResponse\x12\x30\n\rUpsertRecords\x12\x0e.UpsertRequest\x1a\x0f.ChangeResponse\x12\x31\n\rDeleteRecords\x12\x0f.RecordsRequest\x1a\x0f.ChangeResponse\x12)\n\x0cListDatasets\x12\x06.Empty\x1a\x11.DatasetsResponseb\x06proto3')
 
 _globals = globals()
 _builder.BuildMessageAndEnumDescriptors(DESCRIPTOR, _globals)
 _builder.BuildTopDescriptorsAndMessages(DESCRIPTOR, 'property_service_pb2', _globals)
 if not _descriptor._USE_C_DESCRIPTORS:
   DESCRIPTOR._loaded_options = None
+  _globals['_FILTERROW_FIELDSENTRY']._loaded_options = None
+  _globals['_FILTERROW_FIELDSENTRY']._serialized_options = b'8\001'
+  _globals['_AGGREGATEROW_GROUPSENTRY']._loaded_options = None
+  _globals['_AGGREGATEROW_GROUPSENTRY']._serialized_options = b'8\001'
+  _globals['_AGGREGATEROW_VALUESENTRY']._loaded_options = None
+  _globals['_AGGREGATEROW_VALUESENTRY']._serialized_options = b'8\001'
+  _globals['_PAYLOADCOMPRESSION']._serialized_start=3258
+  _globals['_PAYLOADCOMPRESSION']._serialized_end=3322
   _globals['_EMPTY']._serialized_start=26
   _globals['_EMPTY']._serialized_end=33
-  _globals['_UPLOADREQUEST']._serialized_start=35
-  _globals['_UPLOADREQUEST']._serialized_end=86
-  _globals['_UPLOADRESPONSE']._serialized_start=88
-  _globals['_UPLOADRESPONSE']._serialized_end=133
-  _globals['_RECORDREQUEST']._serialized_start=135
-  _globals['_RECORDREQUEST']._serialized_end=171
-  _globals['_COUNTRESPONSE']._serialized_start=173
-  _globals['_COUNTRESPONSE']._serialized_end=203
-  _globals['_QUERYREQUEST']._serialized_start=205
-  _globals['_QUERYREQUEST']._serialized_end=234
-  _globals['_QUERYRESPONSE']._serialized_start=236
-  _globals['_QUERYRESPONSE']._serialized_end=268
-  _globals['_RECORDRESPONSE']._serialized_start=270
-  _globals['_RECORDRESPONSE']._serialized_end=306
-  _globals['_PROPERTYSERVICE']._serialized_start=309
-  _globals['_PROPERTYSERVICE']._serialized_end=510
+  _globals['_DATASETREQUEST']._serialized_start=35
+  _globals['_DATASETREQUEST']._serialized_end=68
+  _globals['_UPLOADREQUEST']._serialized_start=71
+  _globals['_UPLOADREQUEST']._serialized_end=202
+  _globals['_UPLOADCHUNK']._serialized_start=204
+  _globals['_UPLOADCHUNK']._serialized_end=313
+  _globals['_UPLOADRESPONSE']._serialized_start=315
+  _globals['_UPLOADRESPONSE']._serialized_end=360
+  _globals['_RECORDREQUEST']._serialized_start=362
+  _globals['_RECORDREQUEST']._serialized_end=415
+  _globals['_COUNTRESPONSE']._serialized_start=417
+  _globals['_COUNTRESPONSE']._serialized_end=447
+  _globals['_QUERYREQUEST']._serialized_start=449
+  _globals['_QUERYREQUEST']._serialized_end=515
+  _globals['_QUERYRESPONSE']._serialized_start=517
+  _globals['_QUERYRESPONSE']._serialized_end=594
+  _globals['_RANGEREQUEST']._serialized_start=596
+  _globals['_RANGEREQUEST']._serialized_end=709
+  _globals['_PREDICATE']._serialized_start=711
+  _globals['_PREDICATE']._serialized_end=765
+  _globals['_FILTERREQUEST']._serialized_start=767
+  _globals['_FILTERREQUEST']._serialized_end=878
+  _globals['_FILTERROW']._serialized_start=880
+  _globals['_FILTERROW']._serialized_end=990
+  _globals['_FILTERROW_FIELDSENTRY']._serialized_start=945
+  _globals['_FILTERROW_FIELDSENTRY']._serialized_end=990
+  _globals['_FILTERRESPONSE']._serialized_start=992
+  _globals['_FILTERRESPONSE']._serialized_end=1064
+  _globals['_AGGREGATION']._serialized_start=1066
+  _globals['_AGGREGATION']._serialized_end=1108
+  _globals['_AGGREGATEREQUEST']._serialized_start=1110
+  _globals['_AGGREGATEREQUEST']._serialized_end=1231
+  _globals['_AGGREGATEROW']._serialized_start=1234
+  _globals['_AGGREGATEROW']._serialized_end=1443
+  _globals['_AGGREGATEROW_GROUPSENTRY']._serialized_start=1351
+  _globals['_AGGREGATEROW_GROUPSENTRY']._serialized_end=1396
+  _globals['_AGGREGATEROW_VALUESENTRY']._serialized_start=1398
+  _globals['_AGGREGATEROW_VALUESENTRY']._serialized_end=1443
+  _globals['_AGGREGATERESPONSE']._serialized_start=1445
+  _globals['_AGGREGATERESPONSE']._serialized_end=1508
+  _globals['_RECORDRESPONSE']._serialized_start=1510
+  _globals['_RECORDRESPONSE']._serialized_end=1546
+  _globals['_RECORDSREQUEST']._serialized_start=1548
+  _globals['_RECORDSREQUEST']._serialized_end=1594
+  _globals['_RECORDRESULT']._serialized_start=1596
+  _globals['_RECORDRESULT']._serialized_end=1657
+  _globals['_RECORDSRESPONSE']._serialized_start=1659
+  _globals['_RECORDSRESPONSE']._serialized_end=1723
+  _globals['_UPSERTREQUEST']._serialized_start=1725
+  _globals['_UPSERTREQUEST']._serialized_end=1778
+  _globals['_CHANGERESPONSE']._serialized_start=1780
+  _globals['_CHANGERESPONSE']._serialized_end=1899
+  _globals['_COLUMNSTATS']._serialized_start=1901
+  _globals['_COLUMNSTATS']._serialized_end=1979
+  _globals['_STATSRESPONSE']._serialized_start=1982
+  _globals['_STATSRESPONSE']._serialized_end=2188
+  _globals['_CACHESTATS']._serialized_start=2190
+  _globals['_CACHESTATS']._serialized_end=2298
+  _globals['_METHODMETRICS']._serialized_start=2301
+  _globals['_METHODMETRICS']._serialized_end=2468
+  _globals['_STAGEMETRICS']._serialized_start=2470
+  _globals['_STAGEMETRICS']._serialized_end=2530
+  _globals['_METRICSRESPONSE']._serialized_start=2532
+  _globals['_METRICSRESPONSE']._serialized_end=2651
+  _globals['_PROFILINGREQUEST']._serialized_start=2654
+  _globals['_PROFILINGREQUEST']._serialized_end=2805
+  _globals['_PROFILESUMMARY']._serialized_start=2807
+  _globals['_PROFILESUMMARY']._serialized_end=2899
+  _globals['_PROFILINGRESPONSE']._serialized_start=2902
+  _globals['_PROFILINGRESPONSE']._serialized_end=3048
+  _globals['_DATASETINFO']._serialized_start=3050
+  _globals['_DATASETINFO']._serialized_end=3175
+  _globals['_DATASETSRESPONSE']._serialized_start=3177
+  _globals['_DATASETSRESPONSE']._serialized_end=3256
+  _globals['_PROPERTYSERVICE']._serialized_start=3325
+  _globals['_PROPERTYSERVICE']._serialized_end=4198
 # @@protoc_insertion_point(module_scope)
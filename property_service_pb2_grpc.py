@@ -40,14 +40,29 @@ class PropertyServiceStub(object):
                 request_serializer=property__service__pb2.UploadRequest.SerializeToString,
                 response_deserializer=property__service__pb2.UploadResponse.FromString,
                 _registered_method=True)
+        self.UploadDataStream = channel.stream_unary(
+                '/PropertyService/UploadDataStream',
+                request_serializer=property__service__pb2.UploadChunk.SerializeToString,
+                response_deserializer=property__service__pb2.UploadResponse.FromString,
+                _registered_method=True)
         self.GetRecordByID = channel.unary_unary(
                 '/PropertyService/GetRecordByID',
                 request_serializer=property__service__pb2.RecordRequest.SerializeToString,
                 response_deserializer=property__service__pb2.RecordResponse.FromString,
                 _registered_method=True)
+        self.GetRecordsByIDs = channel.unary_unary(
+                '/PropertyService/GetRecordsByIDs',
+                request_serializer=property__service__pb2.RecordsRequest.SerializeToString,
+                response_deserializer=property__service__pb2.RecordsResponse.FromString,
+                _registered_method=True)
+        self.GetRecordsByIDsStream = channel.stream_stream(
+                '/PropertyService/GetRecordsByIDsStream',
+                request_serializer=property__service__pb2.RecordsRequest.SerializeToString,
+                response_deserializer=property__service__pb2.RecordsResponse.FromString,
+                _registered_method=True)
         self.CountRecords = channel.unary_unary(
                 '/PropertyService/CountRecords',
-                request_serializer=property__service__pb2.Empty.SerializeToString,
+                request_serializer=property__service__pb2.DatasetRequest.SerializeToString,
                 response_deserializer=property__service__pb2.CountResponse.FromString,
                 _registered_method=True)
         self.ExecuteXPath = channel.unary_unary(
@@ -55,6 +70,56 @@ class PropertyServiceStub(object):
                 request_serializer=property__service__pb2.QueryRequest.SerializeToString,
                 response_deserializer=property__service__pb2.QueryResponse.FromString,
                 _registered_method=True)
+        self.ExecuteXPathStream = channel.unary_stream(
+                '/PropertyService/ExecuteXPathStream',
+                request_serializer=property__service__pb2.QueryRequest.SerializeToString,
+                response_deserializer=property__service__pb2.QueryResponse.FromString,
+                _registered_method=True)
+        self.RangeQuery = channel.unary_unary(
+                '/PropertyService/RangeQuery',
+                request_serializer=property__service__pb2.RangeRequest.SerializeToString,
+                response_deserializer=property__service__pb2.QueryResponse.FromString,
+                _registered_method=True)
+        self.FilterRecords = channel.unary_unary(
+                '/PropertyService/FilterRecords',
+                request_serializer=property__service__pb2.FilterRequest.SerializeToString,
+                response_deserializer=property__service__pb2.FilterResponse.FromString,
+                _registered_method=True)
+        self.Aggregate = channel.unary_unary(
+                '/PropertyService/Aggregate',
+                request_serializer=property__service__pb2.AggregateRequest.SerializeToString,
+                response_deserializer=property__service__pb2.AggregateResponse.FromString,
+                _registered_method=True)
+        self.GetStats = channel.unary_unary(
+                '/PropertyService/GetStats',
+                request_serializer=property__service__pb2.DatasetRequest.SerializeToString,
+                response_deserializer=property__service__pb2.StatsResponse.FromString,
+                _registered_method=True)
+        self.GetMetrics = channel.unary_unary(
+                '/PropertyService/GetMetrics',
+                request_serializer=property__service__pb2.Empty.SerializeToString,
+                response_deserializer=property__service__pb2.MetricsResponse.FromString,
+                _registered_method=True)
+        self.ConfigureProfiling = channel.unary_unary(
+                '/PropertyService/ConfigureProfiling',
+                request_serializer=property__service__pb2.ProfilingRequest.SerializeToString,
+                response_deserializer=property__service__pb2.ProfilingResponse.FromString,
+                _registered_method=True)
+        self.UpsertRecords = channel.unary_unary(
+                '/PropertyService/UpsertRecords',
+                request_serializer=property__service__pb2.UpsertRequest.SerializeToString,
+                response_deserializer=property__service__pb2.ChangeResponse.FromString,
+                _registered_method=True)
+        self.DeleteRecords = channel.unary_unary(
+                '/PropertyService/DeleteRecords',
+                request_serializer=property__service__pb2.RecordsRequest.SerializeToString,
+                response_deserializer=property__service__pb2.ChangeResponse.FromString,
+                _registered_method=True)
+        self.ListDatasets = channel.unary_unary(
+                '/PropertyService/ListDatasets',
+                request_serializer=property__service__pb2.Empty.SerializeToString,
+                response_deserializer=property__service__pb2.DatasetsResponse.FromString,
+                _registered_method=True)
 
 
 class PropertyServiceServicer(object):
@@ -67,12 +132,30 @@ class PropertyServiceServicer(object):
         context.set_details('Method not implemented!')
         raise NotImplementedError('Method not implemented!')
 
+    def UploadDataStream(self, request_iterator, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
     def GetRecordByID(self, request, context):
         """Missing associated documentation comment in .proto file."""
         context.set_code(grpc.StatusCode.UNIMPLEMENTED)
         context.set_details('Method not implemented!')
         raise NotImplementedError('Method not implemented!')
 
+    def GetRecordsByIDs(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def GetRecordsByIDsStream(self, request_iterator, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
     def CountRecords(self, request, context):
         """Missing associated documentation comment in .proto file."""
         context.set_code(grpc.StatusCode.UNIMPLEMENTED)
@@ -85,6 +168,66 @@ class PropertyServiceServicer(object):
         context.set_details('Method not implemented!')
         raise NotImplementedError('Method not implemented!')
 
+    def ExecuteXPathStream(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def RangeQuery(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def FilterRecords(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def Aggregate(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def GetStats(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def GetMetrics(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def ConfigureProfiling(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def UpsertRecords(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def DeleteRecords(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def ListDatasets(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
 
 def add_PropertyServiceServicer_to_server(servicer, server):
     rpc_method_handlers = {
@@ -93,14 +236,29 @@ def add_PropertyServiceServicer_to_server(servicer, server):
                     request_deserializer=property__service__pb2.UploadRequest.FromString,
                     response_serializer=property__service__pb2.UploadResponse.SerializeToString,
             ),
+            'UploadDataStream': grpc.stream_unary_rpc_method_handler(
+                    servicer.UploadDataStream,
+                    request_deserializer=property__service__pb2.UploadChunk.FromString,
+                    response_serializer=property__service__pb2.UploadResponse.SerializeToString,
+            ),
             'GetRecordByID': grpc.unary_unary_rpc_method_handler(
                     servicer.GetRecordByID,
                     request_deserializer=property__service__pb2.RecordRequest.FromString,
                     response_serializer=property__service__pb2.RecordResponse.SerializeToString,
             ),
+            'GetRecordsByIDs': grpc.unary_unary_rpc_method_handler(
+                    servicer.GetRecordsByIDs,
+                    request_deserializer=property__service__pb2.RecordsRequest.FromString,
+                    response_serializer=property__service__pb2.RecordsResponse.SerializeToString,
+            ),
+            'GetRecordsByIDsStream': grpc.stream_stream_rpc_method_handler(
+                    servicer.GetRecordsByIDsStream,
+                    request_deserializer=property__service__pb2.RecordsRequest.FromString,
+                    response_serializer=property__service__pb2.RecordsResponse.SerializeToString,
+            ),
             'CountRecords': grpc.unary_unary_rpc_method_handler(
                     servicer.CountRecords,
-                    request_deserializer=property__service__pb2.Empty.FromString,
+                    request_deserializer=property__service__pb2.DatasetRequest.FromString,
                     response_serializer=property__service__pb2.CountResponse.SerializeToString,
             ),
             'ExecuteXPath': grpc.unary_unary_rpc_method_handler(
@@ -108,6 +266,56 @@ def add_PropertyServiceServicer_to_server(servicer, server):
                     request_deserializer=property__service__pb2.QueryRequest.FromString,
                     response_serializer=property__service__pb2.QueryResponse.SerializeToString,
             ),
+            'ExecuteXPathStream': grpc.unary_stream_rpc_method_handler(
+                    servicer.ExecuteXPathStream,
+                    request_deserializer=property__service__pb2.QueryRequest.FromString,
+                    response_serializer=property__service__pb2.QueryResponse.SerializeToString,
+            ),
+            'RangeQuery': grpc.unary_unary_rpc_method_handler(
+                    servicer.RangeQuery,
+                    request_deserializer=property__service__pb2.RangeRequest.FromString,
+                    response_serializer=property__service__pb2.QueryResponse.SerializeToString,
+            ),
+            'FilterRecords': grpc.unary_unary_rpc_method_handler(
+                    servicer.FilterRecords,
+                    request_deserializer=property__service__pb2.FilterRequest.FromString,
+                    response_serializer=property__service__pb2.FilterResponse.SerializeToString,
+            ),
+            'Aggregate': grpc.unary_unary_rpc_method_handler(
+                    servicer.Aggregate,
+                    request_deserializer=property__service__pb2.AggregateRequest.FromString,
+                    response_serializer=property__service__pb2.AggregateResponse.SerializeToString,
+            ),
+            'GetStats': grpc.unary_unary_rpc_method_handler(
+                    servicer.GetStats,
+                    request_deserializer=property__service__pb2.DatasetRequest.FromString,
+                    response_serializer=property__service__pb2.StatsResponse.SerializeToString,
+            ),
+            'GetMetrics': grpc.unary_unary_rpc_method_handler(
+                    servicer.GetMetrics,
+                    request_deserializer=property__service__pb2.Empty.FromString,
+                    response_serializer=property__service__pb2.MetricsResponse.SerializeToString,
+            ),
+            'ConfigureProfiling': grpc.unary_unary_rpc_method_handler(
+                    servicer.ConfigureProfiling,
+                    request_deserializer=property__service__pb2.ProfilingRequest.FromString,
+                    response_serializer=property__service__pb2.ProfilingResponse.SerializeToString,
+            ),
+            'UpsertRecords': grpc.unary_unary_rpc_method_handler(
+                    servicer.UpsertRecords,
+                    request_deserializer=property__service__pb2.UpsertRequest.FromString,
+                    response_serializer=property__service__pb2.ChangeResponse.SerializeToString,
+            ),
+            'DeleteRecords': grpc.unary_unary_rpc_method_handler(
+                    servicer.DeleteRecords,
+                    request_deserializer=property__service__pb2.RecordsRequest.FromString,
+                    response_serializer=property__service__pb2.ChangeResponse.SerializeToString,
+            ),
+            'ListDatasets': grpc.unary_unary_rpc_method_handler(
+                    servicer.ListDatasets,
+                    request_deserializer=property__service__pb2.Empty.FromString,
+                    response_serializer=property__service__pb2.DatasetsResponse.SerializeToString,
+            ),
     }
     generic_handler = grpc.method_handlers_generic_handler(
             'PropertyService', rpc_method_handlers)
@@ -147,6 +355,33 @@ class PropertyService(object):
             metadata,
             _registered_method=True)
 
+    @staticmethod
+    def UploadDataStream(request_iterator,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.stream_unary(
+            request_iterator,
+            target,
+            '/PropertyService/UploadDataStream',
+            property__service__pb2.UploadChunk.SerializeToString,
+            property__service__pb2.UploadResponse.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
     @staticmethod
     def GetRecordByID(request,
             target,
@@ -174,6 +409,60 @@ class PropertyService(object):
             metadata,
             _registered_method=True)
 
+    @staticmethod
+    def GetRecordsByIDs(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/PropertyService/GetRecordsByIDs',
+            property__service__pb2.RecordsRequest.SerializeToString,
+            property__service__pb2.RecordsResponse.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def GetRecordsByIDsStream(request_iterator,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.stream_stream(
+            request_iterator,
+            target,
+            '/PropertyService/GetRecordsByIDsStream',
+            property__service__pb2.RecordsRequest.SerializeToString,
+            property__service__pb2.RecordsResponse.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
     @staticmethod
     def CountRecords(request,
             target,
@@ -189,7 +478,7 @@ class PropertyService(object):
             request,
             target,
             '/PropertyService/CountRecords',
-            property__service__pb2.Empty.SerializeToString,
+            property__service__pb2.DatasetRequest.SerializeToString,
             property__service__pb2.CountResponse.FromString,
             options,
             channel_credentials,
@@ -227,3 +516,273 @@ class PropertyService(object):
             timeout,
             metadata,
             _registered_method=True)
+
+    @staticmethod
+    def ExecuteXPathStream(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_stream(
+            request,
+            target,
+            '/PropertyService/ExecuteXPathStream',
+            property__service__pb2.QueryRequest.SerializeToString,
+            property__service__pb2.QueryResponse.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def RangeQuery(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/PropertyService/RangeQuery',
+            property__service__pb2.RangeRequest.SerializeToString,
+            property__service__pb2.QueryResponse.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def FilterRecords(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/PropertyService/FilterRecords',
+            property__service__pb2.FilterRequest.SerializeToString,
+            property__service__pb2.FilterResponse.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def Aggregate(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/PropertyService/Aggregate',
+            property__service__pb2.AggregateRequest.SerializeToString,
+            property__service__pb2.AggregateResponse.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def GetStats(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/PropertyService/GetStats',
+            property__service__pb2.DatasetRequest.SerializeToString,
+            property__service__pb2.StatsResponse.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def GetMetrics(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/PropertyService/GetMetrics',
+            property__service__pb2.Empty.SerializeToString,
+            property__service__pb2.MetricsResponse.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def ConfigureProfiling(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/PropertyService/ConfigureProfiling',
+            property__service__pb2.ProfilingRequest.SerializeToString,
+            property__service__pb2.ProfilingResponse.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def UpsertRecords(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/PropertyService/UpsertRecords',
+            property__service__pb2.UpsertRequest.SerializeToString,
+            property__service__pb2.ChangeResponse.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def DeleteRecords(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/PropertyService/DeleteRecords',
+            property__service__pb2.RecordsRequest.SerializeToString,
+            property__service__pb2.ChangeResponse.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def ListDatasets(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/PropertyService/ListDatasets',
+            property__service__pb2.Empty.SerializeToString,
+            property__service__pb2.DatasetsResponse.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
@@ -0,0 +1,55 @@
+"""Limites de uma execução de XPath: prazo, número de resultados e tamanho serializado.
+
+Os resultados passam por ``QueryBudget.take`` lote a lote; quando um limite é atingido o lote é
+cortado, ``reason`` explica porquê e quem serializa deixa de pedir lotes. O prazo só é verificado
+entre passos: uma avaliação da libxml2 sobre a árvore inteira não pode ser interrompida a meio (no
+modo de baixa memória a avaliação é feita por lotes de registos e para entre eles).
+"""
+import time
+
+
+class QueryBudget:
+    def __init__(self, timeout: float | None = None, max_results: int = 0, max_bytes: int = 0):
+        # timeout em segundos a partir de agora; 0/None = sem limite (o mesmo nos restantes)
+        self.deadline = time.monotonic() + timeout if timeout else None
+        self.max_results = max_results
+        self.max_bytes = max_bytes
+        self.results = 0
+        self.bytes = 0
+        self.reason = ""
+
+    @property
+    def truncated(self) -> bool:
+        return bool(self.reason)
+
+    def expired(self) -> bool:
+        """True se o prazo passou (ou o orçamento já tinha sido esgotado antes)."""
+        if self.reason:
+            return True
+        if self.deadline is not None and time.monotonic() >= self.deadline:
+            self.reason = f"prazo esgotado após {self.results} resultados"
+            return True
+        return False
+
+    def take(self, items, serialize=None) -> list:
+        """Prefixo de ``items`` que cabe no orçamento, serializado com ``serialize`` (se indicado).
+
+        Só os itens que cabem no limite de resultados chegam a ser serializados; o tamanho conta os
+        caracteres de cada resultado já serializado.
+        """
+        if self.expired():
+            return []
+        if self.max_results and self.results + len(items) > self.max_results:
+            items = items[: self.max_results - self.results]
+            self.reason = f"truncado: limite de {self.max_results} resultados"
+        if serialize is not None:
+            items = serialize(items)
+        if self.max_bytes:
+            for pos, item in enumerate(items):
+                if self.bytes + len(item) > self.max_bytes:
+                    items = items[:pos]
+                    self.reason = f"truncado: limite de {self.max_bytes} bytes"
+                    break
+                self.bytes += len(item)
+        self.results += len(items)
+        return items
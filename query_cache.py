@@ -0,0 +1,134 @@
+"""Caches partilhadas pelos front-ends gRPC e XML-RPC."""
+import os
+import threading
+from collections import OrderedDict
+
+from lxml import etree
+
+# cada etree.XPath serializa as próprias avaliações; mantemos algumas cópias por query
+# para que pedidos concorrentes à mesma expressão não fiquem em fila
+MAX_INSTANCES_PER_QUERY = 4
+
+
+class XPathCache:
+    """Cache LRU de expressões XPath compiladas, indexada pela string da query."""
+
+    def __init__(self, max_size: int | None = None):
+        if max_size is None:
+            max_size = int(os.getenv("XPATH_CACHE_SIZE", "128"))
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def evaluate(self, root, query: str):
+        compiled = self._checkout(query)
+        try:
+            return compiled(root)
+        finally:
+            self._checkin(query, compiled)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "size": len(self._entries), "max_size": self.max_size}
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def _checkout(self, query: str):
+        with self._lock:
+            idle = self._entries.get(query)
+            if idle is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+                self._entries.move_to_end(query)
+                if idle:
+                    return idle.pop()
+        # compilação fora do lock; erros de sintaxe propagam como etree.XPathSyntaxError
+        return etree.XPath(query, smart_strings=False)
+
+    def _checkin(self, query: str, compiled):
+        if self.max_size <= 0:
+            return
+        with self._lock:
+            idle = self._entries.get(query)
+            if idle is None:
+                idle = self._entries[query] = []
+                while len(self._entries) > self.max_size:
+                    self._entries.popitem(last=False)
+            if len(idle) < MAX_INSTANCES_PER_QUERY:
+                idle.append(compiled)
+
+
+class ResultCache:
+    """Cache LRU de respostas já serializadas, limitada em bytes.
+
+    As chaves são tuplos ``(versão, ...)``. ``reset`` muda a versão corrente e descarta as
+    entradas sob o mesmo lock, e ``put`` ignora chaves de outra versão, pelo que um resultado
+    calculado sobre um documento antigo nunca fica guardado depois da troca.
+    """
+
+    def __init__(self, max_bytes: int | None = None):
+        if max_bytes is None:
+            max_bytes = int(float(os.getenv("RESULT_CACHE_MB", "64")) * 1024 * 1024)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._version = 0
+        self._bytes = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._entries.move_to_end(key)
+            return entry[0]
+
+    def put(self, key, value):
+        size = estimate_size(value)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if key[0] != self._version:
+                return
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= old[1]
+            self._entries[key] = (value, size)
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self._bytes -= evicted
+
+    def reset(self, version):
+        with self._lock:
+            self._version = version
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "size": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+            }
+
+
+def estimate_size(value) -> int:
+    # aproximação do custo em memória dos valores guardados (strings e listas de strings ou de nós lxml)
+    if isinstance(value, str):
+        return 49 + len(value)
+    if isinstance(value, (list, tuple)):
+        return 56 + 8 * len(value) + sum(estimate_size(item) for item in value)
+    return 32
@@ -1,6 +1,9 @@
 import glob
 import os
+from xml.sax.saxutils import quoteattr
+
 import pandas as pd
+from lxml import etree
 import utils
 
 DEFAULT_CANDIDATES = [
@@ -21,11 +24,147 @@ def resolve_csv() -> str:
     raise FileNotFoundError("Nenhum CSV encontrado. Defina DATA_CSV ou coloque um CSV na raiz.")
 
 
-def python_to_xsd(dtype: str) -> str:
-    # Para robustez com dados mistos/NaN, usar string
+XS_NS = "http://www.w3.org/2001/XMLSchema"
+
+# tipos auxiliares: o xml_converter escreve valores em falta como "nan" (str(float('nan'))) e, num
+# bloco em que a coluna é lida como float (um valor em falta basta), os inteiros como "1.0" ou "1e+16"
+NULLABLE_TYPES = '''  <xs:simpleType name="missing">
+    <xs:restriction base="xs:string">
+      <xs:enumeration value="nan"/>
+      <xs:enumeration value="inf"/>
+      <xs:enumeration value="-inf"/>
+    </xs:restriction>
+  </xs:simpleType>
+  <xs:simpleType name="integer_as_float">
+    <xs:restriction base="xs:string">
+      <xs:pattern value="[+\-]?[0-9]+\.0|[+\-]?[0-9](\.[0-9]+)?e\+[0-9]+"/>
+    </xs:restriction>
+  </xs:simpleType>
+  <xs:simpleType name="nullable_integer">
+    <xs:union memberTypes="xs:integer integer_as_float missing"/>
+  </xs:simpleType>
+  <xs:simpleType name="nullable_decimal">
+    <xs:union memberTypes="xs:decimal missing"/>
+  </xs:simpleType>
+  <xs:simpleType name="nullable_double">
+    <xs:union memberTypes="xs:double missing"/>
+  </xs:simpleType>
+  <xs:simpleType name="double_or_text">
+    <xs:union memberTypes="xs:double xs:string"/>
+  </xs:simpleType>
+'''
+
+# tipo XSD -> tipo lógico usado pelo servidor
+FIELD_TYPES = {
+    "xs:integer": "integer",
+    "nullable_integer": "integer",
+    "xs:decimal": "decimal",
+    "nullable_decimal": "decimal",
+    "xs:double": "double",
+    "nullable_double": "double",
+    # coluna numérica numa amostra: aceita qualquer texto, que o servidor guarda como NaN
+    "double_or_text": "double",
+}
+NUMERIC_FIELD_TYPES = {"integer", "decimal", "double"}
+
+
+class ColumnProfile:
+    """Resumo de uma coluna do CSV acumulado bloco a bloco para inferir o tipo XSD."""
+
+    def __init__(self, enum_max: int):
+        self.kind = None  # integer < float; bool e string não se misturam com números
+        self.has_missing = False
+        self.has_exponent = False
+        self.enum_max = enum_max
+        self.values = set()
+
+    def update(self, series, all_numeric_chunk: bool):
+        present = series.dropna()
+        if len(present) < len(series):
+            self.has_missing = True
+        if present.empty:
+            return
+        inferred = pd.api.types.infer_dtype(present, skipna=True)
+        if inferred == "integer" and pd.api.types.is_integer_dtype(series.dtype) and not all_numeric_chunk:
+            kind = "integer"
+        elif inferred in ("integer", "floating", "mixed-integer-float"):
+            # num bloco só numérico o xml_converter escreve os inteiros como float ("1.0")
+            kind = "float"
+            self.has_exponent = self.has_exponent or present.astype(str).str.contains("e", regex=False).any()
+        elif inferred == "boolean":
+            kind = "bool"
+        else:
+            kind = "string"
+        self.kind = self._merge(self.kind, kind)
+        if self.kind in ("bool", "string") and len(self.values) <= self.enum_max:
+            self.values.update(present.astype(str).unique()[: self.enum_max + 1])
+
+    @staticmethod
+    def _merge(current, kind):
+        if current is None or current == kind:
+            return kind
+        if {current, kind} == {"integer", "float"}:
+            return "float"
+        return "string"
+
+
+def profile_columns(csv_path: str, sample_rows: int, enum_max: int) -> dict:
+    """Lê as primeiras ``sample_rows`` linhas (0 = CSV inteiro, em blocos) e perfila cada coluna."""
+    profiles = {}
+    reader = pd.read_csv(csv_path, nrows=sample_rows or None, chunksize=100_000, low_memory=False)
+    for chunk in reader:
+        all_numeric = all(
+            pd.api.types.is_numeric_dtype(dtype) and not pd.api.types.is_bool_dtype(dtype) for dtype in chunk.dtypes
+        )
+        for col in chunk.columns:
+            profiles.setdefault(col, ColumnProfile(enum_max)).update(chunk[col], all_numeric)
+    return profiles
+
+
+def python_to_xsd(profile: ColumnProfile | None, complete: bool = False) -> str:
+    """Tipo XSD de uma coluna; devolve o nome do tipo ou uma restrição anónima (enumeração).
+
+    De uma amostra só saem tipos que aceitam qualquer texto, porque as linhas não lidas podem trazer
+    um valor que a amostra não viu (ex.: ``TOTAL`` numa coluna de códigos numéricos): as colunas
+    numéricas ficam ``double_or_text`` e as restantes ``xs:string``.
+    """
+    if profile is None or profile.kind is None:
+        return "xs:string"
+    if not complete:
+        return "double_or_text" if profile.kind in ("integer", "float") else "xs:string"
+    if profile.kind == "integer":
+        return "nullable_integer"
+    if profile.kind == "float":
+        # str(float) usa notação científica (ex.: 1e+20), inválida em xs:decimal
+        return "nullable_double" if profile.has_exponent else "nullable_decimal"
+    # booleanos saem como "True"/"False" (str do Python), fora do espaço léxico de xs:boolean,
+    # por isso são uma enumeração (com "nan", para os blocos com valores em falta)
+    if profile.kind == "bool":
+        return ["False", "True", "nan"]
+    if profile.kind == "string" and 0 < len(profile.values) <= profile.enum_max:
+        return sorted(profile.values | ({"nan"} if profile.has_missing else set()))
     return "xs:string"
 
 
+def enum_value(value: str) -> str:
+    # valor tal como o xml_converter o escreve, já entre aspas e escapado para atributo
+    return quoteattr(utils.clean_xml_value(value))
+
+
+def read_field_types(xsd_path: str) -> dict:
+    """Lê um XSD gerado por generate_xsd e devolve {elemento: tipo lógico} para os campos tipados."""
+    tree = etree.parse(xsd_path)
+    types = {}
+    for element in tree.iter(f"{{{XS_NS}}}element"):
+        name = element.get("name")
+        xsd_type = element.get("type")
+        if name and xsd_type in FIELD_TYPES:
+            types[name] = FIELD_TYPES[xsd_type]
+        elif name and element.find(f"{{{XS_NS}}}simpleType") is not None:
+            types[name] = "enum"
+    return types
+
+
 def derive_tags(id_column: str, df_columns) -> tuple[str, str, str]:
     root_tag = os.getenv("ROOT_TAG")
     item_tag = os.getenv("ITEM_TAG")
@@ -48,7 +187,19 @@ def generate_xsd(
     root_tag: str = "records",
     item_tag: str = "record",
     id_attr: str = "id",
+    sample_rows: int | None = None,
 ) -> str:
+    """Gera o XSD com tipos inferidos a partir de ``sample_rows`` linhas do CSV.
+
+    ``sample_rows`` (ou ``XSD_SAMPLE_ROWS``, 10000 por omissão) a 0 lê o CSV inteiro; só
+    nesse caso há inteiros, decimais e enumerações (colunas com até ``XSD_ENUM_MAX`` valores).
+    """
+    if sample_rows is None:
+        sample_rows = int(os.getenv("XSD_SAMPLE_ROWS", "10000"))
+    enum_max = int(os.getenv("XSD_ENUM_MAX", "20"))
+    profiles = profile_columns(csv_path, sample_rows, enum_max)
+    complete = sample_rows == 0
+
     df = pd.read_csv(csv_path, nrows=1)
     if id_column not in df.columns:
         df[id_column] = [1]
@@ -60,7 +211,7 @@ def generate_xsd(
 
     xsd_start = f'''<?xml version="1.0"?>
 <xs:schema xmlns:xs="http://www.w3.org/2001/XMLSchema">
-  <xs:element name="{root_tag}">
+{NULLABLE_TYPES}  <xs:element name="{root_tag}">
     <xs:complexType>
       <xs:sequence>
         <xs:element name="{item_tag}" minOccurs="0" maxOccurs="unbounded">
@@ -83,9 +234,23 @@ def generate_xsd(
     for col in df.columns:
         if col == id_column:
             continue
-        field_type = python_to_xsd(str(df[col].dtype))
+        field_type = python_to_xsd(profiles.get(col), complete)
         sanitized_name = tag_map[col]
-        xsd_fields += f'              <xs:element name="{sanitized_name}" type="{field_type}" minOccurs="0"/>\n'
+        if isinstance(field_type, list):
+            enumeration = "".join(
+                f'                    <xs:enumeration value={enum_value(v)}/>\n' for v in field_type
+            )
+            xsd_fields += (
+                f'              <xs:element name="{sanitized_name}" minOccurs="0">\n'
+                f'                <xs:simpleType>\n'
+                f'                  <xs:restriction base="xs:string">\n'
+                f'{enumeration}'
+                f'                  </xs:restriction>\n'
+                f'                </xs:simpleType>\n'
+                f'              </xs:element>\n'
+            )
+        else:
+            xsd_fields += f'              <xs:element name="{sanitized_name}" type="{field_type}" minOccurs="0"/>\n'
 
     with open(xsd_path, "w", encoding="utf-8") as f:
         f.write(xsd_start + xsd_fields + xsd_end)
@@ -1,30 +1,617 @@
+import asyncio
+import base64
+import contextlib
 import os
+import re
+import selectors
+import tempfile
 import threading
 import time
+import zlib
 from concurrent import futures
-from xmlrpc.server import SimpleXMLRPCServer
+from xmlrpc.server import SimpleXMLRPCRequestHandler, SimpleXMLRPCServer
 
 import grpc
+import numpy as np
 from lxml import etree
 
 import property_service_pb2 as pb2
+import change_log
+import columnar
+import dataset_registry
+import metrics
+import payload_compression
+import profiling
 import property_service_pb2_grpc as pb2_grpc
+import query_budget
+import schema_creator
+import snapshot_store
+import xml_offsets
+from query_cache import ResultCache, XPathCache
 
 DEFAULT_XMLS = [
     ("house_purchase.xml", "house_purchase.xsd"),
     ("trade_statistics.xml", "trade_statistics.xsd"),
 ]
 
+XPATH_BATCH_SIZE = int(os.getenv("XPATH_BATCH_SIZE", "1000"))
+# resultados por página de execute_xpath_page; a lista avaliada fica na cache de resultados da versão
+# (RESULT_CACHE_MB), e só se for expulsa é que a página seguinte volta a avaliar a query inteira
+XPATH_PAGE_SIZE = int(os.getenv("XPATH_PAGE_SIZE", "1000"))
+FILTER_LIMIT = int(os.getenv("FILTER_LIMIT", "1000"))
+# limites de cada ExecuteXPath/execute_xpath (0 = sem limite): segundos (no gRPC, o menor entre este e o
+# prazo do cliente), número de resultados e MB serializados; acima disso a resposta vem truncada
+XPATH_TIMEOUT = float(os.getenv("XPATH_TIMEOUT", "30"))
+XPATH_MAX_RESULTS = int(os.getenv("XPATH_MAX_RESULTS", "200000"))
+XPATH_MAX_MB = float(os.getenv("XPATH_MAX_MB", "160"))
+# segundos que uma alteração à espera de uma XPath em curso impede novas XPath de começar; depois
+# disso as leituras voltam a entrar e a alteração aplica-se no primeiro intervalo sem leitores
+WRITE_PRIORITY_SECONDS = float(os.getenv("WRITE_PRIORITY_SECONDS", "1"))
+# "threads" (grpc.server com pool de 10 threads) ou "aio" (grpc.aio, um event loop)
+GRPC_MODE = os.getenv("GRPC_MODE", "threads")
+# threads para XPath/serialização/uploads no modo aio
+GRPC_AIO_WORKERS = int(os.getenv("GRPC_AIO_WORKERS", str(min(8, (os.cpu_count() or 1) + 2))))
+# limites altos só são necessários para o UploadData unário (legado); o UploadDataStream não depende deles
+GRPC_OPTIONS = [
+    ("grpc.max_receive_message_length", 200 * 1024 * 1024),
+    ("grpc.max_send_message_length", 200 * 1024 * 1024),
+]
+# no modo aio os pedidos esperam na fila do gRPC até o event loop os aceitar; acima de 1000 pedidos
+# em espera o gRPC cancela os que lá estão há mais de 30 s, o que corta milhares de streams simultâneos
+GRPC_AIO_MAX_PENDING = int(os.getenv("GRPC_AIO_MAX_PENDING", "10000"))
+GRPC_AIO_OPTIONS = GRPC_OPTIONS + [
+    ("grpc.server.max_pending_requests", GRPC_AIO_MAX_PENDING),
+    ("grpc.server.max_pending_requests_hard_limit", GRPC_AIO_MAX_PENDING * 2),
+]
+# compressão das respostas gRPC (none, gzip, deflate); pedidos comprimidos são sempre aceites
+GRPC_COMPRESSION = payload_compression.channel_compression(os.getenv("GRPC_COMPRESSION", "none"))
+# máximo de bytes entregues de cada vez ao parser, antes e depois de descomprimir (o parser incremental
+# recusa blocos de centenas de MB e cada passo da descompressão fica limitado a este tamanho)
+UPLOAD_FEED_SIZE = int(os.getenv("UPLOAD_FEED_SIZE", str(1024 * 1024)))
+# endpoint HTTP /metrics em formato Prometheus (porta 0 desliga); só local por omissão
+METRICS_HOST = os.getenv("METRICS_HOST", "127.0.0.1")
+METRICS_PORT = int(os.getenv("METRICS_PORT", "9100"))
+# segundos entre gravações dos perfis em PROFILE_DIR (ver profiling.py; 0 = só à saída)
+PROFILE_DUMP_INTERVAL = float(os.getenv("PROFILE_DUMP_INTERVAL", "60"))
+# LOW_MEMORY=1: sem árvore em memória, só offsets dos registos no XML (ver xml_offsets.py)
+LOW_MEMORY = os.getenv("LOW_MEMORY", "0") == "1"
+# registos por documento nas XPath do modo de baixa memória
+XPATH_STREAM_BATCH = int(os.getenv("XPATH_STREAM_BATCH", str(xml_offsets.DEFAULT_BATCH)))
+# fsync do registo de alterações a cada UpsertRecords/DeleteRecords (0 = confia na cache do sistema)
+CHANGE_LOG_FSYNC = os.getenv("CHANGE_LOG_FSYNC", "1") == "1"
+# o registo é compactado no XML em segundo plano a partir destes lotes ou MB
+CHANGE_LOG_COMPACT_ENTRIES = int(os.getenv("CHANGE_LOG_COMPACT_ENTRIES", "1000"))
+CHANGE_LOG_COMPACT_MB = float(os.getenv("CHANGE_LOG_COMPACT_MB", "32"))
+# vários datasets com nome: "nome=ficheiro.xml[:ficheiro.xsd],..." (vazio = o XML de XML_PATH e os DEFAULT_XMLS)
+DATASETS = os.getenv("DATASETS", "")
+# dataset dos pedidos sem nome (vazio = o primeiro de DATASETS ou o XML de XML_PATH)
+DEFAULT_DATASET = os.getenv("DEFAULT_DATASET", "")
+# memória estimada para os datasets carregados; acima disso os menos usados são descarregados (0 = sem limite)
+DATASETS_MEMORY_MB = float(os.getenv("DATASETS_MEMORY_MB", "0"))
+# onde os uploads com um nome novo guardam <nome>.xml
+DATASET_DIR = os.getenv("DATASET_DIR", ".")
+# threads do XML-RPC (0 = servidor sequencial antigo, um pedido de cada vez)
+XMLRPC_WORKERS = int(os.getenv("XMLRPC_WORKERS", "10"))
+# segundos que uma ligação keep-alive pode ficar inativa antes de ser fechada
+XMLRPC_IDLE_TIMEOUT = float(os.getenv("XMLRPC_IDLE_TIMEOUT", "15"))
+
+
+NOT_LOADED = "Servidor nao carregado"
+# estimativas de memória para o orçamento dos datasets (medidas com os datasets house/trade de 150 000 registos)
+TREE_BYTES_PER_ELEMENT = 270
+INDEX_BYTES_PER_RECORD = 200
+
+
+def serialize_item(item) -> str:
+    if isinstance(item, etree._Element):
+        return etree.tostring(item, encoding="unicode")
+    return str(item)
+
+
+def serialize_items(items) -> list:
+    with metrics.REGISTRY.stage("serialize"):
+        return [serialize_item(item) for item in items]
+
+
+def serialize_record(prop) -> str:
+    return etree.tostring(prop, encoding="unicode", pretty_print=False, method="xml", with_tail=False)
+
+
+def xpath_budget(context=None) -> query_budget.QueryBudget:
+    timeout = XPATH_TIMEOUT or None
+    remaining = context.time_remaining() if context is not None else None
+    if remaining is not None:
+        timeout = min(timeout, remaining) if timeout else remaining
+    return query_budget.QueryBudget(timeout, XPATH_MAX_RESULTS, int(XPATH_MAX_MB * 1024 * 1024))
+
+
+def _query_tag(query: str) -> int:
+    return zlib.crc32(query.encode("utf-8"))
+
+
+def encode_cursor(offset: int, version: int, query: str) -> str:
+    # o cursor só vale para a mesma query sobre a mesma versão do dataset
+    raw = f"{version}:{_query_tag(query)}:{offset}"
+    return base64.urlsafe_b64encode(raw.encode("ascii")).decode("ascii")
+
+
+def decode_cursor(cursor: str, version: int, query: str) -> int:
+    if not cursor:
+        return 0
+    try:
+        raw = base64.urlsafe_b64decode(cursor.encode("ascii")).decode("ascii")
+        cursor_version, tag, offset = (int(part) for part in raw.split(":"))
+    except ValueError:
+        raise ValueError("cursor inválido") from None
+    if offset < 0 or tag != _query_tag(query):
+        raise ValueError("cursor inválido para esta query")
+    if cursor_version != version:
+        raise ValueError(
+            f"cursor expirado: o dataset mudou da versão {cursor_version} para a {version}; recomece sem cursor"
+        )
+    return offset
+
+
+class ReadWriteLock:
+    """Vários leitores em simultâneo ou um só escritor.
+
+    Protege a árvore lxml partilhada pelos snapshots de um dataset: XPath e serialização de resultados
+    largam o GIL enquanto percorrem a árvore, pelo que as alterações no lugar têm de esperar que
+    terminem. As pesquisas por ID não o usam (ver Snapshot.record_text). Um escritor à espera só
+    barra leitores novos durante ``priority`` segundos: uma XPath lenta em curso não congela as
+    restantes leituras até ao fim do seu prazo, à custa de a alteração poder esperar mais.
+    """
+
+    def __init__(self, priority: float = WRITE_PRIORITY_SECONDS):
+        self.priority = priority
+        self._cond = threading.Condition()
+        self._readers = 0
+        self._writing = False
+        self._waiting = 0
+
+    @contextlib.contextmanager
+    def read(self):
+        with self._cond:
+            while self._writing or self._waiting:
+                self._cond.wait()
+            self._readers += 1
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._readers -= 1
+                if not self._readers:
+                    self._cond.notify_all()
+
+    @contextlib.contextmanager
+    def write(self):
+        with self._cond:
+            self._waiting += 1
+            deadline = time.monotonic() + self.priority
+            waiting = True
+            while self._writing or self._readers:
+                remaining = deadline - time.monotonic()
+                if waiting and remaining <= 0:
+                    # fim da prioridade: os leitores à espera entram e o escritor espera como os outros
+                    waiting = False
+                    self._waiting -= 1
+                    self._cond.notify_all()
+                self._cond.wait(remaining if waiting else None)
+            if waiting:
+                self._waiting -= 1
+            self._writing = True
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._writing = False
+                self._cond.notify_all()
+
+
+class Snapshot:
+    """Dataset carregado: documento, índice por ID e colunas, construídos antes de serem publicados.
+
+    Depois de publicado não é alterado (à exceção das ordenações por campo, calculadas na primeira
+    pesquisa por intervalo); cada pedido lê um único snapshot do início ao fim. Um snapshot aberto a
+    partir do disco (``stored``) serve registos e colunas do ficheiro mapeado e só lê a árvore XML
+    na primeira XPath. No modo de baixa memória (``offsets``) não há árvore nem colunas: os registos
+    são fatias do XML mapeado e as XPath percorrem o ficheiro lote a lote.
+
+    UpsertRecords/DeleteRecords publicam um snapshot novo que partilha a árvore com o anterior: a
+    árvore é alterada no lugar sob ``lock`` (também usado por XPath e serialização), e índice,
+    registos e colunas são cópias com as linhas alteradas. XPath de pedidos ainda sobre o snapshot
+    anterior já veem a árvore nova; as pesquisas por ID, filtros e agregações não.
+    """
+
+    def __init__(
+        self,
+        version=0,
+        tree=None,
+        item_tag=None,
+        id_attr=None,
+        field_types=None,
+        xpath_cache=None,
+        result_cache=None,
+        stored=None,
+        offsets=None,
+        status=NOT_LOADED,
+    ):
+        self.version = version
+        # motivo devolvido pelos pedidos enquanto não há dados (servidor à espera do XML, dataset desconhecido)
+        self.status = status
+        self._tree = tree
+        self._tree_lock = threading.Lock()
+        self.lock = ReadWriteLock()
+        self.stored = stored
+        self.offsets = offsets
+        self.loaded = tree is not None or stored is not None or offsets is not None
+        self.item_tag = item_tag
+        self.id_attr = id_attr
+        self.field_types = field_types or {}
+        self.xpath_cache = xpath_cache
+        self.result_cache = result_cache
+        self.index = {}
+        self.count = 0
+        self.records = []
+        self.columns = None
+        self.numeric_index = {}
+        if tree is not None:
+            self._infer_tags()
+            records = list(self.root.iter(self.item_tag))
+            ids = [prop.get(self.id_attr) for prop in records]
+            self._build_index(records, ids, columnar.ColumnarStore.from_records(records, ids, self.field_types))
+        elif stored is not None:
+            self.item_tag, self.id_attr, self.field_types = stored.item_tag, stored.id_attr, stored.field_types
+            records = snapshot_store.StoredRecords(stored)
+            self._build_index(
+                records, stored.ids, columnar.ColumnarStore(records, stored.ids, stored.columns(), stored.column_stats)
+            )
+        elif offsets is not None:
+            self.item_tag, self.id_attr = offsets.item_tag, offsets.id_attr
+            self._build_index(offsets, offsets.ids, None)
+
+    @property
+    def tree(self):
+        if self._tree is None and self.stored is not None:
+            with self._tree_lock:
+                if self._tree is None:
+                    self._tree = self.stored.parse_source()
+        return self._tree
+
+    @property
+    def root(self):
+        tree = self.tree
+        return tree.getroot() if tree is not None else None
+
+    def memory_bytes(self) -> int:
+        """Memória estimada deste snapshot: árvore lxml (por elemento), índice por ID e colunas."""
+        if not self.loaded:
+            return 0
+        total = self.count * INDEX_BYTES_PER_RECORD
+        if self.columns is not None:
+            total += sum(column.nbytes for column in self.columns.columns.values())
+        if self._tree is not None or self.stored is not None:
+            # um elemento por registo e um por campo (no snapshot em disco a árvore é lida em segundo plano)
+            fields = len(self.columns.columns) if self.columns is not None else 0
+            total += self.count * (1 + fields) * TREE_BYTES_PER_ELEMENT
+        if self.offsets is not None:
+            total += self.offsets.starts.nbytes + self.offsets.ends.nbytes
+        return total
+
+    @property
+    def column_stats(self) -> dict:
+        if self.columns is None:
+            return {}
+        types = self.field_types
+        return {tag: {**stats, "type": types.get(tag, "string")} for tag, stats in self.columns.stats.items()}
+
+    def peek(self, kind: str, key):
+        return self.result_cache.get((self.version, kind, key))
+
+    def cached(self, kind: str, key, compute):
+        # a chave leva a versão deste snapshot: um resultado calculado sobre dados antigos nunca
+        # fica guardado para os novos (o ResultCache rejeita versões que já não são a atual)
+        cache_key = (self.version, kind, key)
+        value = self.result_cache.get(cache_key)
+        if value is None:
+            value = compute()
+            self.result_cache.put(cache_key, value)
+        return value
+
+    def evaluate(self, query: str):
+        if self.offsets is not None:
+            return self._evaluate_streaming(query)
+        root = self.root
+        with self.lock.read(), metrics.REGISTRY.stage("xpath"):
+            return self.xpath_cache.evaluate(root, query)
+
+    def serialize_items(self, items) -> list:
+        # os resultados de evaluate são nós da árvore partilhada: serializados sob o lock de leitura
+        with self.lock.read():
+            return serialize_items(items)
+
+    def _evaluate_streaming(self, query: str):
+        results = []
+        for batch in self._streaming_batches(query, query_budget.QueryBudget()):
+            results.extend(batch)
+        return results
+
+    def _streaming_batches(self, query: str, budget: query_budget.QueryBudget):
+        # cada lote é um documento pequeno com a raiz original; os resultados são serializados antes
+        # de passar ao lote seguinte para que nenhum fique preso à árvore do lote
+        unsupported = xml_offsets.batch_unsupported(query)
+        if unsupported:
+            raise etree.XPathEvalError(f"{unsupported} não são suportados no modo de baixa memória")
+        for document in self.offsets.iter_documents(XPATH_STREAM_BATCH):
+            if budget.expired():
+                return
+            batch = etree.fromstring(document)
+            with metrics.REGISTRY.stage("xpath"):
+                res = self.xpath_cache.evaluate(batch, query)
+            if not isinstance(res, list):
+                raise etree.XPathEvalError(
+                    "expressões escalares (count(), sum(), ...) não são suportadas no modo de baixa memória"
+                )
+            results = budget.take(res, serialize_items)
+            if results:
+                yield results
+            if budget.truncated:
+                return
+
+    def xpath_batches(self, query: str, budget: query_budget.QueryBudget, batch_size: int = XPATH_BATCH_SIZE):
+        """Resultados serializados em listas de até ``batch_size`` (uma string para expressões escalares).
+
+        Para quando ``budget`` se esgota, com o motivo em ``budget.reason``; um resultado já em cache é
+        só fatiado.
+        """
+        cached = self.peek("xpath", query)
+        if cached is None:
+            if budget.expired():
+                return
+            if self.offsets is not None:
+                yield from self._streaming_batches(query, budget)
+                return
+            res = self.evaluate(query)
+            serialize = self.serialize_items
+        else:
+            res, serialize = cached, None
+        if not isinstance(res, list):
+            yield str(res)
+            return
+        for start in range(0, len(res), batch_size):
+            results = budget.take(res[start : start + batch_size], serialize)
+            if results:
+                yield results
+            if budget.truncated:
+                return
+
+    def xpath_results(self, query: str, budget: query_budget.QueryBudget | None = None):
+        # lista de resultados serializados, ou uma string para expressões escalares (count(), ...);
+        # só um resultado completo fica em cache
+        budget = budget or query_budget.QueryBudget()
+        results = []
+        for batch in self.xpath_batches(query, budget):
+            if isinstance(batch, str):
+                return self.cached("xpath", query, lambda: batch)
+            results.extend(batch)
+        if not budget.truncated:
+            self.cached("xpath", query, lambda: results)
+        return results
+
+    def record_text(self, pos: int) -> str:
+        # do snapshot em disco o registo já vem serializado; da árvore é serializado agora
+        if self.stored is not None:
+            return self.stored.record_text(pos)
+        if self.offsets is not None:
+            return self.offsets.record_text(pos)
+        # sem o lock: with_changes nunca altera o conteúdo de um registo, só o troca ou desliga da raiz,
+        # e um registo desligado continua vivo na lista deste snapshot. Uma pesquisa por ID não fica à
+        # espera de uma alteração, que por sua vez pode estar à espera de uma XPath lenta
+        return serialize_record(self.records[pos])
+
+    def record_xml(self, record_id: str):
+        def compute():
+            pos = self.index.get(record_id)
+            if pos is None:
+                return ""
+            with metrics.REGISTRY.stage("serialize"):
+                return self.record_text(pos)
+
+        return self.cached("record", record_id, compute) or None
+
+    def records_xml(self, ids):
+        # resolução em bloco: um acesso ao índice por ID, sem passar pela cache de resultados
+        index = self.index
+        with metrics.REGISTRY.stage("serialize"):
+            return [self.record_text(pos) if (pos := index.get(record_id)) is not None else None for record_id in ids]
+
+    def find_range(self, field: str, low=None, high=None, limit: int = 0):
+        # pesquisa binária sobre os valores numéricos ordenados, em vez de comparar texto registo a registo
+        if field not in self.numeric_index:
+            self._require_columns()
+            if not self.columns.is_numeric(field):
+                raise KeyError(f"campo '{field}' não é numérico")
+            # ordenação feita na primeira pesquisa ao campo: valores float64 + posição do registo
+            values = self.columns.columns[field]
+            order = np.argsort(values, kind="stable")
+            order = order[~np.isnan(values[order])]
+            self.numeric_index[field] = (values[order], order)
+        values, order = self.numeric_index[field]
+        start = 0 if low is None else np.searchsorted(values, low, side="left")
+        end = len(values) if high is None else np.searchsorted(values, high, side="right")
+        positions = order[start:end]
+        if limit > 0:
+            positions = positions[:limit]
+        with metrics.REGISTRY.stage("serialize"):
+            return [self.record_text(pos) for pos in positions]
+
+    def filter_records(self, predicates, fields=(), limit: int = 0, offset: int = 0):
+        self._require_columns()
+        return self.columns.filter(predicates, fields, limit if limit > 0 else FILTER_LIMIT, offset)
+
+    def aggregate(self, group_by=(), aggregations=(), predicates=()):
+        # poucas linhas de resumo por pedido: guardadas na cache de resultados da versão atual
+        self._require_columns()
+        key = (tuple(group_by), tuple(aggregations), tuple((f, op, tuple(v)) for f, op, v in predicates))
+        return self.cached("aggregate", key, lambda: self.columns.aggregate(group_by, aggregations, predicates))
+
+    def _require_columns(self):
+        if self.columns is None:
+            raise KeyError("filtros, intervalos e agregações não estão disponíveis no modo de baixa memória")
+
+    def with_changes(self, version, upserts=(), deletes=()):
+        """Snapshot seguinte com ``upserts`` (elementos de registo) e ``deletes`` (IDs) aplicados.
+
+        Cada registo substitui o que tem o mesmo ID ou é acrescentado no fim; as remoções são feitas
+        depois. Só as linhas alteradas são convertidas para as colunas; as remoções deslocam as
+        posições seguintes e refazem o índice. Devolve ``(snapshot, resumo)``.
+        """
+        if self.offsets is not None:
+            raise ValueError("alterações de registos não estão disponíveis no modo de baixa memória")
+        root = self.root
+        # de um snapshot em disco passa-se à árvore: registos pela mesma ordem dos IDs e colunas guardados
+        records = list(self.records) if self.stored is None else list(root.iter(self.item_tag))
+        ids = list(self.columns.ids)
+        index = dict(self.index)
+        rows = {}
+        removed = []
+        summary = {"inserted": 0, "updated": 0, "deleted": 0, "not_found": []}
+        with self.lock.write():
+            for record in upserts:
+                record_id = record.get(self.id_attr)
+                pos = index.get(record_id)
+                if pos is None:
+                    # a seguir ao último registo, com o mesmo espaçamento
+                    last = records[-1] if records else None
+                    record.tail = last.tail if last is not None else None
+                    (last.getparent() if last is not None else root).append(record)
+                    pos = index[record_id] = len(records)
+                    records.append(record)
+                    ids.append(record_id)
+                    summary["inserted"] += 1
+                else:
+                    old = records[pos]
+                    record.tail = old.tail
+                    old.getparent().replace(old, record)
+                    records[pos] = record
+                    summary["updated"] += 1
+                rows[pos] = columnar.record_texts(record)
+            for record_id in deletes:
+                pos = index.pop(record_id, None)
+                if pos is None:
+                    summary["not_found"].append(record_id)
+                    continue
+                old = records[pos]
+                old.getparent().remove(old)
+                removed.append(pos)
+        keep = None
+        if removed:
+            keep = np.ones(len(records), dtype=bool)
+            keep[removed] = False
+            records = [record for record, kept in zip(records, keep) if kept]
+            ids = [record_id for record_id, kept in zip(ids, keep) if kept]
+            index = None
+            summary["deleted"] = len(removed)
+
+        snap = Snapshot(
+            version, None, self.item_tag, self.id_attr, self.field_types, self.xpath_cache, self.result_cache
+        )
+        snap._tree = self.tree
+        snap.lock = self.lock
+        snap.loaded = True
+        snap._build_index(records, ids, self.columns.with_rows(records, ids, rows, keep, self.field_types), index)
+        return snap, summary
+
+    def _build_index(self, records, ids, store, index=None):
+        # dicionário id -> posição do registo para pesquisas O(1) por ID (a primeira ocorrência prevalece)
+        if index is None:
+            index = dict(zip(reversed(ids), range(len(ids) - 1, -1, -1)))
+            index.pop(None, None)
+        self.index = index
+        self.records = records
+        self.count = len(records)
+        self.columns = store
+
+    def _infer_tags(self):
+        # tenta inferir item_tag e id_attr a partir do primeiro elemento
+        if len(self.root):
+            first = self.root[0]
+            self.item_tag = self.item_tag or first.tag
+            if first.attrib:
+                self.id_attr = self.id_attr or list(first.attrib.keys())[0]
+        # fallback para env/defaults
+        self.item_tag = self.item_tag or os.getenv("ITEM_TAG", "record")
+        self.id_attr = self.id_attr or os.getenv("ID_ATTR", "id")
+
 
 class SharedState:
-    def __init__(self):
-        self.tree = None
-        self.root = None
-        self.item_tag = None
-        self.id_attr = None
-        self.xml_path, self.xsd_path = self._resolve_paths()
-
-    def _resolve_paths(self):
+    """Um dataset: XML/XSD em disco, snapshot publicado, caches e registo de alterações.
+
+    Sem caminhos, usa XML_PATH/XSD_PATH ou o primeiro XML conhecido (um só dataset, como antes);
+    com caminhos (datasets do DatasetRegistry) os ficheiros auxiliares ficam ao lado do XML.
+    """
+
+    def __init__(self, xml_path=None, xsd_path=None):
+        self.xpath_cache = XPathCache()
+        self.result_cache = ResultCache()
+        # só quem publica um dataset novo usa o lock; os leitores leem self.snapshot sem sincronização
+        self._publish_lock = threading.Lock()
+        self._load_lock = threading.Lock()
+        self.snapshot = Snapshot(xpath_cache=self.xpath_cache, result_cache=self.result_cache)
+        named = xml_path is not None
+        self.xml_path, self.xsd_path = (xml_path, xsd_path) if named else self._resolve_paths()
+        # snapshot binário para arranques rápidos ("" desliga)
+        self.snapshot_path = self._sidecar_path("SNAPSHOT_PATH", ".snapshot", named)
+        self._save_lock = threading.Lock()
+        # snapshot publicado a partir do XML que está em disco (só esse pode ser gravado em snapshot_path)
+        self._source_snap = None
+        self.low_memory = LOW_MEMORY
+        # serializa quem altera o dataset ou o XML em disco: uploads, UpsertRecords/DeleteRecords e compactação
+        self._write_lock = threading.Lock()
+        self._compact_lock = threading.Lock()
+        # registo das alterações ainda não compactadas no XML ("" desliga: ficam só em memória)
+        change_log_path = self._sidecar_path("CHANGE_LOG_PATH", ".changes", named)
+        self.change_log = change_log.ChangeLog(change_log_path, CHANGE_LOG_FSYNC) if change_log_path else None
+
+    def _sidecar_path(self, variable: str, suffix: str, named: bool) -> str:
+        # com vários datasets a variável só serve para desligar ("") e cada um usa <xml><suffix>
+        value = os.getenv(variable)
+        if value is None or (named and value):
+            return f"{self.xml_path}{suffix}"
+        return value
+
+    def ensure_loaded(self) -> Snapshot:
+        """Lê o dataset no primeiro pedido (ou depois de descarregado).
+
+        Pedidos simultâneos esperam pela mesma leitura.
+        """
+        if self.snapshot.loaded:
+            return self.snapshot
+        with self._load_lock:
+            if not self.snapshot.loaded and os.path.exists(self.xml_path):
+                start = time.perf_counter()
+                try:
+                    self.load_from_files()
+                    print(f"Dataset {self.xml_path} carregado ({time.perf_counter() - start:.1f}s)")
+                except Exception as exc:
+                    print(f"Erro ao carregar {self.xml_path}: {exc}")
+        return self.snapshot
+
+    def unload(self):
+        """Liberta o dataset da memória; o próximo pedido volta a lê-lo (do snapshot binário, se existir).
+
+        As alterações ainda não compactadas continuam no registo e são reaplicadas nessa leitura.
+        """
+        with self._write_lock:
+
+            def build(version, current):
+                return Snapshot(version, xpath_cache=self.xpath_cache, result_cache=self.result_cache)
+
+            self._publish(build)
+            self.xpath_cache.clear()
+
+    @staticmethod
+    def _resolve_paths():
         # se envs definidos, respeita-os
         if os.getenv("XML_PATH"):
             return os.getenv("XML_PATH"), os.getenv("XSD_PATH", "house_purchase.xsd")
@@ -41,168 +628,1157 @@ class SharedState:
         return "house_purchase.xml", "house_purchase.xsd"
 
     def load_from_files(self):
-        self.tree = etree.parse(self.xml_path)
-        self.root = self.tree.getroot()
-        self._infer_tags()
-        return True
+        if self.low_memory:
+            return self.load_offsets()
+        # arranque rápido: se houver um snapshot do mesmo XML, é mapeado em memória sem reler o documento
+        stored = snapshot_store.load(self.snapshot_path, self.xml_path) if self.snapshot_path else None
+        if stored is not None:
 
-    def _infer_tags(self):
-        # tenta inferir item_tag e id_attr a partir do primeiro elemento
-        if self.root is not None and len(self.root):
-            first = self.root[0]
-            self.item_tag = self.item_tag or first.tag
-            if first.attrib:
-                self.id_attr = self.id_attr or list(first.attrib.keys())[0]
-        # fallback para env/defaults
-        self.item_tag = self.item_tag or os.getenv("ITEM_TAG", "record")
-        self.id_attr = self.id_attr or os.getenv("ID_ATTR", "id")
+            def build(version, current):
+                return Snapshot(version, xpath_cache=self.xpath_cache, result_cache=self.result_cache, stored=stored)
+
+            snap = self._publish(build)
+            # pesquisas por ID, filtros e agregações já respondem; a árvore para XPath é lida em segundo plano
+            threading.Thread(target=lambda: snap.tree, daemon=True).start()
+        else:
+            # assinatura tirada antes de ler: um XML substituído durante a leitura não fica com ela
+            source = snapshot_store.source_signature(self.xml_path)
+            self._save_snapshot(self.set_tree(etree.parse(self.xml_path)), source)
+        self._replay_changes()
+        return self.snapshot
+
+    def load_offsets(self):
+        # uma passagem sobre o XML mapeado em memória; a árvore nunca é construída
+        current = self.snapshot
+        offsets = xml_offsets.OffsetIndex.build(self.xml_path, current.item_tag, current.id_attr)
+
+        def build(version, current):
+            return Snapshot(version, xpath_cache=self.xpath_cache, result_cache=self.result_cache, offsets=offsets)
+
+        return self._publish(build)
+
+    def new_parser(self):
+        # no modo de baixa memória os uploads só verificam se o XML está bem formado
+        if self.low_memory:
+            return etree.XMLParser(target=xml_offsets.WellFormedOnly())
+        return etree.XMLParser()
+
+    def load_uploaded(self, root):
+        """Publica o documento acabado de gravar em xml_path (``root`` é None no modo de baixa memória)."""
+        if self.low_memory:
+            return self.load_offsets()
+        return self.set_tree(root.getroottree())
+
+    def install_upload(self, part_path: str, xsd_data: str, root):
+        """Troca o XML (e o XSD, se veio no upload) pelo ficheiro recebido e publica o documento novo."""
+        with self._write_lock:
+            # as alterações registadas eram sobre o XML anterior
+            if self.change_log is not None:
+                self.change_log.clear()
+            os.replace(part_path, self.xml_path)
+            source = snapshot_store.source_signature(self.xml_path)
+            if xsd_data:
+                with open(self.xsd_path, "w", encoding="utf-8") as f:
+                    f.write(xsd_data)
+            snap = self.load_uploaded(root)
+            if snap.offsets is None:
+                self._save_snapshot(snap, source)
+            return snap
+
+    def apply_changes(self, records_xml=(), delete_ids=()) -> dict:
+        """UpsertRecords/DeleteRecords: grava o lote no registo de alterações, aplica-o e publica a versão nova.
+
+        Devolve {"inserted", "updated", "deleted", "not_found", "version"}; um ValueError recusa o
+        lote inteiro antes de qualquer alteração.
+        """
+        with self._write_lock:
+            snap = self.snapshot
+            if not snap.loaded:
+                raise ValueError(snap.status)
+            if snap.offsets is not None:
+                raise ValueError("alterações de registos não estão disponíveis no modo de baixa memória")
+            # um snapshot em disco lê aqui a árvore: se falhar, o lote ainda não ficou registado
+            if snap.tree is None:
+                raise ValueError(snap.status)
+            upserts = [self._parse_record(snap, text, pos) for pos, text in enumerate(records_xml)]
+            entry = {}
+            if upserts:
+                # guardados já normalizados (sem declaração XML nem espaços à volta)
+                entry["upsert"] = [serialize_record(record) for record in upserts]
+            if delete_ids:
+                entry["delete"] = list(delete_ids)
+            if not entry:
+                return {"inserted": 0, "updated": 0, "deleted": 0, "not_found": [], "version": snap.version}
+            if self.change_log is not None:
+                self.change_log.append(entry)
+            summary = self._publish_changes(upserts, delete_ids)
+        log = self.change_log
+        if log is not None and (
+            log.entries >= CHANGE_LOG_COMPACT_ENTRIES or log.size >= CHANGE_LOG_COMPACT_MB * 1024 * 1024
+        ):
+            self.compact_in_background()
+        return summary
+
+    @staticmethod
+    def _parse_record(snap: Snapshot, text: str, pos: int):
+        try:
+            record = etree.fromstring(text.encode("utf-8"))
+        except etree.XMLSyntaxError as exc:
+            raise ValueError(f"registo {pos}: XML inválido ({exc})") from None
+        if record.tag != snap.item_tag:
+            raise ValueError(f"registo {pos}: esperado <{snap.item_tag}>, recebido <{record.tag}>")
+        if record.get(snap.id_attr) is None:
+            raise ValueError(f"registo {pos}: falta o atributo {snap.id_attr}")
+        return record
+
+    def _publish_changes(self, upserts, delete_ids) -> dict:
+        summary = {}
+
+        def build(version, current):
+            snap, changes = current.with_changes(version, upserts, delete_ids)
+            summary.update(changes, version=version)
+            return snap
+
+        self._publish(build)
+        return summary
+
+    def _replay_changes(self):
+        # alterações ainda não compactadas: reaplicadas num só lote com o efeito final de cada ID
+        if self.change_log is None:
+            return
+        entries = self.change_log.read()
+        if not entries:
+            return
+        if self.snapshot.offsets is not None:
+            print(f"Aviso: {len(entries)} lotes em {self.change_log.path} ignorados no modo de baixa memória")
+            return
+        final = {}
+        for entry in entries:
+            for text in entry.get("upsert", ()):
+                record = etree.fromstring(text.encode("utf-8"))
+                record_id = record.get(self.snapshot.id_attr)
+                # os registos novos ficam pela ordem da última alteração
+                final.pop(record_id, None)
+                final[record_id] = record
+            for record_id in entry.get("delete", ()):
+                final[record_id] = None
+        with self._write_lock:
+            self._publish_changes(
+                [record for record in final.values() if record is not None],
+                [record_id for record_id, record in final.items() if record is None],
+            )
+        print(f"{len(entries)} lotes de alterações reaplicados a partir de {self.change_log.path}")
+        self.compact_in_background()
+
+    def compact_in_background(self):
+        # uma compactação de cada vez; pedidos entretanto ficam para a próxima
+        if not self._compact_lock.acquire(blocking=False):
+            return
+
+        def run():
+            try:
+                self.compact()
+            except OSError as exc:
+                print(f"Erro ao compactar as alterações em {self.xml_path}: {exc}")
+            finally:
+                self._compact_lock.release()
+
+        threading.Thread(target=run, daemon=True, name="change-log-compact").start()
+
+    def compact(self):
+        """Grava o dataset atual no XML (ficheiro temporário + substituição atómica) e esvazia o registo.
+
+        Enquanto o documento é escrito as alterações e os uploads esperam; as leituras não.
+        """
+        with self._write_lock:
+            snap = self.snapshot
+            log = self.change_log
+            if log is None or not log.entries or snap.offsets is not None:
+                return
+            start = time.perf_counter()
+            tmp_path = f"{self.xml_path}.compact"
+            with open(tmp_path, "wb") as f:
+                snap.tree.write(f, encoding="UTF-8", xml_declaration=True)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.xml_path)
+            source = snapshot_store.source_signature(self.xml_path)
+            entries = log.entries
+            log.clear()
+            # o snapshot binário do XML anterior deixou de valer
+            self._save_snapshot(snap, source)
+        print(f"{entries} lotes de alterações compactados em {self.xml_path} ({time.perf_counter() - start:.1f}s)")
+
+    def set_tree(self, tree):
+        field_types = self._load_field_types()
+
+        def build(version, current):
+            return Snapshot(
+                version, tree, current.item_tag, current.id_attr, field_types, self.xpath_cache, self.result_cache
+            )
+
+        return self._publish(build)
+
+    def _publish(self, build):
+        # índice e colunas são construídos num snapshot novo, fora da vista dos leitores; a publicação
+        # é uma única atribuição e os pedidos em curso terminam sobre o snapshot anterior
+        with self._publish_lock:
+            snap = build(self.snapshot.version + 1, self.snapshot)
+            self.snapshot = snap
+            self.result_cache.reset(snap.version)
+        return snap
+
+    def _save_snapshot(self, snap: Snapshot, source: dict):
+        """Grava ``snap``, acabado de ler do XML com a assinatura ``source``, em snapshot_path.
+
+        Escrito numa thread à parte para não atrasar a resposta ao upload. As alterações publicadas
+        depois não o invalidam (os registos de ``snap`` continuam a ser os do XML e o registo de
+        alterações é reaplicado na leitura); um upload ou compactação entretanto, sim.
+        """
+        self._source_snap = snap
+        if not self.snapshot_path:
+            return
+
+        def save():
+            with self._save_lock:
+                if self._source_snap is not snap:
+                    return
+                try:
+                    start = time.perf_counter()
+                    with contextlib.ExitStack() as stack:
+
+                        def still_current():
+                            # _write_lock fica com esta thread até ao os.replace: nenhum upload ou
+                            # compactação troca o XML entre a verificação e a substituição
+                            stack.enter_context(self._write_lock)
+                            return self._source_snap is snap
+
+                        written = snapshot_store.write(self.snapshot_path, source, snap, still_current)
+                    if written:
+                        print(f"Snapshot escrito em {self.snapshot_path} ({time.perf_counter() - start:.1f}s)")
+                except OSError as exc:
+                    print(f"Erro ao escrever o snapshot {self.snapshot_path}: {exc}")
+
+        threading.Thread(target=save, daemon=True).start()
+
+    def _load_field_types(self):
+        # tipos inferidos pelo schema_creator; sem XSD (ou com um XSD antigo) tudo é texto
+        try:
+            return schema_creator.read_field_types(self.xsd_path)
+        except (OSError, etree.XMLSyntaxError):
+            return {}
+
+
+class StreamUpload:
+    """Estado de um upload: cada bloco é descomprimido, escrito em disco e entregue ao parser
+    incremental à medida que chega; o ficheiro final só substitui o anterior quando o documento
+    inteiro é válido. O dataset de destino vem do primeiro bloco (ou do pedido unário) e é criado se
+    o nome ainda não existir."""
+
+    def __init__(self, datasets: dataset_registry.DatasetRegistry, name: str = "UploadDataStream"):
+        self.datasets = datasets
+        self.name = name
+        self.state = None
+        self.dataset = ""
+        self.part_path = None
+        self.parser = None
+        self.file = None
+        self.decompressor = None
+        self.xsd_data = ""
+        self.received = 0
+        self.size = 0
+
+    def open(self, dataset: str):
+        # o dataset antigo não é lido só para ser substituído
+        self.state = self.datasets.get(dataset, load=False, create=True)
+        self.dataset = dataset
+        # um ficheiro temporário por upload, ao lado do XML (o os.replace final não muda de disco):
+        # dois uploads simultâneos para o mesmo dataset não escrevem no mesmo ficheiro
+        directory, base = os.path.split(os.path.abspath(self.state.xml_path))
+        fd, self.part_path = tempfile.mkstemp(prefix=f"{base}.", suffix=".part", dir=directory)
+        # o mkstemp cria o ficheiro só para o dono; o XML instalado fica legível como antes
+        os.chmod(self.part_path, 0o644)
+        self.file = os.fdopen(fd, "wb")
+        self.parser = self.state.new_parser()
+
+    def add(self, chunk):
+        if self.state is None:
+            self.open(chunk.dataset)
+        # a compressão é declarada no primeiro bloco, tal como o XSD
+        if chunk.xsd_data:
+            self.xsd_data = chunk.xsd_data
+        if chunk.compression and self.received == 0:
+            self.decompressor = payload_compression.Decompressor(chunk.compression)
+        self.feed(chunk.xml_chunk)
+
+    def feed(self, data):
+        if not data:
+            return
+        self.received += len(data)
+        if self.decompressor is not None:
+            for piece in self.decompressor.feed(data, UPLOAD_FEED_SIZE):
+                self._write(piece)
+            return
+        view = memoryview(data)
+        for start in range(0, len(view), UPLOAD_FEED_SIZE):
+            self._write(bytes(view[start : start + UPLOAD_FEED_SIZE]))
+
+    def _write(self, data: bytes):
+        if not data:
+            return
+        self.file.write(data)
+        self.parser.feed(data)
+        self.size += len(data)
+
+    def finish(self) -> pb2.UploadResponse:
+        if self.decompressor is not None:
+            self._write(self.decompressor.close())
+        if not self.size:
+            raise ValueError("upload sem XML")
+        root = self.parser.close()
+        self.file.close()
+        snap = self.state.install_upload(self.part_path, self.xsd_data, root)
+        self.datasets.enforce_budget(keep=self.dataset or self.datasets.default)
+        print(
+            f"{self.name}: {self.received} bytes recebidos ({self.size} descomprimidos) e carregados em memória. "
+            f"item_tag={snap.item_tag}, id_attr={snap.id_attr}, xml={self.state.xml_path}"
+        )
+        return pb2.UploadResponse(
+            ok=True, message=f"XML recebido ({self.received} bytes) e guardado em {self.state.xml_path}."
+        )
+
+    def fail(self, exc) -> pb2.UploadResponse:
+        print(f"Erro em {self.name}: {exc}")
+        if self.file is not None:
+            self.file.close()
+        if self.part_path and os.path.exists(self.part_path):
+            os.remove(self.part_path)
+        return pb2.UploadResponse(ok=False, message=str(exc))
+
+
+def records_response(snap: Snapshot, ids) -> pb2.RecordsResponse:
+    return pb2.RecordsResponse(
+        records=[
+            pb2.RecordResult(id=record_id, found=xml is not None, record_xml=xml or "")
+            for record_id, xml in zip(ids, snap.records_xml(ids))
+        ]
+    )
+
+
+def describe_datasets(datasets: dataset_registry.DatasetRegistry) -> list:
+    infos = []
+    for name, state in datasets.describe():
+        snap = state.snapshot if state is not None else None
+        infos.append(
+            {
+                "name": name,
+                "xml_path": state.xml_path if state is not None else datasets.paths[name][0],
+                "loaded": bool(snap and snap.loaded),
+                "record_count": snap.count if snap else 0,
+                "memory_bytes": snap.memory_bytes() if snap else 0,
+                "is_default": name == datasets.default,
+            }
+        )
+    return infos
+
+
+def dataset_snapshot(datasets: dataset_registry.DatasetRegistry, name: str) -> Snapshot:
+    # snapshot atual do dataset pedido, lido do disco no primeiro uso; um nome desconhecido dá um
+    # snapshot vazio cujo status explica o erro
+    state = datasets.get(name)
+    if state is None:
+        return Snapshot(xpath_cache=XPathCache(0), result_cache=ResultCache(0), status=f"Dataset '{name}' desconhecido")
+    return state.snapshot
+
+
+def change_response(datasets, name: str, records_xml=(), ids=()) -> pb2.ChangeResponse:
+    state = datasets.get(name)
+    if state is None:
+        return pb2.ChangeResponse(error=f"Dataset '{name}' desconhecido")
+    try:
+        return pb2.ChangeResponse(**state.apply_changes(records_xml, ids))
+    except ValueError as exc:
+        return pb2.ChangeResponse(error=str(exc))
+    except Exception as exc:
+        print(f"Erro ao alterar registos: {exc}")
+        return pb2.ChangeResponse(error=f"Erro desconhecido: {exc}")
 
 
 class PropertyServicer(pb2_grpc.PropertyServiceServicer):
-    def __init__(self, state: SharedState):
-        self.state = state
+    def __init__(self, datasets: dataset_registry.DatasetRegistry):
+        self.datasets = datasets
 
     def UploadData(self, request, context):
+        # o documento é lido e indexado ao lado do snapshot atual; se falhar, os leitores não dão por nada
+        upload = StreamUpload(self.datasets, "UploadData")
         try:
-            with open(self.state.xml_path, "w", encoding="utf-8") as f:
-                f.write(request.xml_data)
-            if request.xsd_data:
-                with open(self.state.xsd_path, "w", encoding="utf-8") as f:
-                    f.write(request.xsd_data)
-            self.state.tree = etree.fromstring(request.xml_data.encode("utf-8")).getroottree()
-            self.state.root = self.state.tree.getroot()
-            self.state._infer_tags()
-            print(
-                f"UploadData: XML carregado em memória. "
-                f"item_tag={self.state.item_tag}, id_attr={self.state.id_attr}, xml={self.state.xml_path}"
-            )
-            return pb2.UploadResponse(ok=True, message=f"XML recebido e guardado em {self.state.xml_path}.")
+            upload.open(request.dataset)
+            upload.xsd_data = request.xsd_data
+            if request.xml_payload:
+                # bytes do pedido entregues ao parser sem cópias do documento inteiro
+                if request.compression:
+                    upload.decompressor = payload_compression.Decompressor(request.compression)
+                payload = request.xml_payload
+            else:
+                payload = request.xml_data.encode("utf-8")
+            view = memoryview(payload)
+            for start in range(0, len(view), UPLOAD_FEED_SIZE):
+                upload.feed(view[start : start + UPLOAD_FEED_SIZE])
+            return upload.finish()
+        except Exception as exc:
+            return upload.fail(exc)
+
+    def UploadDataStream(self, request_iterator, context):
+        upload = StreamUpload(self.datasets)
+        try:
+            for chunk in request_iterator:
+                upload.add(chunk)
+            return upload.finish()
         except Exception as exc:
-            print(f"Erro em UploadData: {exc}")
-            self.state.tree = None
-            self.state.root = None
-            return pb2.UploadResponse(ok=False, message=str(exc))
+            return upload.fail(exc)
 
     def CountRecords(self, request, context):
-        if self.state.root is None:
+        snap = dataset_snapshot(self.datasets, request.dataset)
+        if not snap.loaded:
             return pb2.CountResponse(count=0)
+        return pb2.CountResponse(count=snap.count)
+
+    def RangeQuery(self, request, context):
+        snap = dataset_snapshot(self.datasets, request.dataset)
+        if not snap.loaded:
+            return pb2.QueryResponse(results=[f"<error>{snap.status}</error>"])
         try:
-            return pb2.CountResponse(count=len(self.state.root.xpath(f"//{self.state.item_tag}")))
+            low = request.min if request.HasField("min") else None
+            high = request.max if request.HasField("max") else None
+            return pb2.QueryResponse(results=snap.find_range(request.field, low, high, request.limit))
+        except KeyError as exc:
+            return pb2.QueryResponse(results=[f"Erro: {exc.args[0]}"])
         except Exception as exc:
-            print(f"Erro em CountRecords: {exc}")
-            return pb2.CountResponse(count=0)
+            return pb2.QueryResponse(results=[f"Erro desconhecido: {exc}"])
+
+    def FilterRecords(self, request, context):
+        snap = dataset_snapshot(self.datasets, request.dataset)
+        if not snap.loaded:
+            return pb2.FilterResponse(error=snap.status)
+        try:
+            predicates = [(p.field, p.op, list(p.values)) for p in request.predicates]
+            total, rows = snap.filter_records(predicates, request.fields, request.limit, request.offset)
+            return pb2.FilterResponse(
+                total=total, rows=[pb2.FilterRow(id=record_id or "", fields=fields) for record_id, fields in rows]
+            )
+        except (KeyError, ValueError) as exc:
+            return pb2.FilterResponse(error=str(exc.args[0]))
+        except Exception as exc:
+            return pb2.FilterResponse(error=f"Erro desconhecido: {exc}")
+
+    def Aggregate(self, request, context):
+        snap = dataset_snapshot(self.datasets, request.dataset)
+        if not snap.loaded:
+            return pb2.AggregateResponse(error=snap.status)
+        try:
+            rows = snap.aggregate(
+                list(request.group_by),
+                [(a.field, a.func) for a in request.aggregations],
+                [(p.field, p.op, list(p.values)) for p in request.predicates],
+            )
+            return pb2.AggregateResponse(
+                rows=[pb2.AggregateRow(groups=groups, count=count, values=values) for groups, count, values in rows]
+            )
+        except (KeyError, ValueError) as exc:
+            return pb2.AggregateResponse(error=str(exc.args[0]))
+        except Exception as exc:
+            return pb2.AggregateResponse(error=f"Erro desconhecido: {exc}")
+
+    def GetStats(self, request, context):
+        snap = dataset_snapshot(self.datasets, request.dataset)
+        dataset = request.dataset or self.datasets.default
+        if not snap.loaded:
+            return pb2.StatsResponse(
+                xpath_cache=pb2.CacheStats(**snap.xpath_cache.stats()),
+                result_cache=pb2.CacheStats(**snap.result_cache.stats()),
+                version=snap.version,
+                dataset=dataset,
+            )
+        return pb2.StatsResponse(
+            dataset=dataset,
+            record_count=snap.count,
+            item_tag=snap.item_tag,
+            id_attr=snap.id_attr,
+            columns=[
+                pb2.ColumnStats(name=name, non_empty=col["non_empty"], distinct=col["distinct"], type=col["type"])
+                for name, col in snap.column_stats.items()
+            ],
+            xpath_cache=pb2.CacheStats(**snap.xpath_cache.stats()),
+            result_cache=pb2.CacheStats(**snap.result_cache.stats()),
+            version=snap.version,
+        )
+
+    def GetMetrics(self, request, context):
+        return metrics.REGISTRY.to_proto()
+
+    def ListDatasets(self, request, context):
+        return pb2.DatasetsResponse(
+            datasets=[pb2.DatasetInfo(**info) for info in describe_datasets(self.datasets)],
+            memory_budget_bytes=self.datasets.memory_budget,
+        )
+
+    def ConfigureProfiling(self, request, context):
+        profiler = profiling.PROFILER
+        try:
+            # o dump é feito com a configuração anterior (ex.: antes de desligar o tracemalloc)
+            files = profiler.dump(request.output_dir or None) if request.dump else []
+            profiler.configure(
+                sample_rate=request.sample_rate if request.HasField("sample_rate") else None,
+                trace_memory=request.tracemalloc if request.HasField("tracemalloc") else None,
+                output_dir=request.output_dir,
+            )
+        except (ValueError, OSError) as exc:
+            return pb2.ProfilingResponse(error=str(exc))
+        summary = profiler.summary()
+        if request.reset:
+            profiler.reset()
+        print(f"ConfigureProfiling: sample_rate={profiler.sample_rate}, tracemalloc={profiler.trace_memory}")
+        return pb2.ProfilingResponse(
+            sample_rate=profiler.sample_rate,
+            tracemalloc=profiler.trace_memory,
+            output_dir=profiler.output_dir,
+            profiles=[
+                pb2.ProfileSummary(method=key, samples=samples, wall_seconds=wall, cpu_seconds=cpu)
+                for key, samples, wall, cpu in summary
+            ],
+            files=files,
+        )
+
+    def UpsertRecords(self, request, context):
+        return change_response(self.datasets, request.dataset, records_xml=request.records_xml)
+
+    def DeleteRecords(self, request, context):
+        return change_response(self.datasets, request.dataset, ids=request.ids)
 
     def GetRecordByID(self, request, context):
-        if self.state.root is None:
-            return pb2.RecordResponse(record_xml="<error>Servidor nao carregado</error>")
+        snap = dataset_snapshot(self.datasets, request.dataset)
+        if not snap.loaded:
+            return pb2.RecordResponse(record_xml=f"<error>{snap.status}</error>")
         target_id = str(request.property_id)
         try:
-            for prop in self.state.root.iter(self.state.item_tag):
-                if prop.get(self.state.id_attr) == target_id:
-                    xml_string = etree.tostring(
-                        prop,
-                        encoding="unicode",
-                        pretty_print=False,
-                        method="xml",
-                        with_tail=False,
-                    )
-                    return pb2.RecordResponse(record_xml=xml_string)
+            xml_string = snap.record_xml(target_id)
+            if xml_string is not None:
+                return pb2.RecordResponse(record_xml=xml_string)
             return pb2.RecordResponse(record_xml="<error>Registo nao encontrado</error>")
         except Exception as exc:
             print(f"Erro em GetRecordByID: {exc}")
             return pb2.RecordResponse(record_xml=f"<error>{exc}</error>")
 
+    def GetRecordsByIDs(self, request, context):
+        snap = dataset_snapshot(self.datasets, request.dataset)
+        if not snap.loaded:
+            return pb2.RecordsResponse(error=snap.status)
+        return records_response(snap, request.ids)
+
+    def GetRecordsByIDsStream(self, request_iterator, context):
+        # o stream inteiro é servido pelo snapshot ativo no primeiro pedido a cada dataset, mesmo que
+        # chegue um upload a meio
+        snaps = {}
+        for request in request_iterator:
+            snap = snaps.get(request.dataset)
+            if snap is None:
+                snap = snaps[request.dataset] = dataset_snapshot(self.datasets, request.dataset)
+            if not snap.loaded:
+                yield pb2.RecordsResponse(error=snap.status)
+                continue
+            yield records_response(snap, request.ids)
+
     def ExecuteXPath(self, request, context):
-        if self.state.root is None:
-            return pb2.QueryResponse(results=["<error>Servidor nao carregado</error>"])
+        snap = dataset_snapshot(self.datasets, request.dataset)
+        if not snap.loaded:
+            return pb2.QueryResponse(results=[f"<error>{snap.status}</error>"])
         xpath_query = request.query
+        budget = xpath_budget(context)
         try:
-            results = self.state.root.xpath(xpath_query, smart_strings=False)
-            out = []
-            for item in results:
-                if isinstance(item, etree._Element):
-                    out.append(etree.tostring(item, encoding="unicode"))
-                else:
-                    out.append(str(item))
-            return pb2.QueryResponse(results=out)
-        except etree.XPathEvalError as exc:
+            results = snap.xpath_results(xpath_query, budget)
+            return pb2.QueryResponse(
+                results=results if isinstance(results, list) else [results],
+                truncated=budget.truncated,
+                truncated_reason=budget.reason,
+            )
+        except etree.XPathError as exc:
             return pb2.QueryResponse(results=[f"Erro ao executar XPath: {exc}"])
         except Exception as exc:
             return pb2.QueryResponse(results=[f"Erro desconhecido: {exc}"])
 
+    def ExecuteXPathStream(self, request, context):
+        # serializa e envia os resultados em lotes: o primeiro lote sai sem esperar pelos restantes
+        snap = dataset_snapshot(self.datasets, request.dataset)
+        if not snap.loaded:
+            yield pb2.QueryResponse(results=[f"<error>{snap.status}</error>"])
+            return
+        batch_size = request.batch_size if request.batch_size > 0 else XPATH_BATCH_SIZE
+        budget = xpath_budget(context)
+        try:
+            for batch in snap.xpath_batches(request.query, budget, batch_size):
+                if not context.is_active():
+                    return
+                yield pb2.QueryResponse(results=batch if isinstance(batch, list) else [batch])
+        except etree.XPathError as exc:
+            yield pb2.QueryResponse(results=[f"Erro ao executar XPath: {exc}"])
+            return
+        except Exception as exc:
+            yield pb2.QueryResponse(results=[f"Erro desconhecido: {exc}"])
+            return
+        if budget.truncated:
+            # a última mensagem só diz porque é que o stream acabou antes dos resultados
+            yield pb2.QueryResponse(truncated=True, truncated_reason=budget.reason)
 
-def run_grpc(state: SharedState):
-    server = grpc.server(
-        futures.ThreadPoolExecutor(max_workers=10),
-        options=[
-            ("grpc.max_receive_message_length", 200 * 1024 * 1024),
-            ("grpc.max_send_message_length", 200 * 1024 * 1024),
-        ],
-    )
-    pb2_grpc.add_PropertyServiceServicer_to_server(PropertyServicer(state), server)
+
+class AsyncPropertyServicer(pb2_grpc.PropertyServiceServicer):
+    """PropertyServicer para grpc.aio.
+
+    Contagens, estatísticas, pesquisas por ID e resultados já em cache respondem no event loop;
+    XPath, filtros, serialização em bloco e UploadData correm numa pool de threads limitada, pelo que
+    milhares de streams abertos não precisam de milhares de threads; cada UploadDataStream tem uma
+    thread própria.
+    """
+
+    def __init__(self, datasets: dataset_registry.DatasetRegistry, executor):
+        self.datasets = datasets
+        self.executor = executor
+        # perfilado aqui e não no servicer aio: o trabalho corre nas threads da pool, fora do event loop
+        self.sync = profiling.instrument_servicer(PropertyServicer(datasets))
+
+    async def _offload(self, fn, *args):
+        return await asyncio.get_running_loop().run_in_executor(self.executor, fn, *args)
+
+    async def _snapshot(self, name: str) -> Snapshot:
+        # um dataset ainda não carregado é lido numa thread da pool, fora do event loop
+        state = self.datasets.get(name, load=False)
+        if state is not None and state.snapshot.loaded:
+            return state.snapshot
+        return await self._offload(dataset_snapshot, self.datasets, name)
+
+    async def UploadData(self, request, context):
+        return await self._offload(self.sync.UploadData, request, context)
+
+    async def UploadDataStream(self, request_iterator, context):
+        upload = StreamUpload(self.datasets)
+        # o parser incremental da lxml não pode passar de thread em thread: todo o upload (blocos,
+        # fecho e publicação) corre numa única thread própria
+        worker = futures.ThreadPoolExecutor(max_workers=1, thread_name_prefix="upload")
+        loop = asyncio.get_running_loop()
+        try:
+            async for chunk in request_iterator:
+                await loop.run_in_executor(worker, upload.add, chunk)
+            return await loop.run_in_executor(worker, upload.finish)
+        except asyncio.CancelledError:
+            # cliente cancelou: o ficheiro temporário deste upload não fica para trás (na mesma
+            # thread, depois do bloco que ainda estiver a ser processado)
+            worker.submit(upload.fail, ValueError("upload cancelado pelo cliente"))
+            raise
+        except Exception as exc:
+            return await loop.run_in_executor(worker, upload.fail, exc)
+        finally:
+            worker.shutdown(wait=False)
+
+    async def CountRecords(self, request, context):
+        await self._snapshot(request.dataset)
+        return self.sync.CountRecords(request, context)
+
+    async def GetStats(self, request, context):
+        await self._snapshot(request.dataset)
+        return self.sync.GetStats(request, context)
+
+    async def GetMetrics(self, request, context):
+        return self.sync.GetMetrics(request, context)
+
+    async def ListDatasets(self, request, context):
+        return self.sync.ListDatasets(request, context)
+
+    async def ConfigureProfiling(self, request, context):
+        return await self._offload(self.sync.ConfigureProfiling, request, context)
+
+    async def UpsertRecords(self, request, context):
+        return await self._offload(self.sync.UpsertRecords, request, context)
+
+    async def DeleteRecords(self, request, context):
+        return await self._offload(self.sync.DeleteRecords, request, context)
+
+    async def GetRecordByID(self, request, context):
+        await self._snapshot(request.dataset)
+        return self.sync.GetRecordByID(request, context)
+
+    async def GetRecordsByIDs(self, request, context):
+        return await self._offload(self.sync.GetRecordsByIDs, request, context)
+
+    async def GetRecordsByIDsStream(self, request_iterator, context):
+        snaps = {}
+        async for request in request_iterator:
+            snap = snaps.get(request.dataset)
+            if snap is None:
+                snap = snaps[request.dataset] = await self._snapshot(request.dataset)
+            if not snap.loaded:
+                yield pb2.RecordsResponse(error=snap.status)
+                continue
+            yield await self._offload(records_response, snap, request.ids)
+
+    async def RangeQuery(self, request, context):
+        return await self._offload(self.sync.RangeQuery, request, context)
+
+    async def FilterRecords(self, request, context):
+        return await self._offload(self.sync.FilterRecords, request, context)
+
+    async def Aggregate(self, request, context):
+        return await self._offload(self.sync.Aggregate, request, context)
+
+    async def ExecuteXPath(self, request, context):
+        snap = await self._snapshot(request.dataset)
+        if snap.loaded and snap.peek("xpath", request.query) is not None:
+            # resultado em cache: só é fatiado pelos limites, sem sair do event loop
+            return self.sync.ExecuteXPath(request, context)
+        return await self._offload(self.sync.ExecuteXPath, request, context)
+
+    async def ExecuteXPathStream(self, request, context):
+        # um cliente que cancela interrompe o await seguinte; os lotes restantes não são serializados
+        snap = await self._snapshot(request.dataset)
+        if not snap.loaded:
+            yield pb2.QueryResponse(results=[f"<error>{snap.status}</error>"])
+            return
+        batch_size = request.batch_size if request.batch_size > 0 else XPATH_BATCH_SIZE
+        budget = xpath_budget(context)
+        # com o resultado em cache os lotes são só fatias e saem do event loop; senão cada lote
+        # (a avaliação no primeiro) corre na pool
+        cached = snap.peek("xpath", request.query) is not None
+        batches = snap.xpath_batches(request.query, budget, batch_size)
+        try:
+            while True:
+                batch = next(batches, None) if cached else await self._offload(next, batches, None)
+                if batch is None:
+                    break
+                yield pb2.QueryResponse(results=batch if isinstance(batch, list) else [batch])
+        except etree.XPathError as exc:
+            yield pb2.QueryResponse(results=[f"Erro ao executar XPath: {exc}"])
+            return
+        except Exception as exc:
+            yield pb2.QueryResponse(results=[f"Erro desconhecido: {exc}"])
+            return
+        if budget.truncated:
+            yield pb2.QueryResponse(truncated=True, truncated_reason=budget.reason)
+
+
+async def serve_grpc_aio(
+    datasets: dataset_registry.DatasetRegistry, address="[::]:50051", workers: int = GRPC_AIO_WORKERS
+):
+    executor = futures.ThreadPoolExecutor(max_workers=workers, thread_name_prefix="grpc-aio")
+    server = grpc.aio.server(options=GRPC_AIO_OPTIONS, compression=GRPC_COMPRESSION)
+    servicer = metrics.instrument_servicer(AsyncPropertyServicer(datasets, executor))
+    pb2_grpc.add_PropertyServiceServicer_to_server(servicer, server)
+    server.add_insecure_port(address)
+    await server.start()
+    print(f"gRPC Server (aio, {workers} threads para trabalho pesado) a correr em {address}...")
+    try:
+        await server.wait_for_termination()
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+def run_grpc(datasets: dataset_registry.DatasetRegistry):
+    if GRPC_MODE == "aio":
+        asyncio.run(serve_grpc_aio(datasets))
+        return
+    server = grpc.server(futures.ThreadPoolExecutor(max_workers=10), options=GRPC_OPTIONS, compression=GRPC_COMPRESSION)
+    servicer = metrics.instrument_servicer(profiling.instrument_servicer(PropertyServicer(datasets)))
+    pb2_grpc.add_PropertyServiceServicer_to_server(servicer, server)
     server.add_insecure_port("[::]:50051")
     server.start()
     print("gRPC Server a correr na porta 50051...")
     server.wait_for_termination()
 
 
-def run_xmlrpc(state: SharedState):
-    while True:
+class KeepAliveRequestHandler(SimpleXMLRPCRequestHandler):
+    """Uma ligação HTTP/1.1 atendida um pedido de cada vez (ver PooledXMLRPCServer).
+
+    O BaseRequestHandler atenderia a ligação inteira no construtor, prendendo uma thread enquanto o
+    cliente a mantém aberta; aqui o construtor só prepara os ficheiros e ``handle_next`` atende um pedido.
+    """
+
+    protocol_version = "HTTP/1.1"
+    # só conta enquanto se lê ou escreve um pedido já começado; a inatividade entre pedidos é do servidor
+    timeout = XMLRPC_IDLE_TIMEOUT
+
+    def __init__(self, request, client_address, server):
+        self.request = request
+        self.client_address = client_address
+        self.server = server
+        self.close_connection = False
+        self.idle_since = time.monotonic()
+        self.setup()
+
+    def handle_next(self) -> bool:
+        """Atende um pedido; True se a ligação continua aberta."""
+        self.handle_one_request()
+        self.idle_since = time.monotonic()
+        return not self.close_connection
+
+    def has_buffered_request(self) -> bool:
+        # um pedido seguinte já lido para o buffer não volta a acordar o selector
+        self.connection.setblocking(False)
         try:
-            state.load_from_files()
-            break
-        except Exception as exc:
-            print(f"XML-RPC: XML not ready ({exc}), aguardando arquivo {state.xml_path}...")
-            time.sleep(2)
+            return bool(self.rfile.peek(1))
+        except OSError:
+            return False
+        finally:
+            self.connection.settimeout(self.timeout)
+
+    def log_error(self, format, *args):
+        # um cliente que para a meio de um pedido é desligado sem ruído no stderr
+        if not format.startswith("Request timed out"):
+            super().log_error(format, *args)
+
+
+class PooledXMLRPCServer(SimpleXMLRPCServer):
+    """SimpleXMLRPCServer que atende os pedidos numa pool de threads de tamanho fixo.
 
-    handler_state = state
-    server = SimpleXMLRPCServer(("0.0.0.0", 8000), allow_none=True)
+    Uma thread só fica ocupada enquanto atende um pedido: entre pedidos, as ligações keep-alive
+    esperam num selector, e as inativas há mais de ``XMLRPC_IDLE_TIMEOUT`` segundos são fechadas.
+    Clientes com ligações persistentes podem ser muitos mais do que as threads.
+    """
 
-    def execute_xpath(query):
-        if handler_state.root is None:
-            return "<error>Servidor nao carregado</error>"
+    request_queue_size = 128
+
+    def __init__(self, addr, workers: int, **kwargs):
+        super().__init__(addr, requestHandler=KeepAliveRequestHandler, **kwargs)
+        self.pool = futures.ThreadPoolExecutor(max_workers=workers, thread_name_prefix="xmlrpc")
+        self._idle = selectors.DefaultSelector()
+        self._idle_lock = threading.Lock()
+        self._closed = False
+        threading.Thread(target=self._watch_idle, daemon=True, name="xmlrpc-idle").start()
+
+    def process_request(self, request, client_address):
+        # o ciclo de accept continua livre: um execute_xpath lento só ocupa a sua thread
+        try:
+            handler = self.RequestHandlerClass(request, client_address, self)
+        except Exception:
+            self.handle_error(request, client_address)
+            self.shutdown_request(request)
+            return
+        self.pool.submit(self._serve, handler)
+
+    def _serve(self, handler: KeepAliveRequestHandler):
+        try:
+            while handler.handle_next():
+                if not handler.has_buffered_request():
+                    with self._idle_lock:
+                        if not self._closed:
+                            self._idle.register(handler.connection, selectors.EVENT_READ, handler)
+                            return
+                    break
+        except Exception:
+            self.handle_error(handler.request, handler.client_address)
+        self._close(handler)
+
+    def _watch_idle(self):
+        # ligações à espera do pedido seguinte: voltam à pool quando o cliente escreve
+        while not self._closed:
+            try:
+                events = self._idle.select(timeout=1.0)
+            except (OSError, ValueError):
+                return
+            expired = []
+            with self._idle_lock:
+                if self._closed:
+                    return
+                for key, _ in events:
+                    self._idle.unregister(key.fileobj)
+                    self.pool.submit(self._serve, key.data)
+                now = time.monotonic()
+                for key in list(self._idle.get_map().values()):
+                    if now - key.data.idle_since > XMLRPC_IDLE_TIMEOUT:
+                        self._idle.unregister(key.fileobj)
+                        expired.append(key.data)
+            for handler in expired:
+                self._close(handler)
+
+    def _close(self, handler: KeepAliveRequestHandler):
+        try:
+            handler.finish()
+        except OSError:
+            pass
+        self.shutdown_request(handler.request)
+
+    def server_close(self):
+        super().server_close()
+        with self._idle_lock:
+            self._closed = True
+            idle = [key.data for key in self._idle.get_map().values()]
+            for handler in idle:
+                self._idle.unregister(handler.connection)
+        for handler in idle:
+            self._close(handler)
+        self._idle.close()
+        self.pool.shutdown(wait=False, cancel_futures=True)
+
+
+def make_xmlrpc_server(
+    datasets: dataset_registry.DatasetRegistry, addr=("0.0.0.0", 8000), workers: int = XMLRPC_WORKERS, log_requests=True
+):
+    # cada função aceita no fim o nome do dataset (omitido ou "" = o dataset por omissão)
+    if workers > 0:
+        server = PooledXMLRPCServer(addr, workers, allow_none=True, logRequests=log_requests)
+    else:
+        server = SimpleXMLRPCServer(addr, allow_none=True, logRequests=log_requests)
+
+    def execute_xpath(query, dataset=""):
+        snap = dataset_snapshot(datasets, dataset)
+        if not snap.loaded:
+            return f"<error>{snap.status}</error>"
+        budget = xpath_budget()
         try:
-            res = handler_state.root.xpath(query, smart_strings=False)
-            if isinstance(res, list):
-                return [
-                    etree.tostring(item, encoding="unicode") if isinstance(item, etree._Element) else str(item)
-                    for item in res
-                ]
-            return str(res)
+            results = snap.xpath_results(query, budget)
         except Exception as exc:
             return f"Erro ao executar XPath: {exc}"
+        if budget.truncated:
+            # o motivo vai no fim da lista, tal como os erros vão no lugar do resultado
+            results.append(f"<truncated>{budget.reason}</truncated>")
+        return results
 
-    def get_record_by_id(record_id):
-        if handler_state.root is None:
-            return "<error>Servidor nao carregado</error>"
-        rec = handler_state.root.xpath(f'//{handler_state.item_tag}[@{handler_state.id_attr}="{record_id}"]')
-        if rec:
-            return etree.tostring(rec[0], encoding="unicode")
+    def execute_xpath_page(query, cursor="", limit=XPATH_PAGE_SIZE, dataset=""):
+        # paginação por cursor opaco: só a página pedida é serializada
+        snap = dataset_snapshot(datasets, dataset)
+        if not snap.loaded:
+            return f"<error>{snap.status}</error>"
+        # uma página cortada pelos limites continua a partir do next_cursor
+        budget = xpath_budget()
+        try:
+            offset = decode_cursor(cursor, snap.version, query)
+            limit = max(1, int(limit))
+            cached = snap.peek("xpath", query)
+            if cached is not None:
+                res = cached if isinstance(cached, list) else [cached]
+                serialize = None
+            else:
+                # a lista de nós avaliada fica na cache de resultados desta versão: percorrer as
+                # páginas seguintes não volta a avaliar a query sobre o documento inteiro
+                res = snap.cached("xpath_nodes", query, lambda: snap.evaluate(query))
+                if not isinstance(res, list):
+                    res = [str(res)]
+                    serialize = None
+                else:
+                    serialize = snap.serialize_items
+            results = budget.take(res[offset : offset + limit], serialize)
+            end = offset + len(results)
+            return {
+                "results": results,
+                "next_cursor": encode_cursor(end, snap.version, query) if end < len(res) else "",
+                "total": len(res),
+                "version": snap.version,
+                "truncated": budget.truncated,
+                "truncated_reason": budget.reason,
+            }
+        except Exception as exc:
+            return f"Erro ao executar XPath: {exc}"
+
+    def get_record_by_id(record_id, dataset=""):
+        snap = dataset_snapshot(datasets, dataset)
+        if not snap.loaded:
+            return f"<error>{snap.status}</error>"
+        rec = snap.record_xml(str(record_id))
+        if rec is not None:
+            return rec
         return "Registo nao encontrado"
 
-    def count_records():
-        if handler_state.root is None:
+    def get_records_by_ids(ids, dataset=""):
+        # lista pela ordem dos IDs pedidos; None marca os IDs inexistentes
+        snap = dataset_snapshot(datasets, dataset)
+        if not snap.loaded:
+            return f"<error>{snap.status}</error>"
+        return snap.records_xml([str(record_id) for record_id in ids])
+
+    def find_by_range(field, low=None, high=None, limit=0, dataset=""):
+        snap = dataset_snapshot(datasets, dataset)
+        if not snap.loaded:
+            return f"<error>{snap.status}</error>"
+        try:
+            return snap.find_range(field, low, high, int(limit))
+        except KeyError as exc:
+            return f"Erro: {exc.args[0]}"
+        except Exception as exc:
+            return f"Erro desconhecido: {exc}"
+
+    def filter_records(predicates, fields=None, limit=0, offset=0, dataset=""):
+        # predicates: lista de {"field", "op", "values"}
+        snap = dataset_snapshot(datasets, dataset)
+        if not snap.loaded:
+            return f"<error>{snap.status}</error>"
+        try:
+            parsed = [(p["field"], p["op"], [str(v) for v in p.get("values", [])]) for p in predicates]
+            total, rows = snap.filter_records(parsed, fields or (), int(limit), int(offset))
+            return {"total": total, "rows": [{"id": record_id, "fields": fields} for record_id, fields in rows]}
+        except (KeyError, ValueError) as exc:
+            return f"Erro: {exc.args[0]}"
+        except Exception as exc:
+            return f"Erro desconhecido: {exc}"
+
+    def aggregate(group_by=None, aggregations=None, predicates=None, dataset=""):
+        # aggregations: lista de {"field", "func"}; predicates como em filter_records
+        snap = dataset_snapshot(datasets, dataset)
+        if not snap.loaded:
+            return f"<error>{snap.status}</error>"
+        try:
+            rows = snap.aggregate(
+                list(group_by or []),
+                [(a.get("field", ""), a["func"]) for a in aggregations or []],
+                [(p["field"], p["op"], [str(v) for v in p.get("values", [])]) for p in predicates or []],
+            )
+            # NaN (ex.: média de um grupo sem valores) não existe em XML-RPC: vai como None
+            return [
+                {
+                    "groups": groups,
+                    "count": count,
+                    "values": {name: None if np.isnan(value) else value for name, value in values.items()},
+                }
+                for groups, count, values in rows
+            ]
+        except (KeyError, ValueError) as exc:
+            return f"Erro: {exc.args[0]}"
+        except Exception as exc:
+            return f"Erro desconhecido: {exc}"
+
+    def count_records(dataset=""):
+        snap = dataset_snapshot(datasets, dataset)
+        if not snap.loaded:
             return 0
-        return len(handler_state.root.xpath(f"//{handler_state.item_tag}"))
+        return snap.count
+
+    def get_stats(dataset=""):
+        snap = dataset_snapshot(datasets, dataset)
+        if not snap.loaded:
+            return {
+                "record_count": 0,
+                "columns": [],
+                "xpath_cache": snap.xpath_cache.stats(),
+                "result_cache": snap.result_cache.stats(),
+                "version": snap.version,
+                "dataset": dataset or datasets.default,
+            }
+        return {
+            "record_count": snap.count,
+            "item_tag": snap.item_tag,
+            "id_attr": snap.id_attr,
+            "columns": [{"name": name, **col} for name, col in snap.column_stats.items()],
+            "xpath_cache": snap.xpath_cache.stats(),
+            "result_cache": snap.result_cache.stats(),
+            "version": snap.version,
+            "dataset": dataset or datasets.default,
+        }
+
+    def list_datasets():
+        return describe_datasets(datasets)
+
+    def _apply_changes(dataset, records_xml, ids):
+        state = datasets.get(dataset)
+        if state is None:
+            return f"Erro: dataset '{dataset}' desconhecido"
+        return state.apply_changes(records_xml, ids)
+
+    def upsert_records(records_xml, dataset=""):
+        # registos completos; devolve {"inserted", "updated", "deleted", "not_found", "version"}
+        try:
+            return _apply_changes(dataset, [str(text) for text in records_xml], ())
+        except ValueError as exc:
+            return f"Erro: {exc}"
+        except Exception as exc:
+            return f"Erro desconhecido: {exc}"
+
+    def delete_records(ids, dataset=""):
+        try:
+            return _apply_changes(dataset, (), [str(record_id) for record_id in ids])
+        except ValueError as exc:
+            return f"Erro: {exc}"
+        except Exception as exc:
+            return f"Erro desconhecido: {exc}"
 
     server.register_function(execute_xpath, "execute_xpath")
+    server.register_function(execute_xpath_page, "execute_xpath_page")
     server.register_function(get_record_by_id, "get_record_by_id")
+    server.register_function(get_records_by_ids, "get_records_by_ids")
+    server.register_function(find_by_range, "find_by_range")
+    server.register_function(filter_records, "filter_records")
+    server.register_function(aggregate, "aggregate")
     server.register_function(count_records, "count_records")
+    server.register_function(get_stats, "get_stats")
+    server.register_function(upsert_records, "upsert_records")
+    server.register_function(delete_records, "delete_records")
+    server.register_function(list_datasets, "list_datasets")
+
+    def get_metrics():
+        return metrics.REGISTRY.render()
+
+    server.register_function(get_metrics, "get_metrics")
+    # system.multicall: vários pedidos numa só ida e volta
+    server.register_multicall_functions()
+    return metrics.instrument_xmlrpc(profiling.instrument_xmlrpc(server))
+
 
-    print("XML-RPC Server a correr na porta 8000...")
+def run_xmlrpc(datasets: dataset_registry.DatasetRegistry):
+    # o main() já tentou carregar o dataset por omissão; só volta a tentar se ainda não há (nem chegou por upload)
+    while not dataset_snapshot(datasets, "").loaded:
+        print(f"XML-RPC: XML not ready, aguardando arquivo {datasets.paths[datasets.default][0]}...")
+        time.sleep(2)
+
+    server = make_xmlrpc_server(datasets)
+    mode = f"{XMLRPC_WORKERS} threads, keep-alive" if XMLRPC_WORKERS > 0 else "sequencial"
+    print(f"XML-RPC Server a correr na porta 8000 ({mode})...")
     server.serve_forever()
 
 
+def dataset_name(xml_path: str) -> str:
+    # nome de um dataset implícito: o nome do ficheiro sem extensão
+    stem = os.path.splitext(os.path.basename(xml_path))[0]
+    return re.sub(r"[^A-Za-z0-9_.-]", "_", stem) or "default"
+
+
+def make_datasets() -> dataset_registry.DatasetRegistry:
+    xml_path, xsd_path = SharedState._resolve_paths()
+    if DATASETS:
+        specs = dataset_registry.parse_specs(DATASETS)
+        default = DEFAULT_DATASET or next(iter(specs), "")
+    else:
+        specs = {}
+        for xmlp, xsd in [(xml_path, xsd_path)] + DEFAULT_XMLS:
+            specs.setdefault(dataset_name(xmlp), (xmlp, xsd))
+        default = DEFAULT_DATASET or dataset_name(xml_path)
+    if default not in specs:
+        raise ValueError(f"DEFAULT_DATASET: dataset '{default}' não está em DATASETS")
+    datasets = dataset_registry.DatasetRegistry(
+        specs, SharedState, default, int(DATASETS_MEMORY_MB * 1024 * 1024), DATASET_DIR
+    )
+    if not DATASETS and specs[default] == (xml_path, xsd_path):
+        # sem DATASETS o dataset por omissão continua a respeitar SNAPSHOT_PATH e CHANGE_LOG_PATH
+        datasets.add(default, SharedState())
+    return datasets
+
+
 def main():
-    state = SharedState()
-    try:
-        state.load_from_files()
-        print(f"XML pré-carregado no arranque. item_tag={state.item_tag}, id_attr={state.id_attr}")
-    except Exception:
+    datasets = make_datasets()
+    # só o dataset por omissão é lido no arranque; os outros no primeiro pedido
+    start = time.perf_counter()
+    snap = datasets.get().snapshot
+    if snap.loaded:
+        source = "offsets" if snap.offsets is not None else "snapshot" if snap.stored is not None else "XML"
+        print(
+            f"Dataset '{datasets.default}' pré-carregado no arranque ({source}, {time.perf_counter() - start:.1f}s). "
+            f"item_tag={snap.item_tag}, id_attr={snap.id_attr}"
+        )
+    else:
         print("Nenhum XML válido no arranque; aguardando upload ou disponibilidade.")
+    print(f"Datasets: {', '.join(datasets.paths)} (por omissão: {datasets.default})")
+
+    if PROFILE_DUMP_INTERVAL:
+        profiling.PROFILER.dump_every(PROFILE_DUMP_INTERVAL)
+    if METRICS_PORT:
+        metrics.serve_http((METRICS_HOST, METRICS_PORT))
+        print(f"Métricas em http://{METRICS_HOST}:{METRICS_PORT}/metrics")
 
-    t1 = threading.Thread(target=run_grpc, args=(state,), daemon=True)
-    t2 = threading.Thread(target=run_xmlrpc, args=(state,), daemon=True)
+    t1 = threading.Thread(target=run_grpc, args=(datasets,), daemon=True)
+    t2 = threading.Thread(target=run_xmlrpc, args=(datasets,), daemon=True)
     t1.start()
     t2.start()
 
@@ -0,0 +1,172 @@
+"""Snapshot binário do dataset carregado, escrito após cada carga/upload e mapeado em memória no arranque.
+
+Um único ficheiro (substituído de forma atómica):
+
+    MAGIC | uint64 tamanho do cabeçalho | cabeçalho JSON | secções alinhadas a 8 bytes
+
+O cabeçalho guarda item_tag/id_attr, tipos e estatísticas das colunas, o tamanho/mtime do XML de
+origem e a posição de cada secção: registos serializados (UTF-8, concatenados), offsets int64,
+IDs (JSON) e uma secção por coluna (float64 para campos numéricos, códigos + categorias para os
+restantes). No arranque nada disto é percorrido: os arrays são vistas sobre o mmap.
+"""
+import json
+import mmap
+import os
+import struct
+
+import numpy as np
+import pandas as pd
+from lxml import etree
+
+MAGIC = b"TP2SNAP1"
+_LENGTH = struct.Struct("<Q")
+ALIGN = 8
+
+
+def source_signature(xml_path: str) -> dict:
+    stat = os.stat(xml_path)
+    return {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+
+def write(path: str, source: dict, snap, still_current=None) -> bool:
+    """Escreve o snapshot de ``snap`` em ``path``.
+
+    ``source`` é a assinatura (``source_signature``) do XML de onde ``snap`` foi lido, tirada quando o
+    documento foi carregado: o ficheiro pode ter mudado entretanto. Se ``still_current`` devolver
+    False no fim, o ficheiro temporário é descartado sem substituir o snapshot anterior; devolve se
+    o snapshot foi escrito.
+    """
+    records = bytearray()
+    offsets = np.zeros(snap.count + 1, dtype=np.int64)
+    for pos in range(snap.count):
+        records += snap.record_text(pos).encode("utf-8")
+        offsets[pos + 1] = len(records)
+    sections = [("records", bytes(records)), ("offsets", offsets.tobytes())]
+    sections.append(("ids", json.dumps(snap.columns.ids).encode("utf-8")))
+    columns = {}
+    for tag, column in snap.columns.columns.items():
+        if isinstance(column, np.ndarray):
+            columns[tag] = {"kind": "numeric"}
+            sections.append((f"col:{tag}", np.ascontiguousarray(column, dtype=np.float64).tobytes()))
+        else:
+            codes = np.ascontiguousarray(column.codes)
+            columns[tag] = {"kind": "categorical", "dtype": codes.dtype.str, "categories": list(column.categories)}
+            sections.append((f"col:{tag}", codes.tobytes()))
+
+    header = {
+        "source": source,
+        "item_tag": snap.item_tag,
+        "id_attr": snap.id_attr,
+        "count": snap.count,
+        "field_types": snap.field_types,
+        "column_stats": snap.columns.stats,
+        "columns": columns,
+        "sections": {},
+    }
+    # posições relativas ao início das secções (fim do cabeçalho, alinhado)
+    position = 0
+    for name, data in sections:
+        header["sections"][name] = [position, len(data)]
+        position += len(data) + (-len(data) % ALIGN)
+    header_bytes = json.dumps(header).encode("utf-8")
+    base = len(MAGIC) + _LENGTH.size + len(header_bytes)
+    base += -base % ALIGN
+
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(MAGIC)
+        f.write(_LENGTH.pack(len(header_bytes)))
+        f.write(header_bytes)
+        f.write(b"\0" * (base - f.tell()))
+        for _, data in sections:
+            f.write(data)
+            f.write(b"\0" * (-len(data) % ALIGN))
+    if still_current is not None and not still_current():
+        os.remove(tmp_path)
+        return False
+    os.replace(tmp_path, path)
+    return True
+
+
+class StoredDataset:
+    """Snapshot aberto: registos, IDs e colunas lidos diretamente do ficheiro mapeado."""
+
+    def __init__(self, path: str, xml_path: str):
+        self.xml_path = xml_path
+        with open(path, "rb") as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._mm[: len(MAGIC)] != MAGIC:
+            raise ValueError(f"{path} não é um snapshot válido")
+        (header_len,) = _LENGTH.unpack_from(self._mm, len(MAGIC))
+        start = len(MAGIC) + _LENGTH.size
+        self.header = json.loads(self._mm[start : start + header_len])
+        self._base = start + header_len + (-(start + header_len) % ALIGN)
+        self.item_tag = self.header["item_tag"]
+        self.id_attr = self.header["id_attr"]
+        self.count = self.header["count"]
+        self.field_types = self.header["field_types"]
+        self.column_stats = self.header["column_stats"]
+        self.offsets = self._array("offsets", np.int64)
+        self._records = self._section("records")
+        self.ids = json.loads(bytes(self._section("ids")))
+
+    def _section(self, name: str):
+        position, length = self.header["sections"][name]
+        return memoryview(self._mm)[self._base + position : self._base + position + length]
+
+    def _array(self, name: str, dtype):
+        return np.frombuffer(self._section(name), dtype=dtype)
+
+    def is_fresh(self) -> bool:
+        # o snapshot só vale para o XML exato que o produziu
+        try:
+            return source_signature(self.xml_path) == self.header["source"]
+        except OSError:
+            return False
+
+    def columns(self) -> dict:
+        columns = {}
+        for tag, spec in self.header["columns"].items():
+            if spec["kind"] == "numeric":
+                columns[tag] = self._array(f"col:{tag}", np.float64)
+            else:
+                codes = self._array(f"col:{tag}", np.dtype(spec["dtype"]))
+                columns[tag] = pd.Categorical.from_codes(codes, pd.Index(spec["categories"], dtype=object))
+        return columns
+
+    def record_bytes(self, pos: int) -> bytes:
+        return self._records[self.offsets[pos] : self.offsets[pos + 1]].tobytes()
+
+    def record_text(self, pos: int) -> str:
+        return self.record_bytes(pos).decode("utf-8")
+
+    def parse_source(self):
+        """Árvore completa do XML de origem (para XPath), recusada se o ficheiro já mudou."""
+        if not self.is_fresh():
+            raise RuntimeError(f"{self.xml_path} mudou desde que o snapshot foi escrito")
+        return etree.parse(self.xml_path)
+
+
+class StoredRecords:
+    """Sequência de registos do snapshot; cada acesso devolve o elemento desse registo."""
+
+    def __init__(self, stored: StoredDataset):
+        self.stored = stored
+
+    def __len__(self):
+        return self.stored.count
+
+    def __getitem__(self, pos):
+        return etree.fromstring(self.stored.record_bytes(pos))
+
+
+def load(path: str, xml_path: str):
+    """Abre o snapshot em ``path`` se existir e corresponder ao ``xml_path`` atual; senão None."""
+    if not os.path.exists(path):
+        return None
+    try:
+        stored = StoredDataset(path, xml_path)
+    except (OSError, ValueError, KeyError) as exc:
+        print(f"Snapshot {path} ignorado: {exc}")
+        return None
+    return stored if stored.is_fresh() else None
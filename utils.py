@@ -35,10 +35,24 @@ def get_unique_tag_map(columns: list) -> dict:
         mapping[col] = tag
     return mapping
 
+# Control characters 0-31 except 9(\t), 10(\n), 13(\r)
+INVALID_XML_CHARS = r'[\x00-\x08\x0B\x0C\x0E-\x1F]'
+# Invalid characters plus the ones xml.sax.saxutils.escape replaces
+_CLEAN_AND_ESCAPE = re.compile(r'[\x00-\x08\x0B\x0C\x0E-\x1F&<>]')
+_ESCAPES = {'&': '&amp;', '<': '&lt;', '>': '&gt;'}
+
 def clean_xml_value(value) -> str:
     """
     Removes invalid XML 1.0 characters from value string.
     """
     s = str(value)
-    # Remove control characters 0-31 except 9(\t), 10(\n), 13(\r)
-    return re.sub(r'[\x00-\x08\x0B\x0C\x0E-\x1F]', '', s)
+    return re.sub(INVALID_XML_CHARS, '', s)
+
+def escape_xml_series(series):
+    """
+    Column-wise equivalent of escape(clean_xml_value(v)) for a pandas Series.
+    Values are converted with str() (missing values become 'nan'); invalid XML
+    characters are removed and &, < and > escaped in a single regex pass.
+    """
+    s = series.astype(str).fillna('nan')
+    return s.str.replace(_CLEAN_AND_ESCAPE, lambda m: _ESCAPES.get(m.group(0), ''), regex=True)
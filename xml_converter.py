@@ -1,6 +1,11 @@
 import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
 import pandas as pd
 from xml.sax.saxutils import escape
+import profiling
 import utils
 
 
@@ -37,17 +42,126 @@ def derive_tags(id_column: str, df_columns) -> tuple[str, str, str]:
     return root_tag, item_tag, id_attr
 
 
-def generate_xml(
+def serialize_rows(df_chunk, id_column: str, tag_map: dict, item_tag: str, id_attr: str) -> str:
+    """Serializa um bloco de linhas coluna a coluna (operações vetorizadas sobre Series)."""
+    # os valores vêm de df.values, tal como em iterrows: com colunas mistas cada valor mantém
+    # o tipo original; num bloco só numérico tudo passa a float (ex.: "1.0")
+    values = df_chunk.values
+    id_pos = list(df_chunk.columns).index(id_column)
+    # int() evita a formatação "1.0" que viola xs:integer
+    ids = pd.Series(values[:, id_pos], dtype=object).map(int).astype(str).to_numpy(dtype=object)
+    columns = [f'<{item_tag} {id_attr}="' + ids + '">']
+    for pos, col in enumerate(df_chunk.columns):
+        if col == id_column:
+            continue
+        tag = tag_map[col]
+        series = pd.Series(values[:, pos], dtype=object)
+        # números e booleanos nunca contêm caracteres inválidos nem &, < ou >
+        if pd.api.types.is_numeric_dtype(df_chunk[col].dtype):
+            text = series.astype(str).fillna("nan")
+        else:
+            text = utils.escape_xml_series(series)
+        columns.append(f"<{tag}>" + text.to_numpy(dtype=object) + f"</{tag}>")
+    columns.append(np.full(len(df_chunk), f"</{item_tag}>\n", dtype=object))
+    return "".join(map("".join, zip(*columns)))
+
+
+def serialize_rows_iter(df_chunk, id_column: str, tag_map: dict, item_tag: str, id_attr: str) -> str:
+    """Serialização linha a linha com iterrows (caminho original, mantido para comparação)."""
+    out = []
+    for _, row in df_chunk.iterrows():
+        elements = []
+        for col in df_chunk.columns:
+            if col == id_column:
+                continue
+            tag = tag_map[col]
+            # clean value and escape
+            val = utils.clean_xml_value(row[col])
+            elements.append(f"<{tag}>{escape(val)}</{tag}>")
+
+        elements_str = "".join(elements)
+        # clean id attribute too
+        # Force integer cast to avoid '1.0' float formatting which violates xs:integer
+        id_val = utils.clean_xml_value(int(row[id_column]))
+        out.append(f'<{item_tag} {id_attr}="{escape(id_val)}">{elements_str}</{item_tag}>\n')
+    return "".join(out)
+
+
+SERIALIZERS = {
+    "vectorized": serialize_rows,
+    "rows": serialize_rows_iter,
+}
+
+
+def chunk_tag_map(columns, id_column: str) -> dict:
+    # o ID vem sempre primeiro, como em serialize_chunk
+    return utils.get_unique_tag_map([id_column] + [c for c in columns if c != id_column])
+
+
+def serialize_chunk(df_chunk, start_index: int, id_column: str, tag_map: dict, item_tag: str, id_attr: str, engine: str) -> str:
+    df_chunk[id_column] = range(start_index, start_index + len(df_chunk))
+    # Ensure consistent column ordering for map integrity if processed in chunks
+    cols_local = [id_column] + [c for c in df_chunk.columns if c != id_column]
+    return SERIALIZERS[engine](df_chunk[cols_local], id_column, tag_map, item_tag, id_attr)
+
+
+# com PROFILE_SAMPLE > 0 uma fração dos blocos é serializada sob cProfile (ver profiling.py)
+profiled_serialize_chunk = profiling.PROFILER.wrap("converter.serialize_chunk", serialize_chunk)
+
+
+def serialize_chunk_in_worker(*args):
+    # nos processos do pool não corre o atexit: cada amostra grava logo o perfil acumulado do processo
+    return profiling.PROFILER.wrap("converter.serialize_chunk", serialize_chunk, dump=True)(*args)
+
+
+def iter_chunk_ranges(first_chunk, reader):
+    """Devolve (bloco, primeiro ID): o intervalo de IDs de cada bloco fica fixo antes da serialização."""
+    start_index = 1
+    yield first_chunk, start_index
+    start_index += len(first_chunk)
+    for chunk in reader:
+        yield chunk, start_index
+        start_index += len(chunk)
+
+
+def iter_chunks_parallel(chunks, workers: int, id_column: str, tag_map: dict, item_tag: str, id_attr: str, engine: str):
+    # os fragmentos saem pela ordem dos blocos; no máximo 2 blocos por worker em memória
+    pending = deque()
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for chunk, start_index in chunks:
+            pending.append(
+                pool.submit(
+                    serialize_chunk_in_worker, chunk, start_index, id_column, tag_map, item_tag, id_attr, engine
+                )
+            )
+            if len(pending) >= workers * 2:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+def document_start(root_tag: str) -> str:
+    return f'<?xml version="1.0" encoding="UTF-8"?>\n<{root_tag}>\n'
+
+
+def document_end(root_tag: str) -> str:
+    return f"</{root_tag}>"
+
+
+def iter_record_chunks(
     csv_path: str,
     id_column: str,
-    xml_path: str = "house_purchase.xml",
-    root_tag: str = "records",
-    item_tag: str = "record",
-    id_attr: str = "id",
     max_rows: int | None = None,
     chunk_size: int | None = None,
-) -> str:
-    """Gera um XML a partir de um CSV, garantindo um ID numérico."""
+    engine: str = "vectorized",
+    workers: int | None = None,
+):
+    """Lê o CSV e devolve (root_tag, blocos), em que cada bloco é uma string de registos já serializados.
+
+    ``engine`` escolhe a serialização: "vectorized" (por omissão) ou "rows" (iterrows).
+    Com ``chunk_size`` definido e ``workers`` > 1 (ou ``XML_WORKERS``), os blocos são
+    serializados em paralelo num pool de processos; o resultado é igual ao sequencial.
+    """
     nrows = max_rows if max_rows and max_rows > 0 else None
 
     if chunk_size is None:
@@ -59,55 +173,47 @@ def generate_xml(
             if file_size > 200 * 1024 * 1024:
                 chunk_size = 50000
 
-    tag_map = {}
-
-    def write_rows(df_chunk, start_index, writer, rt, it, ia):
-        df_chunk[id_column] = range(start_index, start_index + len(df_chunk))
-        # Ensure consistent column ordering for map integrity if processed in chunks
-        cols_local = [id_column] + [c for c in df_chunk.columns if c != id_column]
-        df_chunk = df_chunk[cols_local]
-        
-        nonlocal tag_map
-        if not tag_map:
-             tag_map = utils.get_unique_tag_map(df_chunk.columns)
-
-        for _, row in df_chunk.iterrows():
-            elements = []
-            for col in df_chunk.columns:
-                if col == id_column:
-                    continue
-                tag = tag_map[col]
-                # clean value and escape
-                val = utils.clean_xml_value(row[col])
-                elements.append(f"<{tag}>{escape(val)}</{tag}>")
-            
-            elements_str = "".join(elements)
-            # clean id attribute too
-            # Force integer cast to avoid '1.0' float formatting which violates xs:integer
-            id_val = utils.clean_xml_value(int(row[id_column]))
-            writer.write(f'<{it} {ia}="{escape(id_val)}">{elements_str}</{it}>\n')
-        return start_index + len(df_chunk)
+    if workers is None:
+        workers = int(os.getenv("XML_WORKERS", "1"))
+
+    if chunk_size:
+        # nrows corta o último bloco: max_rows é respeitado à linha, como sem blocos
+        reader = pd.read_csv(csv_path, encoding="utf-8", chunksize=chunk_size, nrows=nrows, low_memory=False)
+        first_chunk = next(reader)
+        chunks = iter_chunk_ranges(first_chunk, reader)
+    else:
+        first_chunk = pd.read_csv(csv_path, encoding="utf-8", nrows=nrows, low_memory=False)
+        chunks = [(first_chunk, 1)]
+    root_tag, item_tag, id_attr = derive_tags(id_column, first_chunk.columns)
+    tag_map = chunk_tag_map(first_chunk.columns, id_column)
+
+    if chunk_size and workers > 1:
+        return root_tag, iter_chunks_parallel(chunks, workers, id_column, tag_map, item_tag, id_attr, engine)
+    return root_tag, (
+        profiled_serialize_chunk(chunk, start_index, id_column, tag_map, item_tag, id_attr, engine)
+        for chunk, start_index in chunks
+    )
 
-    with open(xml_path, "w", encoding="utf-8") as f:
-        f.write('<?xml version="1.0" encoding="UTF-8"?>\n')
-        total_written = 1
-        if chunk_size:
-            reader = pd.read_csv(csv_path, encoding="utf-8", chunksize=chunk_size, low_memory=False)
-            first_chunk = next(reader)
-            root_tag, item_tag, id_attr = derive_tags(id_column, first_chunk.columns)
-            f.write(f"<{root_tag}>\n")
-            total_written = write_rows(first_chunk, total_written, f, root_tag, item_tag, id_attr)
-            for chunk in reader:
-                total_written = write_rows(chunk, total_written, f, root_tag, item_tag, id_attr)
-                if max_rows and total_written > max_rows:
-                    break
-        else:
-            df = pd.read_csv(csv_path, encoding="utf-8", nrows=nrows, low_memory=False)
-            root_tag, item_tag, id_attr = derive_tags(id_column, df.columns)
-            f.write(f"<{root_tag}>\n")
-            total_written = write_rows(df, total_written, f, root_tag, item_tag, id_attr)
 
-        f.write(f"</{root_tag}>")
+def generate_xml(
+    csv_path: str,
+    id_column: str,
+    xml_path: str = "house_purchase.xml",
+    root_tag: str = "records",
+    item_tag: str = "record",
+    id_attr: str = "id",
+    max_rows: int | None = None,
+    chunk_size: int | None = None,
+    engine: str = "vectorized",
+    workers: int | None = None,
+) -> str:
+    """Gera um XML a partir de um CSV, garantindo um ID numérico (ver iter_record_chunks)."""
+    root_tag, chunks = iter_record_chunks(csv_path, id_column, max_rows, chunk_size, engine, workers)
+    with open(xml_path, "w", encoding="utf-8") as f:
+        f.write(document_start(root_tag))
+        for chunk in chunks:
+            f.write(chunk)
+        f.write(document_end(root_tag))
 
     return xml_path
 
@@ -0,0 +1,136 @@
+"""Modo de baixa memória: índice de offsets dos registos no XML, lido de um ficheiro mapeado em memória.
+
+Em vez da árvore lxml completa, guarda-se apenas onde começa e quanto mede cada registo; um
+registo pedido por ID é fatiado diretamente do mmap e as XPath são avaliadas lote a lote sobre
+pequenos documentos com esses fragmentos.
+"""
+import mmap
+import re
+from xml.sax.saxutils import unescape
+
+import numpy as np
+from lxml import etree
+
+# registos avaliados de cada vez nas XPath em streaming
+DEFAULT_BATCH = 2000
+_ATTR_ENTITIES = {"&quot;": '"', "&apos;": "'"}
+_STRING_LITERAL = re.compile(r"'[^']*'|\"[^\"]*\"")
+# construções que dependem do documento inteiro: avaliadas lote a lote davam um resultado por lote
+# (ex.: (//property)[1] devolvia o primeiro registo de cada lote)
+_DOCUMENT_WIDE = [
+    (re.compile(r"\b(position|last)\s*\("), "position()/last()"),
+    (re.compile(r"\[\s*[-+]?[0-9.]"), "predicados numéricos ([1], ...)"),
+    (re.compile(r"\)\s*\["), "predicados sobre expressões entre parênteses"),
+    (re.compile(r"\b(preceding|following)(-sibling)?\s*::"), "eixos preceding/following"),
+]
+# caminho absoluto dentro de um predicado (ex.: //a[. = //b]): só vê o lote
+_ABSOLUTE_IN_PREDICATE = re.compile(r"(^|[\[(,=<>|+\-]|\b(and|or|div|mod))\s*/")
+
+
+def batch_unsupported(query: str) -> str | None:
+    """Motivo pelo qual ``query`` não pode ser avaliada lote a lote, ou None.
+
+    Verificação conservadora sobre o texto da expressão: recusa também alguns casos que seriam
+    locais a cada registo (ex.: ``//property/city[1]``).
+    """
+    text = _STRING_LITERAL.sub("''", query)
+    for pattern, what in _DOCUMENT_WIDE:
+        if pattern.search(text):
+            return what
+    depth, start = 0, 0
+    for pos, char in enumerate(text):
+        if char == "[":
+            depth += 1
+            if depth == 1:
+                start = pos + 1
+        elif char == "]" and depth:
+            depth -= 1
+            if not depth and _ABSOLUTE_IN_PREDICATE.search(text[start:pos]):
+                return "caminhos absolutos dentro de predicados"
+    return None
+
+
+class WellFormedOnly:
+    """Alvo do parser que só confirma que o XML está bem formado, sem construir a árvore.
+
+    Sem ``start``/``end``/``data`` o lxml não chama Python por cada elemento.
+    """
+
+    def close(self):
+        return None
+
+
+def first_tags(xml_path: str):
+    """(tag da raiz, tag do primeiro registo, atributos do primeiro registo) lidos só do início do ficheiro."""
+    tags = []
+    for _, elem in etree.iterparse(xml_path, events=("start",)):
+        tags.append((elem.tag, list(elem.attrib.keys())))
+        if len(tags) == 2:
+            break
+    if not tags:
+        raise ValueError(f"{xml_path} não tem elementos")
+    root_tag = tags[0][0]
+    item_tag, attrs = tags[1] if len(tags) == 2 else (None, [])
+    return root_tag, item_tag, attrs
+
+
+class OffsetIndex:
+    """Início e fim (em bytes) de cada registo no XML e o respetivo ID, pela ordem do ficheiro."""
+
+    def __init__(self, xml_path: str, root_tag: str, item_tag: str, id_attr: str, starts, ends, ids):
+        self.xml_path = xml_path
+        self.root_tag = root_tag
+        self.item_tag = item_tag
+        self.id_attr = id_attr
+        self.starts = starts
+        self.ends = ends
+        self.ids = ids
+        with open(xml_path, "rb") as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self._view = memoryview(self._mm)
+
+    @classmethod
+    def build(cls, xml_path: str, item_tag=None, id_attr=None):
+        """Uma passagem sobre o ficheiro mapeado: localiza cada <item_tag> e lê o atributo de ID."""
+        root_tag, first_item, attrs = first_tags(xml_path)
+        item_tag = item_tag or first_item
+        id_attr = id_attr or (attrs[0] if attrs else "id")
+        if item_tag is None:
+            return cls(xml_path, root_tag, root_tag, id_attr, np.zeros(0, np.int64), np.zeros(0, np.int64), [])
+        tag = re.escape(item_tag.encode("utf-8"))
+        # <tag .../> ou <tag ...>...</tag>; registos do mesmo tipo não se aninham
+        record_re = re.compile(rb"<" + tag + rb"(?=[\s/>])([^>]*?)(?:/>|>.*?</" + tag + rb"\s*>)", re.DOTALL)
+        id_re = re.compile(rb"(?:^|\s)" + re.escape(id_attr.encode("utf-8")) + rb"\s*=\s*(?:\"([^\"]*)\"|'([^']*)')")
+        starts, ends, ids = [], [], []
+        with open(xml_path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            for match in record_re.finditer(mm):
+                starts.append(match.start())
+                ends.append(match.end())
+                found = id_re.search(match.group(1))
+                value = None
+                if found:
+                    raw = found.group(1) if found.group(1) is not None else found.group(2)
+                    value = unescape(raw.decode("utf-8"), _ATTR_ENTITIES)
+                ids.append(value)
+        return cls(
+            xml_path, root_tag, item_tag, id_attr, np.array(starts, dtype=np.int64), np.array(ends, dtype=np.int64), ids
+        )
+
+    def __len__(self):
+        return len(self.starts)
+
+    def record_bytes(self, pos: int):
+        # fatia do mmap, sem cópia
+        return self._view[self.starts[pos] : self.ends[pos]]
+
+    def record_text(self, pos: int) -> str:
+        return str(self.record_bytes(pos), "utf-8")
+
+    def iter_documents(self, batch_size: int = DEFAULT_BATCH):
+        """Documentos <raiz> com até ``batch_size`` registos cada, pela ordem do ficheiro."""
+        open_tag = f"<{self.root_tag}>".encode("utf-8")
+        close_tag = f"</{self.root_tag}>".encode("utf-8")
+        for first in range(0, len(self), batch_size):
+            last = min(first + batch_size, len(self))
+            body = b"".join(self._view[start:end] for start, end in zip(self.starts[first:last], self.ends[first:last]))
+            yield open_tag + body + close_tag